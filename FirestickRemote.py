@@ -1,107 +1,93 @@
 import os
 import sys
-import shutil
-import threading
-import subprocess
 import time
+
+STARTUP_MARKS = [("start", time.perf_counter())]
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Headless mode: hand straight over to the CLI before tkinter and the
+    # updater stack are imported.
+    from firestick_cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
+import subprocess
 import re
-import json
-import zipfile
-import tempfile
-import urllib.request
-import urllib.error
+import math
+import ipaddress
+from app_settings import load_settings, save_settings
+from console import ConsoleBuffer, ConsoleView
+from inventory import DeviceInventory, describe_device
+from keep_alive import KEEP_ALIVE_CLOSE_TIMEOUT, KEEP_ALIVE_LANE, KeepAlive
+from key_inject import RawKeyInjector
+from latency import TimedAction, add_trace_hook, jsonl_trace_hook, latency_stats, since_ms, trace
+from logcat import LEVEL, LogcatReader, LogStore, format_entry, parse_query, parse_tags
+from macros import Macro, MacroPlayer, MacroRecorder
+from screen_mirror import MIRROR_FPS, MIRROR_MAX_SIZE, ScreenMirror, open_source
+from text_input import TextSender
+from adb_commands import (
+    ActionExecutor, KeyEventQueue, ReconnectSupervisor, StreamingCommand, _bin_dir, adb_connect, adb_disconnect,
+    close_shell_session, device_authorized, device_lane, device_tracker, init_adb_keys,
+    is_connection_error, log, run_adb_command, slow_lane
+)
 import tkinter as tk
+from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import ttk
 
+# The updater stack (downloads, bin_update, urllib/ssl) and adb_scan (asyncio)
+# are imported where they are used, so none of it delays the first window.
+
 APP_VERSION = "1.2.6"
 BIN_REQUIRED_VERSION = "1.0.0"
 
 GITHUB_OWNER = "McEwann"
 GITHUB_REPO = "firestick-remote"
 
+# Startup update check: shown from the on-disk cache at once, refreshed from
+# GitHub a few seconds later at most once per UPDATE_CHECK_TTL, and a newer
+# release is downloaded in the background so installing it is instant.
+UPDATE_CHECK_TTL = 6 * 3600
+UPDATE_CHECK_DELAY_MS = 5000
+UPDATE_PREFETCH = True
+
+# Reconnect to the devices that were connected last time as soon as the adb
+# server is up, without waiting for a Connect click.
+RECONNECT_ON_LAUNCH = True
+
+# Manual commands after which a device's app list is refetched.
+PACKAGE_CHANGE_WORDS = ("install", "install-multiple", "uninstall", "enable", "disable", "disable-user")
+
 DANGEROUS_KEYWORDS = [
     "reboot", "rm ", "wipe", "factory", "uninstall", "format",
     "pm uninstall", "recovery", "bootloader"
 ]
 
+CMD_DEFAULT_TIMEOUT = "30"
 
-def _base_dir() -> str:
-    if getattr(sys, "frozen", False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.abspath(__file__))
+LOG_VIEW_LINES = 5000
+LOG_LEVEL_KINDS = {"W": "warn", "E": "error", "F": "error", "A": "error"}
 
 
-def _bin_dir() -> str:
-    return os.path.join(_base_dir(), "bin")
-
-
-def init_adb_keys() -> None:
-    key_path = os.path.join(_bin_dir(), "firestick_remote_adbkey")
-    if os.path.exists(key_path):
-        os.environ["ADB_VENDOR_KEYS"] = key_path
-        print("Using bundled ADB key:", key_path)
-    else:
-        print("Bundled ADB key not found; using default adb keys.")
-
-
-def adb_path() -> str:
-    candidate = os.path.join(_bin_dir(), "adb.exe")
-    if os.path.exists(candidate):
-        return candidate
-    return shutil.which("adb") or "adb"
-
-
-def run_adb_command(args):
-    cmd = [adb_path()] + args
-    startupinfo = None
-    creationflags = 0
-    if os.name == "nt":
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        creationflags = subprocess.CREATE_NO_WINDOW
-    try:
-        completed = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            startupinfo=startupinfo,
-            creationflags=creationflags
-        )
-        ok = (completed.returncode == 0)
-        out = (completed.stdout or "").strip()
-        err = (completed.stderr or "").strip()
-        print("adb >", " ".join(cmd))
-        if out:
-            print("out >", out)
-        if err:
-            print("err >", err, file=sys.stderr)
-        return ok, out, err
-    except FileNotFoundError:
-        return False, "", (
-            "adb executable not found.\n\n"
-            "Make sure bin/adb.exe is next to FirestickRemote.exe, "
-            "or add adb to your PATH."
-        )
-    except Exception as e:
-        return False, "", str(e)
+def startup_mark(name: str) -> None:
+    STARTUP_MARKS.append((name, time.perf_counter()))
 
 
-def device_authorized() -> bool:
-    ok, out, _ = run_adb_command(["devices"])
-    if not ok:
-        return False
-    for line in out.splitlines():
-        if "\tunauthorized" in line:
-            return False
-        if "\tdevice" in line:
-            return True
-    return False
+def startup_report(warm_up: dict) -> dict:
+    start = STARTUP_MARKS[0][1]
+    steps = {name: round((t - prev) * 1000, 1) for (_, prev), (name, t) in zip(STARTUP_MARKS, STARTUP_MARKS[1:])}
+    marks = {name: round((t - start) * 1000, 1) for name, t in STARTUP_MARKS}
+    return {
+        "steps_ms": steps,
+        "warm_up_ms": warm_up,
+        "window_ms": marks.get("first frame"),
+        "ready_ms": marks.get("warm-up"),
+        "frozen": bool(getattr(sys, "frozen", False)),
+    }
 
 
 def _bin_version_path() -> str:
-    return os.path.join(_bin_dir(), "bin_version.txt")
+    from bin_update import BIN_VERSION_FILE
+    return os.path.join(_bin_dir(), BIN_VERSION_FILE)
 
 
 def read_bin_version() -> str:
@@ -122,24 +108,35 @@ def _version_tuple(v: str):
     return tuple(parts)
 
 
-def bin_is_compatible() -> bool:
-    found = read_bin_version()
+def bin_is_compatible(found: str | None = None) -> bool:
+    if found is None:
+        found = read_bin_version()
     if not found:
         return False
     return _version_tuple(found) >= _version_tuple(BIN_REQUIRED_VERSION)
 
 
-def _http_json(url: str) -> dict:
-    req = urllib.request.Request(url)
-    req.add_header("Accept", "application/vnd.github+json")
-    req.add_header("User-Agent", "FirestickRemoteUpdater/1.0")
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode("utf-8", errors="replace"))
+update_downloads = None
+
+
+def _downloads():
+    global update_downloads
+    if update_downloads is None:
+        from downloads import DownloadManager
+        update_downloads = DownloadManager()
+    return update_downloads
+
+
+def _http_json(url: str, max_age: float | None = None) -> dict:
+    return _downloads().get_json(url, {"Accept": "application/vnd.github+json"}, max_age)
+
 
+def _latest_release_url() -> str:
+    return f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
 
-def get_latest_release() -> dict:
-    url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/releases/latest"
-    return _http_json(url)
+
+def get_latest_release(max_age: float | None = None) -> dict:
+    return _http_json(_latest_release_url(), max_age)
 
 
 def find_asset_download_url(release_json: dict, asset_name: str) -> str | None:
@@ -149,11 +146,8 @@ def find_asset_download_url(release_json: dict, asset_name: str) -> str | None:
     return None
 
 
-def download_public_file(url: str, dest_path: str) -> None:
-    req = urllib.request.Request(url)
-    req.add_header("User-Agent", "FirestickRemoteUpdater/1.0")
-    with urllib.request.urlopen(req, timeout=180) as resp, open(dest_path, "wb") as f:
-        shutil.copyfileobj(resp, f)
+def download_public_file(url: str, dest_path: str, sha256: str | None = None) -> None:
+    _downloads().copy_to(url, dest_path, sha256)
 
 
 def _validate_downloaded_exe(path: str) -> None:
@@ -168,35 +162,71 @@ def _validate_downloaded_exe(path: str) -> None:
         raise RuntimeError("Downloaded file is not a valid Windows executable (missing MZ header).")
 
 
-def read_manifest_from_release(release_json: dict) -> dict:
+def read_manifest_from_release(release_json: dict, max_age: float | None = None) -> dict:
     url = find_asset_download_url(release_json, "manifest.json")
     if not url:
         raise RuntimeError("Release is missing manifest.json asset.")
-    tmp = os.path.join(tempfile.gettempdir(), f"firestick_manifest_{int(time.time())}.json")
-    download_public_file(url, tmp)
-    with open(tmp, "r", encoding="utf-8") as f:
-        manifest = json.load(f)
-    try:
-        os.remove(tmp)
-    except Exception:
-        pass
-    return manifest
+    return _downloads().get_json(url, max_age=max_age)
 
 
-def apply_bin_update(zip_path: str, bin_dir: str) -> None:
-    os.makedirs(bin_dir, exist_ok=True)
-    with zipfile.ZipFile(zip_path, "r") as z:
-        for member in z.infolist():
-            name = member.filename.replace("\\", "/")
-            if name.startswith("/") or ".." in name.split("/"):
-                continue
-            target_path = os.path.join(bin_dir, name)
-            os.makedirs(os.path.dirname(target_path), exist_ok=True)
-            with z.open(member, "r") as src, open(target_path, "wb") as dst:
-                shutil.copyfileobj(src, dst)
+def cached_update_info():
+    # (release, manifest) from the last check, without touching the network.
+    release = _downloads().cached_json(_latest_release_url())
+    url = find_asset_download_url(release, "manifest.json") if release else None
+    manifest = _downloads().cached_json(url) if url else None
+    return (release, manifest) if manifest else None
+
+
+def update_version(manifest: dict) -> str | None:
+    latest = str(manifest.get("app_version", "")).strip().lstrip("v")
+    return latest if latest and _version_tuple(latest) > _version_tuple(APP_VERSION) else None
+
+
+def bin_update_needed(manifest: dict) -> bool:
+    required = str(manifest.get("bin_required_version", "")).strip()
+    return bool(required) and _version_tuple(read_bin_version() or "0.0.0") < _version_tuple(required)
+
+
+def prefetch_update(release_json: dict, manifest: dict) -> None:
+    # Downloads (or resumes) everything the install needs into the cache.
+    exe_name = manifest.get("exe_asset", "FirestickRemote.exe")
+    exe_url = find_asset_download_url(release_json, exe_name)
+    if not exe_url:
+        raise RuntimeError(f"Release is missing required asset: {exe_name}")
+    _downloads().fetch(exe_url, manifest.get("exe_sha256"))
+    if bin_update_needed(manifest):
+        from bin_update import BinReleaseSource
+        source = BinReleaseSource(manifest, lambda name: find_asset_download_url(release_json, name), _downloads())
+        source.prefetch(_bin_dir())
+
+
+def apply_bin_update(release_json: dict, manifest: dict, bin_dir: str):
+    # Only files whose hash differs from bin are fetched; see bin_update.
+    from bin_update import BIN_VERSION_FILE, BinReleaseSource, apply_bin_delta
+    required = str(manifest.get("bin_required_version", "")).strip()
+    source = BinReleaseSource(manifest, lambda name: find_asset_download_url(release_json, name), _downloads())
+
+    def validate(new_bin_dir):
+        try:
+            with open(os.path.join(new_bin_dir, BIN_VERSION_FILE), "r", encoding="utf-8") as f:
+                found = f.read().strip()
+        except OSError:
+            raise RuntimeError(f"{BIN_VERSION_FILE} is missing.")
+        if not found or (required and _version_tuple(found) < _version_tuple(required)):
+            raise RuntimeError(f"{BIN_VERSION_FILE} says {found or 'nothing'}, expected {required}.")
+
+    # adb.exe is locked while its server runs, which would block the folder
+    # swap; the device tracker would start it again from bin right away.
+    device_tracker.pause()
+    try:
+        return apply_bin_delta(bin_dir, source.files(), source.fetch, validate,
+                               before_swap=lambda: run_adb_command(["kill-server"]))
+    finally:
+        device_tracker.resume()
 
 
 def schedule_exe_swap(new_exe_path: str, current_exe_path: str) -> None:
+    import tempfile
     bat = os.path.join(tempfile.gettempdir(), "firestick_update.bat")
     script = f"""@echo off
 setlocal
@@ -219,14 +249,29 @@ class FirestickRemote(ttk.Frame):
     def __init__(self, master: tk.Tk):
         super().__init__(master)
         self.master = master
-        self.ip_var = tk.StringVar(value="")
-        self.port_var = tk.StringVar(value="5555")
+        self.settings = load_settings()
+        last_ip, _, last_port = (self.settings.get("last_targets") or [""])[0].partition(":")
+        self.ip_var = tk.StringVar(value=last_ip)
+        self.port_var = tk.StringVar(value=last_port or "5555")
         self.status_var = tk.StringVar(value="Not connected")
         self.is_connected = False
+        self.devices = {}
+        self.executor = ActionExecutor()
+        self._key_queues = {}
+        self.supervisor = ReconnectSupervisor(on_event=self._on_reconnect_event)
+        self.queue_var = tk.StringVar(value="")
+        self.target_var = tk.StringVar(value="")
+        self.fleet_var = tk.StringVar(value="")
+        self.fleet_tree = None
+        self.scan_identify_var = tk.BooleanVar(value=False)
+        self.scan_btn = None
         self.remote_buttons = []
         self.keep_alive_var = tk.BooleanVar(value=False)
-        self._keepalive_stop = threading.Event()
-        self._keepalive_thread = None
+        self.keep_alive = KeepAlive(self.executor, saved=self.settings.get("keep_alive_saved"),
+                                    on_saved=self._on_keep_alive_saved)
+        self.raw_keys_var = tk.BooleanVar(value=bool(self.settings.get("raw_keys")))
+        self._closing = False
+        self._closed = False
         self.cmd_var = tk.StringVar(value="")
         self.advanced_cmd_var = tk.BooleanVar(value=False)
         self._cmd_history = []
@@ -235,16 +280,68 @@ class FirestickRemote(ttk.Frame):
         self.cmd_send_btn = None
         self.advanced_cb = None
         self.cmd_output = None
+        self.cmd_timeout_var = tk.StringVar(value=CMD_DEFAULT_TIMEOUT)
+        self.cmd_filter_var = tk.StringVar(value="")
+        self._streams = set()
 
         # NEW: Send Text box
         self.text_var = tk.StringVar(value="")
         self.text_entry = None
         self.text_send_btn = None
 
+        self.recorder = MacroRecorder()
+        self.macro = None
+        self._macro_player = None
+        self.macro_var = tk.StringVar(value="No macro loaded")
+        self.macro_speed_var = tk.StringVar(value="1x")
+        self.macro_record_btn = None
+        self.macro_play_btn = None
+
+        self._mirror = None
+        self._mirror_serial = None
+        self._mirror_image = None
+        self._mirror_draw_ms = 0.0
+        self._mirror_after = None
+        self.mirror_var = tk.StringVar(value="Preview off")
+        self.mirror_btn = None
+        self.mirror_canvas = None
+
+        self.log_store = LogStore()
+        self._logcat = None
+        self._log_rate_seq = 0
+        self.log_tags_var = tk.StringVar(value="")
+        self.log_level_var = tk.StringVar(value="V")
+        self.log_search_var = tk.StringVar(value="")
+        self.log_status_var = tk.StringVar(value="Not streaming")
+        self.logcat_btn = None
+        self.log_view = None
+
+        self.inventory = DeviceInventory()
+        self.apps_filter_var = tk.StringVar(value="")
+        self.apps_user_only_var = tk.BooleanVar(value=True)
+        self.apps_status_var = tk.StringVar(value="Connect to list apps")
+        self.apps_tree = None
+        self._apps_serial = None
+        self._inventory_pending = set()
+
+        self.latency_by_var = tk.StringVar(value="action")
+        self.latency_status_var = tk.StringVar(value="No actions timed yet")
+        self.latency_tree = None
+        self._latency_drawn = None
+
+        self.update_info = None
+        self.update_ready = None
+        self.bin_version = None
+        self._update_note = ""
+        self._warm_up_ms = {}
+
         self._configure_style()
         self._build_ui()
         self.update_remote_buttons_state()
         self._center_window()
+        self._refresh_queue_stats()
+        device_tracker.add_listener(self._on_device_state)
+        device_tracker.start()
         self.master.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _configure_style(self):
@@ -290,6 +387,13 @@ class FirestickRemote(ttk.Frame):
         style.map("Card.TCheckbutton",
                   foreground=[("disabled", "#4b5563")],
                   background=[("active", bg_card)])
+        style.configure("Fleet.Treeview", background=bg_remote, fieldbackground=bg_remote,
+                        foreground=text_main, font=("Segoe UI", 9), rowheight=20, borderwidth=0)
+        style.map("Fleet.Treeview",
+                  background=[("selected", "#2563eb")],
+                  foreground=[("selected", text_main)])
+        style.configure("Fleet.Treeview.Heading", background="#1f2937", foreground=text_muted,
+                        font=("Segoe UI", 8, "bold"), relief="flat")
 
     def _make_collapsible_card(self, parent, title: str, row: int):
         card = ttk.Frame(parent, style="Card.TFrame", padding=12)
@@ -375,6 +479,10 @@ class FirestickRemote(ttk.Frame):
         self.status_label = ttk.Label(conn_card, textvariable=self.status_var, style="Status.TLabel")
         self.status_label.grid(row=1, column=0, sticky="w", pady=(8, 0))
 
+        ttk.Label(conn_card, textvariable=self.queue_var, style="Label.TLabel").grid(
+            row=1, column=0, sticky="e", pady=(8, 0)
+        )
+
         self.keep_alive_cb = ttk.Checkbutton(
             conn_card,
             text="Keep Fire TV awake",
@@ -384,13 +492,21 @@ class FirestickRemote(ttk.Frame):
         )
         self.keep_alive_cb.grid(row=2, column=0, sticky="w", pady=(6, 0))
 
+        ttk.Checkbutton(
+            conn_card,
+            text="Fast keys (sendevent)",
+            variable=self.raw_keys_var,
+            command=self._on_toggle_raw_keys,
+            style="Card.TCheckbutton"
+        ).grid(row=2, column=0, sticky="e", pady=(6, 0))
+
         update_row = ttk.Frame(conn_card, style="Card.TFrame")
         update_row.grid(row=3, column=0, sticky="ew", pady=(10, 0))
         update_row.columnconfigure(0, weight=1)
 
         self.version_label = ttk.Label(
             update_row,
-            text=f"App v{APP_VERSION} (bin req {BIN_REQUIRED_VERSION}, bin found {read_bin_version() or 'missing'})",
+            text=self._version_text(),
             style="Label.TLabel"
         )
         self.version_label.grid(row=0, column=0, sticky="w")
@@ -400,8 +516,48 @@ class FirestickRemote(ttk.Frame):
         )
         self.update_btn.grid(row=0, column=1, sticky="e")
 
+        fleet_card, fleet_body = self._make_collapsible_card(main, "Devices", row=2)
+        fleet_body.columnconfigure(0, weight=1)
+
+        fleet_entry = ttk.Entry(fleet_body, textvariable=self.fleet_var)
+        fleet_entry.grid(row=0, column=0, sticky="ew", padx=(0, 6))
+        fleet_entry.bind("<Return>", lambda e: self.add_fleet_targets())
+        ttk.Button(fleet_body, text="Add + connect", style="Accent.TButton",
+                   command=self.add_fleet_targets).grid(row=0, column=1)
+        self.scan_btn = ttk.Button(fleet_body, text="Scan network", style="Accent.TButton",
+                                   command=self.scan_network)
+        self.scan_btn.grid(row=0, column=2, padx=(4, 0))
+        ttk.Label(fleet_body, text="ip[:port] or a range to scan (e.g. 192.168.1.0/24)",
+                  style="Label.TLabel").grid(row=1, column=0, columnspan=2, sticky="w", pady=(2, 0))
+        ttk.Checkbutton(fleet_body, text="Identify", variable=self.scan_identify_var,
+                        style="Card.TCheckbutton").grid(row=1, column=2, sticky="w", padx=(4, 0), pady=(2, 0))
+
+        self.fleet_tree = ttk.Treeview(
+            fleet_body, columns=("device", "status", "result"), show="headings",
+            height=4, selectmode="extended", style="Fleet.Treeview"
+        )
+        self.fleet_tree.heading("device", text="Device")
+        self.fleet_tree.heading("status", text="Status")
+        self.fleet_tree.heading("result", text="Last result")
+        self.fleet_tree.column("device", width=130, stretch=False)
+        self.fleet_tree.column("status", width=110, stretch=False)
+        self.fleet_tree.column("result", width=160)
+        self.fleet_tree.grid(row=2, column=0, columnspan=3, sticky="ew", pady=(6, 0))
+        self.fleet_tree.bind("<<TreeviewSelect>>", lambda e: self._refresh_connection_state())
+
+        fleet_btns = ttk.Frame(fleet_body, style="Card.TFrame")
+        fleet_btns.grid(row=3, column=0, columnspan=3, sticky="w", pady=(6, 0))
+        ttk.Button(fleet_btns, text="Connect selected", style="Accent.TButton",
+                   command=self.connect_selected).grid(row=0, column=0, padx=(0, 4))
+        ttk.Button(fleet_btns, text="Disconnect selected", style="Accent.TButton",
+                   command=self.disconnect_selected).grid(row=0, column=1, padx=(0, 4))
+        ttk.Button(fleet_btns, text="Remove", style="Accent.TButton",
+                   command=self.remove_selected).grid(row=0, column=2, padx=(0, 4))
+        ttk.Button(fleet_btns, text="Select all", style="Accent.TButton",
+                   command=lambda: self.fleet_tree.selection_set(self.fleet_tree.get_children())).grid(row=0, column=3)
+
         remote_card = ttk.Frame(main, style="Remote.TFrame", padding=16)
-        remote_card.grid(row=2, column=0, sticky="ew", pady=(12, 0))
+        remote_card.grid(row=3, column=0, sticky="ew", pady=(12, 0))
 
         top_row = ttk.Frame(remote_card, style="Remote.TFrame")
         top_row.grid(row=0, column=0, sticky="ew", pady=(0, 8))
@@ -411,6 +567,8 @@ class FirestickRemote(ttk.Frame):
                   font=("Segoe UI", 10, "bold")).grid(row=0, column=0, sticky="w")
         ttk.Label(top_row, text="Use arrow keys / Enter / Esc as shortcuts", foreground="#6b7280",
                   background="#020617", font=("Segoe UI", 8)).grid(row=1, column=0, sticky="w")
+        ttk.Label(top_row, textvariable=self.target_var, foreground="#38bdf8",
+                  background="#020617", font=("Segoe UI", 8)).grid(row=0, column=1, sticky="e")
 
         remote_grid = ttk.Frame(remote_card, style="Remote.TFrame")
         remote_grid.grid(row=1, column=0, pady=(4, 0))
@@ -442,7 +600,25 @@ class FirestickRemote(ttk.Frame):
         add_bottom("Menu", 82, 2)
         add_bottom("Play / Pause", 85, 3)
 
-        cmd_card, cmd_body = self._make_collapsible_card(main, "Manual ADB Command", row=3)
+        mirror_card, mirror_body = self._make_collapsible_card(main, "Screen", row=4)
+        mirror_body.columnconfigure(1, weight=1)
+
+        self.mirror_btn = ttk.Button(mirror_body, text="Start preview", style="Accent.TButton",
+                                     command=self.toggle_mirror)
+        self.mirror_btn.grid(row=0, column=0, sticky="w")
+        ttk.Label(mirror_body, textvariable=self.mirror_var, style="Label.TLabel").grid(
+            row=0, column=1, sticky="w", padx=(8, 0)
+        )
+        self.mirror_canvas = tk.Canvas(
+            mirror_body, width=MIRROR_MAX_SIZE[0], height=MIRROR_MAX_SIZE[1],
+            bg="#020617", highlightthickness=0
+        )
+        self.mirror_canvas.grid(row=1, column=0, columnspan=2, pady=(8, 0))
+        self._mirror_item = self.mirror_canvas.create_image(
+            MIRROR_MAX_SIZE[0] // 2, MIRROR_MAX_SIZE[1] // 2, anchor="center"
+        )
+
+        cmd_card, cmd_body = self._make_collapsible_card(main, "Manual ADB Command", row=5)
         cmd_body.columnconfigure(1, weight=1)
 
         ttk.Label(cmd_body, text="adb shell", style="Label.TLabel").grid(row=0, column=0, sticky="w")
@@ -451,6 +627,8 @@ class FirestickRemote(ttk.Frame):
 
         self.cmd_send_btn = ttk.Button(cmd_body, text="Send", style="Accent.TButton", command=self.send_manual_command)
         self.cmd_send_btn.grid(row=0, column=2)
+        ttk.Button(cmd_body, text="Cancel", style="Accent.TButton",
+                   command=self.cancel_manual_commands).grid(row=0, column=3, padx=(4, 0))
 
         self.advanced_cb = ttk.Checkbutton(
             cmd_body,
@@ -458,16 +636,57 @@ class FirestickRemote(ttk.Frame):
             variable=self.advanced_cmd_var,
             style="Card.TCheckbutton"
         )
-        self.advanced_cb.grid(row=1, column=0, columnspan=3, sticky="w", pady=(6, 0))
+        self.advanced_cb.grid(row=1, column=0, columnspan=2, sticky="w", pady=(6, 0))
+
+        timeout_row = ttk.Frame(cmd_body, style="Card.TFrame")
+        timeout_row.grid(row=1, column=2, columnspan=2, sticky="e", pady=(6, 0))
+        ttk.Label(timeout_row, text="Timeout (s, 0 = none)", style="Label.TLabel").grid(row=0, column=0)
+        ttk.Entry(timeout_row, textvariable=self.cmd_timeout_var, width=5).grid(row=0, column=1, padx=(4, 0))
 
-        self.cmd_output = tk.Text(
-            cmd_body, height=4, wrap="word",
+        self.cmd_output = ConsoleView(
+            cmd_body, height=6,
             bg="#020617", fg="#e5e7eb", relief="flat"
         )
-        self.cmd_output.grid(row=2, column=0, columnspan=3, sticky="ew", pady=(8, 0))
-        self.cmd_output.configure(state="disabled")
+        self.cmd_output.grid(row=2, column=0, columnspan=4, sticky="ew", pady=(8, 0))
+
+        ttk.Label(cmd_body, text="Filter", style="Label.TLabel").grid(row=3, column=0, sticky="w", pady=(6, 0))
+        filter_entry = ttk.Entry(cmd_body, textvariable=self.cmd_filter_var)
+        filter_entry.grid(row=3, column=1, sticky="ew", padx=(6, 6), pady=(6, 0))
+        filter_entry.bind("<KeyRelease>", lambda e: self.cmd_output.set_filter(self.cmd_filter_var.get()))
+        ttk.Button(cmd_body, text="Clear", style="Accent.TButton",
+                   command=self.cmd_output.clear).grid(row=3, column=2, pady=(6, 0))
+
+        log_card, log_body = self._make_collapsible_card(main, "Logcat", row=6)
+        log_body.columnconfigure(1, weight=1)
+
+        ttk.Label(log_body, text="Tags", style="Label.TLabel").grid(row=0, column=0, sticky="w")
+        ttk.Entry(log_body, textvariable=self.log_tags_var).grid(row=0, column=1, sticky="ew", padx=(6, 6))
+        ttk.Combobox(log_body, textvariable=self.log_level_var, width=3, state="readonly",
+                     values=("V", "D", "I", "W", "E", "F")).grid(row=0, column=2, padx=(0, 4))
+        self.logcat_btn = ttk.Button(log_body, text="Start", style="Accent.TButton", command=self.toggle_logcat)
+        self.logcat_btn.grid(row=0, column=3)
+        ttk.Label(log_body, text="tags to keep, e.g. ActivityManager:I MyApp (empty = all)",
+                  style="Label.TLabel").grid(row=1, column=1, columnspan=3, sticky="w", padx=(6, 0))
+
+        self.log_view = ConsoleView(
+            log_body, ConsoleBuffer(LOG_VIEW_LINES, indexed=False), height=8,
+            bg="#020617", fg="#e5e7eb", relief="flat"
+        )
+        self.log_view.grid(row=2, column=0, columnspan=4, sticky="ew", pady=(8, 0))
+
+        ttk.Label(log_body, text="Search", style="Label.TLabel").grid(row=3, column=0, sticky="w", pady=(6, 0))
+        log_search = ttk.Entry(log_body, textvariable=self.log_search_var)
+        log_search.grid(row=3, column=1, sticky="ew", padx=(6, 6), pady=(6, 0))
+        log_search.bind("<Return>", lambda e: self.search_logs())
+        ttk.Button(log_body, text="Export...", style="Accent.TButton",
+                   command=self.export_logs).grid(row=3, column=2, columnspan=2, sticky="e", pady=(6, 0))
+        ttk.Label(log_body, text="tag:NAME pid:N level:W and/or text; Enter to search, empty for live",
+                  style="Label.TLabel").grid(row=4, column=1, columnspan=3, sticky="w", padx=(6, 0))
+        ttk.Label(log_body, textvariable=self.log_status_var, style="Label.TLabel").grid(
+            row=5, column=0, columnspan=4, sticky="w", pady=(6, 0)
+        )
 
-        text_card, text_body = self._make_collapsible_card(main, "Send Text (to focused field)", row=4)
+        text_card, text_body = self._make_collapsible_card(main, "Send Text (to focused field)", row=7)
         text_body.columnconfigure(1, weight=1)
 
         ttk.Label(text_body, text="Text", style="Label.TLabel").grid(row=0, column=0, sticky="w")
@@ -476,8 +695,78 @@ class FirestickRemote(ttk.Frame):
         self.text_send_btn = ttk.Button(text_body, text="Send", style="Accent.TButton", command=self.send_text)
         self.text_send_btn.grid(row=0, column=2)
 
+        macro_card, macro_body = self._make_collapsible_card(main, "Macros", row=8)
+        macro_body.columnconfigure(5, weight=1)
+
+        self.macro_record_btn = ttk.Button(macro_body, text="Record", style="Accent.TButton",
+                                           command=self.toggle_macro_recording)
+        self.macro_record_btn.grid(row=0, column=0, padx=(0, 4))
+        self.macro_play_btn = ttk.Button(macro_body, text="Play", style="Accent.TButton",
+                                         command=self.toggle_macro_playback)
+        self.macro_play_btn.grid(row=0, column=1, padx=(0, 4))
+        ttk.Button(macro_body, text="Load...", style="Accent.TButton",
+                   command=self.load_macro).grid(row=0, column=2, padx=(0, 4))
+        ttk.Button(macro_body, text="Save...", style="Accent.TButton",
+                   command=self.save_macro).grid(row=0, column=3, padx=(0, 4))
+        ttk.Combobox(macro_body, textvariable=self.macro_speed_var, width=5, state="readonly",
+                     values=("0.5x", "1x", "2x", "4x", "10x")).grid(row=0, column=4, sticky="w")
+        ttk.Label(macro_body, textvariable=self.macro_var, style="Label.TLabel").grid(
+            row=1, column=0, columnspan=6, sticky="w", pady=(6, 0)
+        )
+
+        apps_card, apps_body = self._make_collapsible_card(main, "Apps", row=9)
+        apps_body.columnconfigure(1, weight=1)
+
+        ttk.Label(apps_body, text="Filter", style="Label.TLabel").grid(row=0, column=0, sticky="w")
+        apps_filter = ttk.Entry(apps_body, textvariable=self.apps_filter_var)
+        apps_filter.grid(row=0, column=1, sticky="ew", padx=(6, 6))
+        apps_filter.bind("<KeyRelease>", lambda e: self._draw_apps())
+        ttk.Checkbutton(apps_body, text="User apps only", variable=self.apps_user_only_var,
+                        command=self._draw_apps, style="Card.TCheckbutton").grid(row=0, column=2, padx=(0, 4))
+        ttk.Button(apps_body, text="Refresh", style="Accent.TButton",
+                   command=lambda: self.refresh_apps(force=True)).grid(row=0, column=3, padx=(0, 4))
+        ttk.Button(apps_body, text="Launch", style="Accent.TButton",
+                   command=self.launch_app).grid(row=0, column=4)
+
+        self.apps_tree = ttk.Treeview(apps_body, columns=("package", "version"), show="headings", height=6,
+                                      style="Fleet.Treeview", selectmode="browse")
+        self.apps_tree.heading("package", text="package")
+        self.apps_tree.heading("version", text="version")
+        self.apps_tree.column("package", width=240, stretch=True, anchor="w")
+        self.apps_tree.column("version", width=100, stretch=False, anchor="w")
+        self.apps_tree.grid(row=1, column=0, columnspan=5, sticky="ew", pady=(6, 0))
+        self.apps_tree.bind("<Double-1>", lambda e: self.launch_app())
+        ttk.Label(apps_body, textvariable=self.apps_status_var, style="Label.TLabel").grid(
+            row=2, column=0, columnspan=5, sticky="w", pady=(6, 0)
+        )
+
+        stats_card, stats_body = self._make_collapsible_card(main, "Latency", row=10)
+        stats_body.columnconfigure(1, weight=1)
+
+        ttk.Label(stats_body, text="Group by", style="Label.TLabel").grid(row=0, column=0, sticky="w")
+        ttk.Combobox(stats_body, textvariable=self.latency_by_var, width=8, state="readonly",
+                     values=("action", "device", "both")).grid(row=0, column=1, sticky="w", padx=(6, 0))
+        ttk.Button(stats_body, text="Export JSON...", style="Accent.TButton",
+                   command=lambda: self.export_latency("json")).grid(row=0, column=2, padx=(0, 4))
+        ttk.Button(stats_body, text="Export CSV...", style="Accent.TButton",
+                   command=lambda: self.export_latency("csv")).grid(row=0, column=3, padx=(0, 4))
+        ttk.Button(stats_body, text="Reset", style="Accent.TButton",
+                   command=latency_stats.reset).grid(row=0, column=4)
+
+        columns = ("action", "device", "stage", "count", "p50", "p95", "p99", "max")
+        self.latency_tree = ttk.Treeview(stats_body, columns=columns, show="headings", height=6,
+                                         style="Fleet.Treeview")
+        for col, width in zip(columns, (70, 120, 60, 50, 60, 60, 60, 60)):
+            self.latency_tree.heading(col, text=col if col in ("action", "device", "stage", "count") else f"{col} ms")
+            self.latency_tree.column(col, width=width, stretch=col == "device",
+                                     anchor="w" if col in ("action", "device", "stage") else "e")
+        self.latency_tree.grid(row=1, column=0, columnspan=5, sticky="ew", pady=(6, 0))
+        ttk.Label(stats_body, textvariable=self.latency_status_var, style="Label.TLabel").grid(
+            row=2, column=0, columnspan=5, sticky="w", pady=(6, 0)
+        )
+
         footer = ttk.Frame(main, style="Main.TFrame")
-        footer.grid(row=5, column=0, sticky="ew", pady=(10, 0))
+        footer.grid(row=11, column=0, sticky="ew", pady=(10, 0))
         footer.columnconfigure(0, weight=1)
         ttk.Label(footer, text="Written by Craig Douglas Poole QA", style="Subtitle.TLabel").grid(
             row=0, column=0, sticky="e"
@@ -515,7 +804,6 @@ class FirestickRemote(ttk.Frame):
                 btn.state(["!disabled"])
             self.status_label.configure(style="StatusGood.TLabel")
             self.disconnect_btn.state(["!disabled"])
-            self.connect_btn.state(["disabled"])
             self.keep_alive_cb.state(["!disabled"])
             if self.cmd_entry is not None:
                 self.cmd_entry.state(["!disabled"])
@@ -551,13 +839,10 @@ class FirestickRemote(ttk.Frame):
         c = (cmd or "").lower()
         return any(k in c for k in DANGEROUS_KEYWORDS)
 
-    def _append_cmd_output(self, text: str):
+    def _append_cmd_output(self, text: str, block: int | None = None, kind: str | None = None):
         if self.cmd_output is None:
             return
-        self.cmd_output.configure(state="normal")
-        self.cmd_output.insert("end", text + "\n")
-        self.cmd_output.see("end")
-        self.cmd_output.configure(state="disabled")
+        self.cmd_output.append(text, block, kind)
 
     def _push_history(self, cmd: str):
         cmd = (cmd or "").strip()
@@ -602,11 +887,11 @@ class FirestickRemote(ttk.Frame):
         if not cmd:
             return
         self._push_history(cmd)
-        if self.advanced_cmd_var.get():
-            args = cmd.split()
+        args = cmd.split()
+        advanced = self.advanced_cmd_var.get()
+        if advanced:
             shown = f"adb {cmd}"
         else:
-            args = ["shell"] + cmd.split()
             shown = f"adb shell {cmd}"
         if self._is_dangerous(cmd):
             ok = messagebox.askyesno(
@@ -617,24 +902,57 @@ class FirestickRemote(ttk.Frame):
             )
             if not ok:
                 return
-        self._append_cmd_output(f"$ {shown}")
+        try:
+            timeout = float(self.cmd_timeout_var.get().strip() or 0)
+        except ValueError:
+            messagebox.showerror("Invalid timeout", "Timeout must be a number of seconds (0 for none).")
+            return
+        block = self.cmd_output.begin_block(f"$ {shown}")
+        trace("invoke", action="send_manual_command", command=shown, devices=None if advanced else self._targets())
+
+        if advanced:
+            self._submit(slow_lane(None), self._stream_worker(None, args, False, True, timeout, block))
+            return
+
+        targets = self._targets()
+        for serial in targets:
+            self._submit(slow_lane(serial), self._stream_worker(serial, args, len(targets) > 1, False, timeout, block))
+
+    def _stream_worker(self, serial: str | None, args, multi: bool, raw_adb: bool, timeout: float, block: int):
+        prefix = self._result_prefix(serial, multi)
+        stream = StreamingCommand(
+            args, serial, raw_adb, timeout or None,
+            on_line=lambda line: self._append_cmd_output(prefix + line, block)
+        )
+        self._streams.add(stream)
+        submitted = time.perf_counter()
 
         def worker():
-            ok, out, err = run_adb_command(args)
-            result = out if out else err if err else "OK"
-            prefix = "✓" if ok else "✗"
-            self.master.after(0, lambda: self._append_cmd_output(f"{prefix} {result}\n"))
-        threading.Thread(target=worker, daemon=True).start()
-
-    # NEW: Send Text helpers
-    def _escape_adb_input_text(self, s: str) -> str:
-        s = (s or "").strip()
-        if not s:
-            return ""
-        s = s.replace(" ", "%s")
-        for ch in r'\|&;<>()$`"\'*?[]{}!':
-            s = s.replace(ch, "\\" + ch)
-        return s
+            with TimedAction(serial, "command", queue_ms=since_ms(submitted), ui=True) as timed:
+                try:
+                    ok, out, err = stream.run()
+                finally:
+                    self._streams.discard(stream)
+                timed.ok = ok
+            result = out if ok else err or "failed"
+            mark = "✓" if ok else "✗"
+            self._append_cmd_output(f"{prefix}{mark} {result}", block, "ok" if ok else "error")
+            changes_packages = any(word in PACKAGE_CHANGE_WORDS for word in args)
+
+            def finish_ui():
+                if serial is not None:
+                    self._set_device_result(serial, f"{mark} {result[:60]}")
+                if changes_packages:
+                    # Raw `adb install` has no serial: every device's list may be stale.
+                    self.inventory.invalidate(serial)
+                    self.refresh_apps()
+                timed.ui_done()
+            self.master.after(0, finish_ui)
+        return worker
+
+    def cancel_manual_commands(self):
+        for stream in list(self._streams):
+            stream.cancel()
 
     def send_text(self):
         if not self.is_connected:
@@ -643,17 +961,39 @@ class FirestickRemote(ttk.Frame):
         raw = self.text_var.get()
         if not raw.strip():
             return
-        escaped = self._escape_adb_input_text(raw)
-        self._append_cmd_output(f'$ adb shell input text "{raw}"')
+        text = raw.strip()
+        block = self.cmd_output.begin_block(f'$ adb shell input text "{text}"')
+        self.recorder.record_text(text)
+
+        targets = self._targets()
+        trace("invoke", action="send_text", chars=len(text), devices=targets)
+        for serial in targets:
+            self._submit(device_lane(serial), self._text_worker(serial, text, len(targets) > 1, block))
+
+    def _text_worker(self, serial: str, text: str, multi: bool, block: int):
+        def progress(sent, total):
+            self.master.after(0, lambda: self._set_device_result(serial, f"typing {sent}/{total}"))
+
+        submitted = time.perf_counter()
 
         def worker():
-            ok, out, err = run_adb_command(["shell", "input", "text", escaped])
-            result = out if out else err if err else "OK"
+            with TimedAction(serial, "text", queue_ms=since_ms(submitted), ui=True) as timed:
+                ok, out, err = TextSender(serial, text, on_progress=progress).run()
+                timed.ok = ok
+            result = out if ok else err or "failed"
             prefix = "✓" if ok else "✗"
-            self.master.after(0, lambda: self._append_cmd_output(f"{prefix} {result}\n"))
-        threading.Thread(target=worker, daemon=True).start()
+
+            def finish_ui():
+                self._append_cmd_output(f"{self._result_prefix(serial, multi)}{prefix} {result}", block,
+                                        "ok" if ok else "error")
+                self._set_device_result(serial, f"{prefix} {result.splitlines()[0][:60]}")
+                timed.ui_done()
+            self.master.after(0, finish_ui)
+        return worker
 
     def check_updates(self):
+        import urllib.error
+
         def worker():
             if not GITHUB_OWNER or not GITHUB_REPO:
                 self.master.after(0, lambda: messagebox.showerror(
@@ -677,10 +1017,10 @@ class FirestickRemote(ttk.Frame):
                 self.master.after(0, lambda: self.update_btn.state(["!disabled"]))
                 return
 
+            self.master.after(0, lambda: self._set_update_info(release, manifest))
             latest_app = str(manifest.get("app_version", "")).strip().lstrip("v")
-            latest_bin_req = str(manifest.get("bin_required_version", "")).strip()
             exe_name = manifest.get("exe_asset", "FirestickRemote.exe")
-            bin_name = manifest.get("bin_asset", "bin_update.zip")
+            exe_sha256 = manifest.get("exe_sha256")
 
             if not latest_app:
                 self.master.after(0, lambda: messagebox.showerror("Update error", "manifest.json missing app_version."))
@@ -715,12 +1055,14 @@ class FirestickRemote(ttk.Frame):
                 if not yes:
                     self.update_btn.state(["!disabled"])
                     return
-                threading.Thread(target=do_update, daemon=True).start()
+                if not self._submit("update", do_update):
+                    self.update_btn.state(["!disabled"])
 
             def do_update():
+                import tempfile
                 tmp_exe = os.path.join(tempfile.gettempdir(), f"FirestickRemote_{latest_app}.new.exe")
                 try:
-                    download_public_file(exe_url, tmp_exe)
+                    download_public_file(exe_url, tmp_exe, exe_sha256)
                     _validate_downloaded_exe(tmp_exe)
                 except Exception as e:
                     self.master.after(0, lambda: messagebox.showerror(
@@ -730,21 +1072,9 @@ class FirestickRemote(ttk.Frame):
                     self.master.after(0, lambda: self.update_btn.state(["!disabled"]))
                     return
 
-                found_bin = read_bin_version()
-                if latest_bin_req and (_version_tuple(found_bin or "0.0.0") < _version_tuple(latest_bin_req)):
-                    bin_url = find_asset_download_url(release, bin_name)
-                    if not bin_url:
-                        self.master.after(0, lambda: messagebox.showerror(
-                            "Bin update required",
-                            f"This update requires bin version {latest_bin_req}, but the release has no {bin_name} asset."
-                        ))
-                        self.master.after(0, lambda: self.update_btn.state(["!disabled"]))
-                        return
-
-                    tmp_zip = os.path.join(tempfile.gettempdir(), f"FirestickRemote_bin_{latest_bin_req}.zip")
+                if bin_update_needed(manifest):
                     try:
-                        download_public_file(bin_url, tmp_zip)
-                        apply_bin_update(tmp_zip, _bin_dir())
+                        apply_bin_update(release, manifest, _bin_dir())
                     except Exception as e:
                         self.master.after(0, lambda: messagebox.showerror(
                             "Bin update failed",
@@ -752,11 +1082,6 @@ class FirestickRemote(ttk.Frame):
                         ))
                         self.master.after(0, lambda: self.update_btn.state(["!disabled"]))
                         return
-                    finally:
-                        try:
-                            os.remove(tmp_zip)
-                        except Exception:
-                            pass
 
                 if not getattr(sys, "frozen", False):
                     self.master.after(0, lambda: messagebox.showinfo(
@@ -772,43 +1097,134 @@ class FirestickRemote(ttk.Frame):
 
             self.master.after(0, confirm_and_continue)
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._submit("update", worker)
 
-    def send_ok(self):
-        if not self.is_connected:
-            messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
+    def _version_text(self) -> str:
+        found = "checking..." if self.bin_version is None else (self.bin_version or "missing")
+        text = f"App v{APP_VERSION} (bin req {BIN_REQUIRED_VERSION}, bin found {found})"
+        return f"{text} · {self._update_note}" if self._update_note else text
+
+    def _refresh_version_label(self):
+        self.version_label.configure(text=self._version_text())
+
+    def _warm_up(self):
+        # Runs once the window is up: everything startup used to do before it.
+        def worker():
+            timings = {}
+            t0 = time.perf_counter()
+            ok, _, err = run_adb_command(["start-server"])
+            if not ok:
+                log("adb start-server failed >", err, error=True)
+            t1 = time.perf_counter()
+            bin_version = read_bin_version()
+            targets = [t for t in self.settings.get("last_targets", []) if self._parse_target(t) == t]
+            if RECONNECT_ON_LAUNCH and targets and bin_is_compatible(bin_version):
+                self.master.after(0, lambda: self._connect_targets(targets, quiet=True))
+            t2 = time.perf_counter()
+            try:
+                cached = cached_update_info()
+            except Exception as e:
+                log("reading cached update info failed >", repr(e), error=True)
+                cached = None
+            t3 = time.perf_counter()
+            timings["adb start-server"] = round((t1 - t0) * 1000, 1)
+            timings["bin version"] = round((t2 - t1) * 1000, 1)
+            timings["updater"] = round((t3 - t2) * 1000, 1)
+            self.master.after(0, lambda: self._finish_warm_up(bin_version, cached, timings))
+
+        self._submit("app", worker)
+
+    def _finish_warm_up(self, bin_version: str, cached, timings: dict):
+        self.bin_version = bin_version
+        if cached:
+            self._set_update_info(*cached)
+        else:
+            self._refresh_version_label()
+        startup_mark("warm-up")
+        self._warm_up_ms = timings
+        report = startup_report(timings)
+        log("startup >", ", ".join(f"{k} {v}ms" for k, v in report["steps_ms"].items()),
+            "| warm-up", ", ".join(f"{k} {v}ms" for k, v in timings.items()))
+        path = os.environ.get("FSR_STARTUP_REPORT")
+        if path:
+            # Measurement runs (bench/bench_startup.py): write the numbers and quit.
+            import json
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.master.after(0, self._on_close)
+            return
+        self.master.after(UPDATE_CHECK_DELAY_MS, self._background_update_check)
+
+    def _set_update_info(self, release: dict, manifest: dict):
+        self.update_info = (release, manifest)
+        latest = update_version(manifest)
+        if latest is None:
+            self._update_note = "up to date"
+        elif self.update_ready == latest:
+            self._update_note = f"v{latest} downloaded, ready to install"
+        else:
+            self._update_note = f"v{latest} available"
+        self._refresh_version_label()
+        self.update_btn.configure(text=f"Install v{latest}" if latest else "Check for updates")
+
+    def _background_update_check(self):
+        if not GITHUB_OWNER or not GITHUB_REPO:
             return
 
         def worker():
-            run_adb_command(["shell", "input", "keyevent", "66"])
+            try:
+                release = get_latest_release(UPDATE_CHECK_TTL)
+                manifest = read_manifest_from_release(release, UPDATE_CHECK_TTL)
+            except Exception as e:
+                log("background update check failed >", repr(e), error=True)
+                return
+            self.master.after(0, lambda: self._set_update_info(release, manifest))
+            latest = update_version(manifest)
+            if latest is None or not UPDATE_PREFETCH:
+                return
+            try:
+                prefetch_update(release, manifest)
+            except Exception as e:
+                log("update pre-download failed >", repr(e), error=True)
+                return
+
+            def ready():
+                self.update_ready = latest
+                self._set_update_info(release, manifest)
+            self.master.after(0, ready)
+
+        self._submit("update", worker)
 
-        threading.Thread(target=worker, daemon=True).start()
+    def send_ok(self):
+        self.send_key(66)
 
     def _on_toggle_keep_alive(self):
         if self.keep_alive_var.get():
-            if self.is_connected:
-                self._start_keep_alive()
+            for serial in self._connected_serials():
+                self.keep_alive.add(serial)
         else:
-            self._stop_keep_alive()
-
-    def _start_keep_alive(self):
-        if self._keepalive_thread and self._keepalive_thread.is_alive():
-            return
-        self._keepalive_stop.clear()
-
-        def loop():
-            while not self._keepalive_stop.wait(45):
-                if not self.is_connected:
-                    break
-                ok, _, _ = run_adb_command(["shell", "input", "keyevent", "0"])
-                if not ok:
-                    break
+            self.keep_alive.clear()
+            for serial in self._connected_serials():
+                self._restore_keep_alive(serial)
+
+    def _sync_keep_alive(self, serial: str, status: str):
+        if status != "Connected":
+            self.keep_alive.remove(serial)
+        elif self.keep_alive_var.get():
+            self.keep_alive.add(serial)
+        else:
+            # Left over from a session that crashed or lost the device.
+            self._restore_keep_alive(serial)
 
-        self._keepalive_thread = threading.Thread(target=loop, daemon=True)
-        self._keepalive_thread.start()
+    def _restore_keep_alive(self, serial: str):
+        if self.keep_alive.has_saved(serial):
+            self._submit(KEEP_ALIVE_LANE, lambda: self.keep_alive.restore(serial))
 
-    def _stop_keep_alive(self):
-        self._keepalive_stop.set()
+    def _on_keep_alive_saved(self, saved: dict):
+        def apply():
+            self.settings["keep_alive_saved"] = saved
+            self._save_settings()
+        self.master.after(0, apply)
 
     def _valid_ip(self, ip: str) -> bool:
         m = re.fullmatch(r"(\d{1,3}\.){3}\d{1,3}", ip)
@@ -823,15 +1239,32 @@ class FirestickRemote(ttk.Frame):
         p = int(port)
         return 1 <= p <= 65535
 
+    def _parse_target(self, text: str) -> str | None:
+        text = text.strip()
+        if not text:
+            return None
+        ip, _, port = text.partition(":")
+        port = port or "5555"
+        if not self._valid_ip(ip) or not self._valid_port(port):
+            return None
+        return f"{ip}:{port}"
+
+    def _check_bin(self) -> bool:
+        if self.bin_version is None:
+            self.bin_version = read_bin_version()
+        if bin_is_compatible(self.bin_version):
+            return True
+        messagebox.showerror(
+            "Bin update required",
+            "Your FirestickRemote bin folder is missing/out of date.\n\n"
+            f"Required bin version: {BIN_REQUIRED_VERSION}\n"
+            f"Found bin version: {self.bin_version or 'missing'}\n\n"
+            "Use 'Check for updates' (or install the bin update package)."
+        )
+        return False
+
     def connect(self):
-        if not bin_is_compatible():
-            messagebox.showerror(
-                "Bin update required",
-                "Your FirestickRemote bin folder is missing/out of date.\n\n"
-                f"Required bin version: {BIN_REQUIRED_VERSION}\n"
-                f"Found bin version: {read_bin_version() or 'missing'}\n\n"
-                "Use 'Check for updates' (or install the bin update package)."
-            )
+        if not self._check_bin():
             return
 
         ip = self.ip_var.get().strip()
@@ -847,84 +1280,755 @@ class FirestickRemote(ttk.Frame):
             messagebox.showerror("Error", "Please enter a valid port (1–65535).")
             return
 
-        self.connect_btn.state(["disabled"])
-        self.disconnect_btn.state(["disabled"])
-        self.status_var.set(f"Connecting to {ip}:{port}...")
+        self._connect_targets([f"{ip}:{port}"])
+
+    def add_fleet_targets(self):
+        raw = self.fleet_var.get().replace(",", " ").split()
+        targets = []
+        for item in raw:
+            target = self._parse_target(item)
+            if target is None:
+                messagebox.showerror("Error", f"Not a valid ip[:port]: {item}")
+                return
+            targets.append(target)
+        if not targets or not self._check_bin():
+            return
+        self.fleet_var.set("")
+        self._connect_targets(targets)
+
+    def scan_network(self):
+        text = self.fleet_var.get().strip()
+        ip = self.ip_var.get().strip()
+        if "/" in text:
+            cidr = text
+        elif self._valid_ip(ip):
+            cidr = f"{ip}/24"
+        else:
+            import adb_scan
+            cidr = adb_scan.local_subnet()
+        try:
+            if not cidr or ipaddress.ip_network(cidr, strict=False).num_addresses > 4096:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Enter a network range to scan, up to /20 (e.g. 192.168.1.0/24).")
+            return
+
+        identify = self.scan_identify_var.get()
+        self.scan_btn.state(["disabled"])
+        self.status_var.set(f"Scanning {cidr}...")
+
+        def on_found(result):
+            self.master.after(0, lambda: self._add_scan_result(result))
 
         def worker():
-            success, out, err = run_adb_command(["connect", f"{ip}:{port}"])
+            import adb_scan
+            try:
+                found = adb_scan.scan(cidr, fetch_props=identify, on_found=on_found)
+                summary = f"Scan of {cidr}: {len(found)} device(s) found"
+            except Exception as e:
+                summary = f"Scan of {cidr} failed: {e}"
 
             def finish_ui():
-                if success:
-                    if not device_authorized():
-                        msg = (
-                            "Connected, but the Fire TV has not yet authorized this tool.\n\n"
-                            "On your Fire TV, you should see a popup saying:\n"
-                            "  'Allow USB debugging?'\n\n"
-                            "Tick 'Always allow from this computer' and press OK,\n"
-                            "then press Connect again."
-                        )
-                        messagebox.showinfo("Authorize on Fire TV", msg)
-                        self.is_connected = False
-                        self.status_var.set("Not connected")
-                    else:
-                        self.is_connected = True
-                        self.status_var.set(f"Connected to {ip}:{port}")
-                        if self.keep_alive_var.get():
-                            self._start_keep_alive()
-                else:
-                    self.is_connected = False
-                    self.status_var.set("Connection failed")
+                self.scan_btn.state(["!disabled"])
+                self._refresh_connection_state()
+                self._append_cmd_output(summary)
+            self.master.after(0, finish_ui)
+
+        if not self._submit("slow", worker):
+            self.scan_btn.state(["!disabled"])
+            self._refresh_connection_state()
+
+    def _add_scan_result(self, result):
+        status = self.devices.get(result.serial, {}).get("status")
+        if status in ("Connected", "Connecting...", "Unauthorized"):
+            return
+        label = " ".join(p for p in (result.model, result.name) if p) or f"adb answered ({result.state})"
+        self._set_device_status(result.serial, "Found", label)
+
+    def connect_selected(self):
+        selected = list(self.fleet_tree.selection())
+        if selected and self._check_bin():
+            self._connect_targets(selected)
+
+    def _connect_targets(self, targets, quiet: bool = False):
+        single = len(targets) == 1 and not quiet
+        for target in targets:
+            if self.devices.get(target, {}).get("status") in ("Connected", "Connecting..."):
+                continue
+            self._set_device_status(target, "Connecting...")
+            if not self._submit(device_lane(target), lambda t=target: self._connect_worker(t, single)):
+                self._set_device_status(target, "Not connected", "✗ queue full")
+        self._refresh_connection_state()
+
+    def _connect_worker(self, target: str, single: bool):
+        success, out, err = adb_connect(target)
+        authorized = success and device_authorized(target)
+        bin_version = read_bin_version()
+
+        def finish_ui():
+            if target not in self.devices:
+                return
+            if success and not authorized:
+                self._set_device_status(target, "Unauthorized")
+                if single:
+                    msg = (
+                        "Connected, but the Fire TV has not yet authorized this tool.\n\n"
+                        "On your Fire TV, you should see a popup saying:\n"
+                        "  'Allow USB debugging?'\n\n"
+                        "Tick 'Always allow from this computer' and press OK,\n"
+                        "then press Connect again."
+                    )
+                    messagebox.showinfo("Authorize on Fire TV", msg)
+            elif success:
+                self._set_device_status(target, "Connected")
+                self._remember_targets()
+            else:
+                self._set_device_status(target, "Connection failed", f"✗ {err or out or 'Unknown error'}")
+                if single:
                     messagebox.showerror("ADB error", err or out or "Unknown error :(")
 
-                self.version_label.configure(
-                    text=f"App v{APP_VERSION} (bin req {BIN_REQUIRED_VERSION}, bin found {read_bin_version() or 'missing'})"
-                )
-                self.update_remote_buttons_state()
+            self.bin_version = bin_version
+            self._refresh_version_label()
+            self._refresh_connection_state()
 
-            self.master.after(0, finish_ui)
+        self.master.after(0, finish_ui)
 
-        threading.Thread(target=worker, daemon=True).start()
+    def _remember_targets(self):
+        targets = [s for s in self._connected_serials() if self._parse_target(s) == s]
+        if targets == self.settings.get("last_targets"):
+            return
+        self.settings["last_targets"] = targets
+        self._save_settings()
 
-    def disconnect(self):
-        self._stop_keep_alive()
+    def _save_settings(self):
+        snapshot = dict(self.settings)
 
-        ip = self.ip_var.get().strip()
-        port = (self.port_var.get().strip() or "5555").strip()
+        def worker():
+            try:
+                save_settings(snapshot)
+            except OSError as e:
+                log("saving settings failed >", repr(e), error=True)
+        self._submit("app", worker)
 
-        if ip and self._valid_port(port):
-            run_adb_command(["disconnect", f"{ip}:{port}"])
-        else:
-            run_adb_command(["disconnect"])
+    def disconnect(self):
+        self._disconnect_serials(self._targets())
+
+    def disconnect_selected(self):
+        self._disconnect_serials(list(self.fleet_tree.selection()))
+
+    def remove_selected(self):
+        selected = list(self.fleet_tree.selection())
+        self._disconnect_serials(selected)
+        for serial in selected:
+            self.devices.pop(serial, None)
+            self.fleet_tree.delete(serial)
+        self._refresh_connection_state()
+
+    def _disconnect_serials(self, serials):
+        serials = [s for s in serials if self.devices.get(s, {}).get("status") in ("Connected", "Unauthorized", "Connection lost", "Reconnecting...")]
+        for serial in serials:
+            self.supervisor.cancel(serial)
+            self._stop_mirror(serial)
+            self._stop_logcat(serial)
+            self._stop_key_queue(serial)
+            self._set_device_status(serial, "Disconnected")
+        if serials:
+            self._remember_targets()
 
-        self.is_connected = False
-        self.status_var.set("Disconnected")
+        def worker():
+            for serial in serials:
+                self.keep_alive.restore(serial)
+                close_shell_session(serial)
+                adb_disconnect(serial)
+
+        if serials:
+            self._submit("control", worker)
+        self._refresh_connection_state()
+
+    def _set_device_status(self, serial: str, status: str, result: str | None = None):
+        entry = self.devices.setdefault(serial, {"status": "", "result": ""})
+        entry["status"] = status
+        if result is not None:
+            entry["result"] = result
+        values = (serial, entry["status"], entry["result"])
+        if self.fleet_tree.exists(serial):
+            self.fleet_tree.item(serial, values=values)
+        else:
+            self.fleet_tree.insert("", "end", iid=serial, values=values)
+        self._sync_keep_alive(serial, status)
+        self._sync_inventory(serial, status)
+
+    def _on_device_state(self, serial: str, old: str | None, new: str | None):
+        self.master.after(0, lambda: self._apply_device_state(serial, new))
+
+    def _apply_device_state(self, serial: str, state: str | None):
+        current = self.devices.get(serial, {}).get("status")
+        if current == "Connected" and state == "unauthorized":
+            self._stop_key_queue(serial)
+            close_shell_session(serial)
+            self._set_device_status(serial, "Unauthorized")
+        elif current == "Connected" and state != "device":
+            self._connection_lost(serial)
+            return
+        elif current in ("Unauthorized", "Connection lost") and state == "device":
+            self._set_device_status(serial, "Connected")
+        else:
+            return
+        self._refresh_connection_state()
+
+    def _connection_lost(self, serial: str, unsent_keys=()):
+        self._stop_mirror(serial)
+        self._stop_logcat(serial)
+        self._stop_key_queue(serial)
+        close_shell_session(serial)
+        self._set_device_status(serial, "Reconnecting...", "✗ connection lost")
+        self.supervisor.lost(serial)
+        for keycode in unsent_keys:
+            self.supervisor.buffer_key(serial, int(keycode))
+        self._refresh_connection_state()
+
+    def _on_reconnect_event(self, serial: str, kind: str, info: dict):
+        self.master.after(0, lambda: self._apply_reconnect_event(serial, kind, info))
+
+    def _apply_reconnect_event(self, serial: str, kind: str, info: dict):
+        if self.devices.get(serial, {}).get("status") != "Reconnecting...":
+            return
+        attempts = info["attempts"]
+        downtime = info["downtime"]
+        if kind == "attempt":
+            self._set_device_result(serial, f"reconnect attempt {attempts} ({downtime:.0f}s down)")
+            return
+        if kind == "gave_up":
+            self._set_device_status(serial, "Connection lost", f"✗ gave up after {attempts} attempts")
+        else:
+            keys = info.get("keys", [])
+            self._set_device_status(
+                serial, "Connected",
+                f"✓ back after {downtime:.1f}s, {attempts} attempt(s), {len(keys)} key(s) replayed"
+            )
+            for keycode in keys:
+                self._key_queue_for(serial).push(keycode)
+        self._refresh_connection_state()
+
+    def _set_device_result(self, serial: str, result: str):
+        if serial in self.devices:
+            self._set_device_status(serial, self.devices[serial]["status"], result)
+
+    def _connected_serials(self):
+        return [s for s, d in list(self.devices.items()) if d["status"] == "Connected"]
+
+    def _targets(self, status: str = "Connected"):
+        matching = [s for s, d in list(self.devices.items()) if d["status"] == status]
+        selected = [s for s in self.fleet_tree.selection() if s in matching]
+        return selected or matching
+
+    def _refresh_connection_state(self):
+        connected = self._connected_serials()
+        self.is_connected = bool(connected)
+        connecting = [s for s, d in self.devices.items() if d["status"] == "Connecting..."]
+        if len(connected) == 1:
+            status = f"Connected to {connected[0]}"
+        elif connected:
+            status = f"Connected to {len(connected)} devices"
+        elif len(connecting) == 1:
+            status = f"Connecting to {connecting[0]}..."
+        elif any(d["status"] == "Reconnecting..." for d in self.devices.values()):
+            status = "Connection lost, reconnecting..."
+        elif any(d["status"] == "Connection lost" for d in self.devices.values()):
+            status = "Connection lost"
+        elif any(d["status"] == "Unauthorized" for d in self.devices.values()):
+            status = "Waiting for authorization on the Fire TV"
+        else:
+            status = "Not connected"
+        if connecting and (connected or len(connecting) > 1):
+            status += f" ({len(connecting)} connecting...)"
+        self.status_var.set(status)
+        targets = self._targets()
+        if len(connected) > 1:
+            self.target_var.set(f"Sending to {len(targets)} of {len(connected)} devices")
+        else:
+            self.target_var.set("")
         self.update_remote_buttons_state()
+        if (targets[0] if targets else None) != self._apps_serial:
+            self.refresh_apps()
+
+    def _result_prefix(self, serial: str, multi: bool) -> str:
+        return f"[{serial}] " if multi else ""
 
     def send_key(self, keycode: int):
+        reconnecting = self._targets("Reconnecting...")
+        if not self.is_connected and not reconnecting:
+            messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
+            return
+
+        self.recorder.record_key(keycode)
+        targets = self._targets()
+        trace("invoke", action="send_key", keycode=keycode, devices=targets)
+        for serial in targets:
+            self._key_queue_for(serial).push(keycode)
+        for serial in reconnecting:
+            self.supervisor.buffer_key(serial, keycode)
+
+    def _key_queue_for(self, serial: str) -> KeyEventQueue:
+        key_queue = self._key_queues.get(serial)
+        if key_queue is None:
+            key_queue = KeyEventQueue(
+                serial, self.executor,
+                on_error=lambda msg, keys, s=serial: self.master.after(0, lambda: self._on_key_error(s, msg, keys)),
+                injector=RawKeyInjector(serial) if self.raw_keys_var.get() else None
+            )
+            self._key_queues[serial] = key_queue
+        return key_queue
+
+    def _on_toggle_raw_keys(self):
+        enabled = self.raw_keys_var.get()
+        for serial in self._connected_serials():
+            key_queue = self._key_queue_for(serial)
+            key_queue.set_injector(RawKeyInjector(serial) if enabled else None)
+            if enabled:
+                # Discover keys and start the helper now rather than on the first press.
+                self._submit(device_lane(serial), key_queue.injector.prepare)
+        self.settings["raw_keys"] = enabled
+        self._save_settings()
+
+    def _sync_inventory(self, serial: str, status: str):
+        if status != "Connected":
+            self.inventory.invalidate(serial)
+        elif self.inventory.cached(serial) is None:
+            # Fetched in the background on connect, so the list is there when it is opened.
+            self._fetch_inventory(serial, False)
+
+    def refresh_apps(self, force: bool = False):
+        targets = self._targets()
+        serial = targets[0] if targets else None
+        self._apps_serial = serial
+        if serial is None:
+            self.apps_tree.delete(*self.apps_tree.get_children())
+            self.apps_status_var.set("Connect to list apps")
+            return
+        if force or self.inventory.cached(serial) is None:
+            self.apps_status_var.set(f"Reading apps on {serial}...")
+        # The cached list is shown at once; the worker only reads the device again when it is stale.
+        self._draw_apps()
+        self._fetch_inventory(serial, force)
+
+    def _fetch_inventory(self, serial: str, force: bool):
+        if serial in self._inventory_pending and not force:
+            return
+        self._inventory_pending.add(serial)
+        submitted = time.perf_counter()
+
+        def worker():
+            with TimedAction(serial, "inventory", queue_ms=since_ms(submitted)) as timed:
+                ok, _, err = self.inventory.get(serial, refresh=force)
+                timed.ok = ok
+
+            def finish_ui():
+                self._inventory_pending.discard(serial)
+                if not ok:
+                    log(f"inventory {serial} failed >", err, error=True)
+                    if serial == self._apps_serial:
+                        self.apps_status_var.set(f"✗ {err.splitlines()[0][:80] if err else 'failed'}")
+                    return
+                if serial == self._apps_serial:
+                    self._draw_apps()
+            self.master.after(0, finish_ui)
+
+        if not self._submit(slow_lane(serial), worker):
+            self._inventory_pending.discard(serial)
+
+    def _draw_apps(self):
+        serial = self._apps_serial
+        entry = self.inventory.cached(serial)
+        self.apps_tree.delete(*self.apps_tree.get_children())
+        if entry is None:
+            return
+        needle = self.apps_filter_var.get().strip().lower()
+        user_only = self.apps_user_only_var.get()
+        shown = 0
+        for package in sorted(entry["packages"]):
+            info = entry["packages"][package]
+            if user_only and not info["third_party"]:
+                continue
+            if needle and needle not in package.lower():
+                continue
+            self.apps_tree.insert("", "end", iid=package, values=(package, info["version_name"]))
+            shown += 1
+        foreground = entry["foreground"] or "unknown"
+        self.apps_status_var.set(
+            f"{describe_device(entry)} · {shown} of {len(entry['packages'])} apps · foreground: {foreground}"
+        )
+
+    def launch_app(self):
         if not self.is_connected:
             messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
             return
+        selection = self.apps_tree.selection()
+        if not selection:
+            messagebox.showwarning("Apps", "Select an app to launch.")
+            return
+        package = selection[0]
+        targets = self._targets()
+        trace("invoke", action="launch_app", package=package, devices=targets)
+        for serial in targets:
+            self._submit(device_lane(serial), self._launch_worker(serial, package, len(targets) > 1))
+
+    def _launch_worker(self, serial: str, package: str, multi: bool):
+        submitted = time.perf_counter()
 
         def worker():
-            ok, out, err = run_adb_command(["shell", "input", "keyevent", str(keycode)])
-            if not ok:
-                self.master.after(
-                    0,
-                    lambda: messagebox.showerror("ADB error", err or out or "Failed to send key event"),
+            with TimedAction(serial, "launch", queue_ms=since_ms(submitted), ui=True) as timed:
+                ok, out, err = self.inventory.launch(serial, package)
+                timed.ok = ok
+            mark = "✓" if ok else "✗"
+            result = f"started {package}" if ok else (err or out or "failed").splitlines()[0]
+
+            def finish_ui():
+                self._set_device_result(serial, f"{mark} {result[:60]}")
+                if serial == self._apps_serial:
+                    self._draw_apps()
+                if not ok and not multi:
+                    messagebox.showerror("Launch failed", f"{package}\n\n{err or out}")
+                timed.ui_done()
+            self.master.after(0, finish_ui)
+        return worker
+
+    def _describe_macro(self, macro: Macro) -> str:
+        return f"{macro.event_count()} event(s), {macro.duration():.1f}s"
+
+    def toggle_mirror(self):
+        if self._mirror is not None:
+            self._stop_mirror()
+            return
+        targets = self._targets()
+        if not targets:
+            messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
+            return
+
+        serial = targets[0]
+        self._mirror = ScreenMirror(
+            open_source(serial),
+            on_error=lambda msg: self.master.after(0, lambda: self.mirror_var.set(f"✗ {msg}"))
+        )
+        self._mirror_serial = serial
+        self._mirror_draw_ms = 0.0
+        self._mirror.start()
+        self.mirror_btn.configure(text="Stop preview")
+        self.mirror_var.set(f"Starting preview of {serial}...")
+        self._poll_mirror()
+
+    def _stop_mirror(self, serial: str | None = None):
+        if self._mirror is None or (serial is not None and serial != self._mirror_serial):
+            return
+        self._mirror.stop()
+        self._mirror = None
+        if self._mirror_after is not None:
+            self.master.after_cancel(self._mirror_after)
+            self._mirror_after = None
+        self._mirror_serial = None
+        self.mirror_btn.configure(text="Start preview")
+        self.mirror_var.set("Preview off")
+
+    def _poll_mirror(self):
+        mirror = self._mirror
+        if mirror is None:
+            return
+        frame = mirror.take()
+        if frame is not None:
+            # Usually a small PPM from the mirror thread; a full-size PNG (screencap -p
+            # without PyAV) is decoded and scaled down by Tk here.
+            started = time.monotonic()
+            image = tk.PhotoImage(data=frame.data, format=frame.format)
+            factor = max(math.ceil(frame.width / MIRROR_MAX_SIZE[0]), math.ceil(frame.height / MIRROR_MAX_SIZE[1]))
+            if factor > 1:
+                image = image.subsample(factor)
+            self.mirror_canvas.itemconfigure(self._mirror_item, image=image)
+            self._mirror_image = image
+            draw_ms = (time.monotonic() - started) * 1000
+            self._mirror_draw_ms = draw_ms if not self._mirror_draw_ms else self._mirror_draw_ms * 0.8 + draw_ms * 0.2
+            s = mirror.stats()
+            self.mirror_var.set(
+                f"{self._mirror_serial} · {s['fps']:.1f} fps · dropped {s['dropped']} · "
+                f"capture {s['capture_ms']:.0f} ms · cpu {s['cpu_ms']:.0f} ms · "
+                f"draw {self._mirror_draw_ms:.0f} ms · {s['frame_kb']:.0f} KB"
+            )
+        self._mirror_after = self.master.after(int(500 / MIRROR_FPS), self._poll_mirror)
+
+    def toggle_logcat(self):
+        if self._logcat is not None:
+            self._stop_logcat()
+            return
+        targets = self._targets()
+        if not targets:
+            messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
+            return
+
+        serial = targets[0]
+        reader = LogcatReader(
+            serial, self.log_store, parse_tags(self.log_tags_var.get()), self.log_level_var.get(),
+            on_entry=self._on_log_entry,
+            on_done=lambda ok, msg: self.master.after(0, lambda: self._on_logcat_done(reader, msg))
+        )
+        self._logcat = reader
+        self._log_rate_seq = self.log_store.next_seq
+        reader.start()
+        self.logcat_btn.configure(text="Stop")
+        self.log_status_var.set(f"Streaming {serial}...")
+
+    def _stop_logcat(self, serial: str | None = None):
+        if self._logcat is None or (serial is not None and serial != self._logcat.serial):
+            return
+        self._logcat.stop()
+        self._logcat = None
+        self.logcat_btn.configure(text="Start")
+
+    def _on_logcat_done(self, reader, message: str):
+        if reader is self._logcat:
+            self._logcat = None
+            self.logcat_btn.configure(text="Start")
+        self.log_status_var.set(f"Logcat {reader.serial} ended: {message} · {len(self.log_store)} entries kept")
+
+    def _on_log_entry(self, entry):
+        self.log_view.append(format_entry(entry), None, LOG_LEVEL_KINDS.get(entry[LEVEL]))
+
+    def _refresh_log_status(self):
+        reader = self._logcat
+        if reader is None:
+            return
+        rate = self.log_store.next_seq - self._log_rate_seq
+        self._log_rate_seq = self.log_store.next_seq
+        self.log_status_var.set(f"Streaming {reader.serial} · {rate} lines/s · {len(self.log_store)} entries kept")
+
+    def search_logs(self):
+        query = parse_query(self.log_search_var.get())
+        if not query:
+            self.log_view.set_filter("")
+            return
+        matches = self.log_store.query(limit=LOG_VIEW_LINES, **query)
+        self.log_view.show_snapshot(
+            [format_entry(e) for e in matches],
+            [LOG_LEVEL_KINDS.get(e[LEVEL]) for e in matches]
+        )
+        self.log_status_var.set(f"{len(matches)} matching of {len(self.log_store)} entries (showing newest)")
+
+    def export_logs(self):
+        path = filedialog.asksaveasfilename(
+            title="Export log", defaultextension=".txt",
+            filetypes=[("Log files", "*.txt *.log"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        query = parse_query(self.log_search_var.get())
+        entries = self.log_store.query(**query) if query else None
+        try:
+            count = self.log_store.export(path, entries)
+        except OSError as e:
+            messagebox.showerror("Logcat", f"Could not export log.\n\n{e}")
+            return
+        self.log_status_var.set(f"Exported {count} entries to {os.path.basename(path)}")
+
+    def toggle_macro_recording(self):
+        if self.recorder.recording:
+            self.macro = self.recorder.stop()
+            self.macro_record_btn.configure(text="Record")
+            self.macro_var.set(f"Recorded {self._describe_macro(self.macro)}")
+        else:
+            self.recorder.start()
+            self.macro_record_btn.configure(text="Stop")
+            self.macro_var.set("Recording... use the remote as normal")
+
+    def toggle_macro_playback(self):
+        if self._macro_player is not None:
+            self._macro_player.cancel()
+            return
+        if self.macro is None or not self.macro.steps:
+            messagebox.showinfo("Macros", "Record or load a macro first.")
+            return
+        if not self.is_connected:
+            messagebox.showwarning("Not connected", "Please connect to a Fire TV first.")
+            return
+        if self.recorder.recording:
+            self.toggle_macro_recording()
+
+        targets = self._targets()
+        speed = float(self.macro_speed_var.get().rstrip("x") or 1)
+
+        def on_error(serial, message):
+            self.master.after(0, lambda: self._set_device_result(serial, f"✗ macro: {message}"))
+
+        def on_done(player):
+            def finish_ui():
+                self._macro_player = None
+                self.macro_play_btn.configure(text="Play")
+                state = "cancelled" if player.cancelled else "done"
+                self.macro_var.set(
+                    f"Replay {state} on {len(player.serials)} device(s): {player.sent} sent, "
+                    f"{player.failed} failed, max drift {player.max_lateness * 1000:.0f} ms"
                 )
+            self.master.after(0, finish_ui)
+
+        self._macro_player = MacroPlayer(self.macro, targets, self.executor, speed=speed,
+                                         on_done=on_done, on_error=on_error)
+        self.macro_play_btn.configure(text="Cancel")
+        self.macro_var.set(f"Replaying {self._describe_macro(self.macro)} at {speed:g}x on {len(targets)} device(s)...")
+        self._macro_player.start()
+
+    def load_macro(self):
+        path = filedialog.askopenfilename(
+            title="Load macro", filetypes=[("Remote macros", "*.txt"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            self.macro = Macro.load(path)
+        except (OSError, ValueError, IndexError) as e:
+            messagebox.showerror("Macros", f"Could not load macro.\n\n{e}")
+            return
+        self.macro_var.set(f"Loaded {os.path.basename(path)}: {self._describe_macro(self.macro)}")
 
-        threading.Thread(target=worker, daemon=True).start()
+    def save_macro(self):
+        if self.macro is None or not self.macro.steps:
+            messagebox.showinfo("Macros", "Record a macro first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save macro", defaultextension=".txt",
+            filetypes=[("Remote macros", "*.txt"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            self.macro.save(path)
+        except OSError as e:
+            messagebox.showerror("Macros", f"Could not save macro.\n\n{e}")
+            return
+        self.macro_var.set(f"Saved {os.path.basename(path)}: {self._describe_macro(self.macro)}")
+
+    def _on_key_error(self, serial: str, message: str, keycodes=()):
+        if self.devices.get(serial, {}).get("status") != "Connected":
+            return
+        if is_connection_error(message) or device_tracker.state(serial) not in (None, "device"):
+            self._connection_lost(serial, keycodes)
+            return
+        self._set_device_result(serial, f"✗ {message}")
+        if len(self._connected_serials()) <= 1:
+            messagebox.showerror("ADB error", message)
+
+    def _stop_key_queue(self, serial: str):
+        key_queue = self._key_queues.pop(serial, None)
+        if key_queue is not None:
+            key_queue.stop()
+
+    def _submit(self, lane: str, fn) -> bool:
+        if self.executor.submit(lane, fn):
+            return True
+        self.queue_var.set(f"Busy: {lane} queue full, action dropped")
+        return False
+
+    def _refresh_queue_stats(self):
+        stats = self.executor.stats()
+        depth = sum(s["depth"] for s in stats.values())
+        rejected = sum(s["rejected"] for s in stats.values())
+        dropped = sum(q.dropped for q in self._key_queues.values())
+        parts = []
+        if depth or rejected or dropped:
+            parts.append(f"Queued {depth} · rejected {rejected} · keys dropped {dropped}")
+        modes = list(self.keep_alive.modes().values())
+        if modes:
+            parts.append(f"awake: {modes.count('settings')} by setting, {modes.count('ping')} by ping")
+        reconnects = sum(self.supervisor.reconnects.values())
+        if reconnects:
+            downtime = sum(self.supervisor.downtime.values())
+            parts.append(f"reconnects {reconnects} · down {downtime:.0f}s")
+        self.queue_var.set(" · ".join(parts))
+        self._refresh_log_status()
+        self._refresh_latency()
+        self.master.after(1000, self._refresh_queue_stats)
+
+    def _refresh_latency(self):
+        if not self.latency_tree.winfo_ismapped():
+            return
+        by = self.latency_by_var.get()
+        if self._latency_drawn == (latency_stats.version, by):
+            return
+        self._latency_drawn = (latency_stats.version, by)
+        rows = latency_stats.rows(by)
+        self.latency_tree.delete(*self.latency_tree.get_children())
+        for row in rows:
+            self.latency_tree.insert("", "end", values=(
+                row["action"], row["device"], row["stage"], row["count"],
+                f"{row['p50']:.1f}", f"{row['p95']:.1f}", f"{row['p99']:.1f}", f"{row['max']:.1f}"
+            ))
+        actions = sum(r["count"] for r in rows if r["stage"] == "total")
+        self.latency_status_var.set(f"{actions} action(s) timed" if actions else "No actions timed yet")
+
+    def export_latency(self, fmt: str):
+        path = filedialog.asksaveasfilename(
+            title="Export latency stats", defaultextension=f".{fmt}",
+            filetypes=[("JSON", "*.json")] if fmt == "json" else [("CSV", "*.csv")]
+        )
+        if not path:
+            return
+        try:
+            if fmt == "json":
+                count = latency_stats.export_json(path)
+            else:
+                count = latency_stats.export_csv(path)
+        except OSError as e:
+            messagebox.showerror("Latency", f"Could not export stats.\n\n{e}")
+            return
+        self.latency_status_var.set(f"Exported {count} rows to {os.path.basename(path)}")
 
     def _on_close(self):
-        self._stop_keep_alive()
+        if self._closing:
+            return
+        self._closing = True
+        self.keep_alive.stop()
+        serials = [s for s in self._connected_serials() if self.keep_alive.has_saved(s)]
+        if not serials:
+            self._finish_close()
+            return
+        # Restored in parallel off the Tk thread; the window goes away at once
+        # and is destroyed when they are done or the deadline passes.
+        self.master.withdraw()
+
+        def worker():
+            self.keep_alive.restore_all(serials, KEEP_ALIVE_CLOSE_TIMEOUT)
+            if not self._closed:
+                self.master.after(0, self._finish_close)
+
+        if not self._submit("app", worker):
+            self._finish_close()
+            return
+        self.master.after(int(KEEP_ALIVE_CLOSE_TIMEOUT * 1000) + 500, self._finish_close)
+
+    def _finish_close(self):
+        if self._closed:
+            return
+        self._closed = True
+        device_tracker.stop()
+        for serial in list(self.devices):
+            self.supervisor.cancel(serial)
+        if self._macro_player is not None:
+            self._macro_player.cancel()
+        self._stop_mirror()
+        self._stop_logcat()
+        self.cancel_manual_commands()
+        for serial in list(self._key_queues):
+            self._stop_key_queue(serial)
+        self.executor.shutdown()
+        close_shell_session()
         self.master.destroy()
 
 
 if __name__ == "__main__":
+    startup_mark("imports")
     init_adb_keys()
+    if os.environ.get("FSR_TRACE"):
+        # JSON lines for every key/text/command invocation and timed action.
+        add_trace_hook(jsonl_trace_hook(os.environ["FSR_TRACE"]))
 
     root = tk.Tk()
+    startup_mark("tk")
 
     icon_path = os.path.join(_bin_dir(), "firestick.ico")
     if os.path.exists(icon_path):
@@ -934,4 +2038,10 @@ if __name__ == "__main__":
             pass
 
     app = FirestickRemote(root)
+    startup_mark("ui")
+
+    def first_frame():
+        startup_mark("first frame")
+        app._warm_up()
+    root.after_idle(first_frame)
     root.mainloop()
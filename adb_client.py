@@ -0,0 +1,185 @@
+import os
+import socket
+import time
+import uuid
+
+from latency import add_stage, since_ms
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5037
+
+
+class AdbClientError(Exception):
+    pass
+
+
+class AdbServerUnavailable(AdbClientError):
+    pass
+
+
+def _server_port() -> int:
+    try:
+        return int(os.environ.get("ANDROID_ADB_SERVER_PORT", DEFAULT_PORT))
+    except ValueError:
+        return DEFAULT_PORT
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise AdbClientError("adb server closed the connection")
+        buf += chunk
+    return buf
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _parse_devices(out: str):
+    result = []
+    for line in out.splitlines():
+        parts = line.split("\t")
+        if len(parts) >= 2:
+            result.append((parts[0], parts[1].strip()))
+    return result
+
+
+# Talks the adb host protocol straight to the adb server on tcp:5037: every
+# request is a 4 hex digit length followed by the service name, answered by
+# OKAY or FAIL + length-prefixed message.
+class AdbClient:
+    def __init__(self, host: str = DEFAULT_HOST, port: int | None = None, timeout: float = 5):
+        self.host = host
+        self.port = port if port is not None else _server_port()
+        self.timeout = timeout
+
+    def _open(self, timeout: float | None = None) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+        except OSError as e:
+            raise AdbServerUnavailable(f"adb server not reachable on {self.host}:{self.port}: {e}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _request(self, sock: socket.socket, service: str) -> None:
+        data = service.encode("utf-8")
+        try:
+            sock.sendall(b"%04x" % len(data) + data)
+            status = _recv_exact(sock, 4)
+        except OSError as e:
+            raise AdbClientError(f"adb server request failed: {e}")
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbClientError(self._read_message(sock))
+        raise AdbClientError(f"unexpected adb server reply {status!r}")
+
+    def _read_message(self, sock: socket.socket) -> str:
+        try:
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length).decode("utf-8", errors="replace")
+        except (OSError, ValueError) as e:
+            raise AdbClientError(f"bad adb server reply: {e}")
+
+    def host_command(self, service: str) -> str:
+        sock = self._open()
+        try:
+            self._request(sock, service)
+            return self._read_message(sock)
+        finally:
+            sock.close()
+
+    def version(self) -> int:
+        return int(self.host_command("host:version"), 16)
+
+    def connect(self, target: str):
+        try:
+            msg = self.host_command(f"host:connect:{target}").strip()
+        except AdbServerUnavailable:
+            raise
+        except AdbClientError as e:
+            return False, "", str(e)
+        ok = msg.startswith("connected to") or msg.startswith("already connected")
+        return ok, (msg if ok else ""), ("" if ok else msg)
+
+    def disconnect(self, target: str | None = None):
+        try:
+            msg = self.host_command(f"host:disconnect:{target or ''}").strip()
+        except AdbServerUnavailable:
+            raise
+        except AdbClientError as e:
+            return False, "", str(e)
+        return True, msg, ""
+
+    def devices(self):
+        return _parse_devices(self.host_command("host:devices"))
+
+    def track_devices(self, on_socket=None):
+        sock = self._open()
+        try:
+            self._request(sock, "host:track-devices")
+            sock.settimeout(None)
+            if on_socket is not None:
+                on_socket(sock)
+            while True:
+                yield _parse_devices(self._read_message(sock))
+        finally:
+            sock.close()
+
+    def open_service(self, serial: str | None, service: str, timeout: float | None = None) -> socket.socket:
+        sock = self._open(timeout)
+        try:
+            self._request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+            self._request(sock, service)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def exec_out(self, serial: str | None, command: str, timeout: float = 30) -> bytes:
+        # Binary-safe output (screencap -p and friends); no exit status.
+        sock = self.open_service(serial, f"exec:{command}", timeout=timeout)
+        try:
+            sock.settimeout(timeout)
+            return _recv_all(sock)
+        except OSError as e:
+            raise AdbClientError(f"adb exec-out failed: {e}")
+        finally:
+            sock.close()
+
+    def shell(self, serial: str | None, command: str, timeout: float = 30):
+        # exec: gives a raw (no pty) stream on every Fire OS version; the
+        # trailing marker carries the exit code since shell v1 has none.
+        marker = f"__FSR_{uuid.uuid4().hex}__"
+        framed = f"( {command} ) </dev/null 2>&1; printf '\\n{marker} %s\\n' \"$?\""
+        t0 = time.perf_counter()
+        sock = self.open_service(serial, f"exec:{framed}", timeout=timeout)
+        add_stage("setup", since_ms(t0))
+        t1 = time.perf_counter()
+        try:
+            sock.settimeout(timeout)
+            raw = _recv_all(sock)
+        except OSError as e:
+            raise AdbClientError(f"adb shell failed: {e}")
+        finally:
+            sock.close()
+            add_stage("device", since_ms(t1))
+
+        text = raw.decode("utf-8", errors="replace").replace("\r\n", "\n")
+        head, sep, tail = text.rpartition(marker)
+        if not sep:
+            raise AdbClientError("adb shell ended without an exit status")
+        out = head.strip()
+        code = tail.strip()
+        if code == "0":
+            return True, out, ""
+        return False, "", out or f"exit code {code}"
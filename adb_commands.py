@@ -0,0 +1,949 @@
+import os
+import sys
+import shutil
+import socket
+import threading
+import subprocess
+import time
+import queue
+import random
+import uuid
+from adb_client import AdbClient, AdbClientError, AdbServerUnavailable
+from latency import TimedAction, add_stage, since_ms
+
+# Presses queued beyond this are dropped (oldest first) so a held key stops
+# as soon as the user lets go instead of draining a long backlog.
+KEY_BACKLOG_LIMIT = 8
+KEY_BATCH_MAX = 10
+
+# (worker threads, queue size) per executor lane. Device lanes run one worker
+# so actions for a stick keep their order.
+LANE_LIMITS = {
+    "device": (1, 32),
+    "control": (1, 8),
+    "slow": (2, 4),
+    # Settings saves and start-up work; never shares workers with user-started commands.
+    "app": (1, 16),
+    "update": (1, 2),
+    "keepalive": (2, 64),
+}
+
+# Reconnect backoff: base * 2^attempt seconds, capped, with +/-50% jitter so a
+# desk full of sticks on the same link does not retry in lockstep.
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+RECONNECT_MAX_ATTEMPTS = 20
+
+# Keys pressed while a device is reconnecting are replayed once it is back,
+# if they are recent enough; power/sleep are never replayed.
+REPLAY_WINDOW = 15.0
+REPLAY_MAX_KEYS = 20
+REPLAY_UNSAFE_KEYS = {26, 223}
+
+CONNECTION_ERROR_HINTS = ("offline", "not found", "closed", "timed out", "no devices", "unreachable")
+
+# Echo every adb call and its output, as the window always has; the headless
+# CLI turns this off unless asked so its stdout stays scriptable.
+LOG_COMMANDS = True
+
+KEY_NAMES = {
+    "HOME": 3,
+    "BACK": 4,
+    "UP": 19,
+    "DOWN": 20,
+    "LEFT": 21,
+    "RIGHT": 22,
+    "CENTER": 23,
+    "VOLUME_UP": 24,
+    "VOLUME_DOWN": 25,
+    "POWER": 26,
+    "OK": 66,
+    "ENTER": 66,
+    "DEL": 67,
+    "MENU": 82,
+    "SEARCH": 84,
+    "PLAY_PAUSE": 85,
+    "PLAY": 85,
+    "PAUSE": 85,
+    "NEXT": 87,
+    "PREVIOUS": 88,
+    "REWIND": 89,
+    "FAST_FORWARD": 90,
+    "MUTE": 164,
+    "SLEEP": 223,
+    "WAKEUP": 224,
+}
+
+
+def log(*parts, error: bool = False) -> None:
+    if LOG_COMMANDS:
+        print(*parts, file=sys.stderr if error else sys.stdout)
+
+
+def _base_dir() -> str:
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def _bin_dir() -> str:
+    return os.path.join(_base_dir(), "bin")
+
+
+def init_adb_keys() -> None:
+    key_path = os.path.join(_bin_dir(), "firestick_remote_adbkey")
+    if os.path.exists(key_path):
+        os.environ["ADB_VENDOR_KEYS"] = key_path
+        log("Using bundled ADB key:", key_path)
+    else:
+        log("Bundled ADB key not found; using default adb keys.")
+
+
+def adb_path() -> str:
+    candidate = os.path.join(_bin_dir(), "adb.exe")
+    if os.path.exists(candidate):
+        return candidate
+    return shutil.which("adb") or "adb"
+
+
+def run_adb_command(args):
+    cmd = [adb_path()] + args
+    startupinfo, creationflags = _subprocess_window_flags()
+    try:
+        # Popen + communicate rather than run() so process spawn and the
+        # command itself can be timed apart.
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            startupinfo=startupinfo,
+            creationflags=creationflags
+        )
+        add_stage("setup", since_ms(t0))
+        t1 = time.perf_counter()
+        try:
+            stdout, stderr = proc.communicate(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            add_stage("device", since_ms(t1))
+        ok = (proc.returncode == 0)
+        out = (stdout or "").strip()
+        err = (stderr or "").strip()
+        log("adb >", " ".join(cmd))
+        if out:
+            log("out >", out)
+        if err:
+            log("err >", err, error=True)
+        return ok, out, err
+    except FileNotFoundError:
+        return False, "", (
+            "adb executable not found.\n\n"
+            "Make sure bin/adb.exe is next to FirestickRemote.exe, "
+            "or add adb to your PATH."
+        )
+    except Exception as e:
+        return False, "", str(e)
+
+
+adb_client = AdbClient()
+
+
+def adb_devices():
+    try:
+        return adb_client.devices()
+    except AdbClientError as e:
+        log("adb server socket unavailable, falling back >", e, error=True)
+    ok, out, _ = run_adb_command(["devices"])
+    if not ok:
+        return []
+    result = []
+    for line in out.splitlines():
+        parts = line.split("\t")
+        if len(parts) >= 2:
+            result.append((parts[0], parts[1].strip()))
+    return result
+
+
+def adb_connect(target: str):
+    try:
+        ok, out, err = adb_client.connect(target)
+        log("adb host:connect >", target, "->", out or err)
+        return ok, out, err
+    except AdbServerUnavailable as e:
+        log("adb server socket unavailable, falling back >", e, error=True)
+    return run_adb_command(["connect", target])
+
+
+def adb_disconnect(target: str | None = None):
+    try:
+        return adb_client.disconnect(target)
+    except AdbServerUnavailable as e:
+        log("adb server socket unavailable, falling back >", e, error=True)
+    return run_adb_command(["disconnect", target] if target else ["disconnect"])
+
+
+# Keeps an in-memory serial -> state table fed by the adb server's
+# host:track-devices stream, so state changes are pushed to listeners instead
+# of being discovered by polling `adb devices`. While paused (e.g. the bin
+# folder is being swapped) a lost server is not restarted.
+class DeviceTracker:
+    def __init__(self, client: AdbClient | None = None):
+        self.client = client or adb_client
+        self.states = {}
+        self.connected = False
+        self._listeners = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._paused = 0
+        self._sock = None
+        self._thread = None
+
+    def add_listener(self, fn) -> None:
+        self._listeners.append(fn)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            # close() alone does not wake a recv() blocked in another thread on Linux.
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def pause(self) -> None:
+        with self._cond:
+            self._paused += 1
+
+    def resume(self) -> None:
+        with self._cond:
+            self._paused = max(self._paused - 1, 0)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused > 0
+
+    def state(self, serial: str) -> str | None:
+        with self._cond:
+            return self.states.get(serial)
+
+    def wait_for(self, serial: str, states, timeout: float) -> str | None:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.states.get(serial) not in states:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.connected:
+                    break
+                self._cond.wait(remaining)
+            return self.states.get(serial)
+
+    def _set_socket(self, sock):
+        self._sock = sock
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                for devices in self.client.track_devices(on_socket=self._set_socket):
+                    backoff = 0.5
+                    self._apply(dict(devices), connected=True)
+            except AdbServerUnavailable:
+                if not self._stop.is_set() and not self.paused:
+                    run_adb_command(["start-server"])
+            except AdbClientError as e:
+                log("device tracking interrupted >", e, error=True)
+            self._sock = None
+            self._apply({}, connected=False)
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 10)
+
+    def _apply(self, new_states: dict, connected: bool):
+        with self._cond:
+            old_states = self.states
+            self.states = new_states
+            self.connected = connected
+            self._cond.notify_all()
+        if not connected and not old_states:
+            return
+        for serial in set(old_states) | set(new_states):
+            old, new = old_states.get(serial), new_states.get(serial)
+            if old != new:
+                for fn in list(self._listeners):
+                    try:
+                        fn(serial, old, new)
+                    except Exception as e:
+                        log("device listener failed >", repr(e), error=True)
+
+
+device_tracker = DeviceTracker()
+
+
+def device_authorized(serial: str | None = None) -> bool:
+    if serial and device_tracker.connected:
+        state = device_tracker.wait_for(serial, ("device", "unauthorized"), timeout=2)
+        return state == "device"
+    for dev_serial, state in adb_devices():
+        if serial and dev_serial != serial:
+            continue
+        if state == "unauthorized":
+            return False
+        if state == "device":
+            return True
+    return False
+
+
+def _subprocess_window_flags():
+    startupinfo = None
+    creationflags = 0
+    if os.name == "nt":
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        creationflags = subprocess.CREATE_NO_WINDOW
+    return startupinfo, creationflags
+
+
+class AdbSessionError(Exception):
+    pass
+
+
+# Raised once the command has been written: it may have run, so it must not be sent again.
+class AdbSessionLost(AdbSessionError):
+    pass
+
+
+# One long-lived `adb shell` per device; each command is framed with an end
+# marker carrying its exit code so results still come back per command.
+class AdbShellSession:
+    def __init__(self, serial: str | None = None):
+        self.serial = serial
+        self._proc = None
+        self._sock = None
+        self._writer = None
+        self._lines = queue.Queue()
+        self._ended = threading.Event()
+        self._lock = threading.Lock()
+        self._marker = f"__FSR_{uuid.uuid4().hex}__"
+
+    def is_alive(self) -> bool:
+        if self._ended.is_set():
+            return False
+        if self._sock is not None:
+            return True
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        self.close()
+        self._lines = queue.Queue()
+        self._ended = threading.Event()
+        try:
+            sock = adb_client.open_service(self.serial, "exec:sh")
+        except AdbClientError as e:
+            log("adb server socket unavailable, using adb shell process >", e, error=True)
+        else:
+            sock.settimeout(None)
+            self._sock = sock
+            self._writer = sock.makefile("wb")
+            threading.Thread(target=self._reader, args=(sock.makefile("rb"), self._lines, self._ended),
+                             daemon=True).start()
+            return
+
+        cmd = [adb_path()]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd.append("shell")
+        startupinfo, creationflags = _subprocess_window_flags()
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                startupinfo=startupinfo,
+                creationflags=creationflags
+            )
+        except OSError as e:
+            self._proc = None
+            raise AdbSessionError(str(e))
+        self._writer = self._proc.stdin
+        threading.Thread(target=self._reader, args=(self._proc.stdout, self._lines, self._ended),
+                         daemon=True).start()
+
+    def _reader(self, stream, lines, ended):
+        try:
+            for raw in iter(stream.readline, b""):
+                lines.put(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        ended.set()
+        lines.put(None)
+
+    def run(self, command: str, timeout: float = 30):
+        t0 = time.perf_counter()
+        with self._lock:
+            add_stage("queue", since_ms(t0))
+            if not self.is_alive():
+                t1 = time.perf_counter()
+                self.start()
+                add_stage("setup", since_ms(t1))
+            t2 = time.perf_counter()
+            framed = f"( {command} ) </dev/null 2>&1; printf '\\n{self._marker} %s\\n' \"$?\"\n"
+            try:
+                self._writer.write(framed.encode("utf-8"))
+                self._writer.flush()
+            except (OSError, ValueError) as e:
+                self.close()
+                raise AdbSessionError(f"adb shell session closed: {e}")
+
+            deadline = time.monotonic() + timeout
+            out_lines = []
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    line = self._lines.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    self.close()
+                    raise AdbSessionLost(f"adb shell session timed out after {timeout}s")
+                if line is None:
+                    self.close()
+                    raise AdbSessionLost("adb shell session ended unexpectedly")
+                if line.startswith(self._marker):
+                    code = line[len(self._marker):].strip()
+                    break
+                out_lines.append(line)
+            add_stage("device", since_ms(t2))
+
+        out = "\n".join(out_lines).strip()
+        ok = code == "0"
+        log("adb shell >", command)
+        if out:
+            log("out >", out)
+        if ok:
+            return True, out, ""
+        return False, "", out or f"exit code {code}"
+
+    def close(self) -> None:
+        proc, sock, writer = self._proc, self._sock, self._writer
+        self._proc = self._sock = self._writer = None
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception:
+                pass
+        if proc is not None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+
+_shell_sessions = {}
+_shell_sessions_lock = threading.Lock()
+
+
+def get_shell_session(serial: str | None) -> AdbShellSession:
+    with _shell_sessions_lock:
+        session = _shell_sessions.get(serial)
+        if session is None:
+            session = AdbShellSession(serial)
+            _shell_sessions[serial] = session
+        return session
+
+
+def close_shell_session(serial: str | None = None) -> None:
+    with _shell_sessions_lock:
+        if serial is None:
+            sessions = list(_shell_sessions.values())
+            _shell_sessions.clear()
+        else:
+            s = _shell_sessions.pop(serial, None)
+            sessions = [s] if s else []
+    for s in sessions:
+        s.close()
+
+
+def run_adb_shell(args, serial: str | None = None, timeout: float = 30, use_session: bool = True):
+    command = " ".join(args)
+    if use_session:
+        try:
+            return get_shell_session(serial).run(command, timeout=timeout)
+        except AdbSessionLost as e:
+            # Sent but unanswered: running it again could press keys or install twice.
+            return False, "", str(e)
+        except AdbSessionError as e:
+            log("shell session unavailable, falling back >", e, error=True)
+    try:
+        return adb_client.shell(serial, command, timeout=timeout)
+    except AdbServerUnavailable as e:
+        log("adb server socket unavailable, falling back >", e, error=True)
+    except AdbClientError as e:
+        return False, "", str(e)
+    prefix = ["-s", serial] if serial else []
+    return run_adb_command(prefix + ["shell"] + list(args))
+
+
+# Runs a manual command and hands its output over line by line as it arrives
+# (logcat, top, dumpsys), instead of collecting everything until it exits.
+# cancel() and the optional timeout both stop it by closing the socket or
+# killing the adb process, which ends the read loop.
+class StreamingCommand:
+    def __init__(self, args, serial: str | None = None, raw_adb: bool = False,
+                 timeout: float | None = None, on_line=None):
+        self.args = list(args)
+        self.serial = serial
+        self.raw_adb = raw_adb
+        self.timeout = timeout
+        self.on_line = on_line
+        self.lines = 0
+        self.stopped = None
+        self._close = None
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self.stopped is None:
+                self.stopped = reason
+            close = self._close
+        if close is not None:
+            close()
+
+    def _set_close(self, close) -> bool:
+        with self._lock:
+            self._close = close
+            return self.stopped is None
+
+    def run(self):
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self.cancel, args=(f"timed out after {self.timeout:g}s",))
+            timer.daemon = True
+            timer.start()
+        try:
+            if self.raw_adb:
+                ok, err = self._run_process([adb_path()] + self.args)
+            else:
+                ok, err = self._run_shell()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if self.stopped is not None:
+            return False, "", f"{self.stopped} ({self.lines} lines)"
+        return ok, f"{self.lines} lines", err
+
+    def _emit(self, line: str) -> None:
+        self.lines += 1
+        if self.on_line is not None:
+            self.on_line(line)
+
+    def _run_shell(self):
+        marker = f"__FSR_{uuid.uuid4().hex}__"
+        command = " ".join(self.args)
+        framed = f"( {command} ) </dev/null 2>&1; printf '\\n{marker} %s\\n' \"$?\""
+        t0 = time.perf_counter()
+        try:
+            sock = adb_client.open_service(self.serial, f"exec:{framed}", timeout=10)
+        except AdbServerUnavailable as e:
+            log("adb server socket unavailable, falling back >", e, error=True)
+            prefix = ["-s", self.serial] if self.serial else []
+            return self._run_process([adb_path()] + prefix + ["shell"] + self.args)
+        except AdbClientError as e:
+            return False, str(e)
+        if not self._set_close(sock.close):
+            sock.close()
+            return False, ""
+        log("adb stream >", command)
+        add_stage("setup", since_ms(t0))
+        t1 = time.perf_counter()
+
+        code = None
+        pending = b""
+        held = None
+        try:
+            sock.settimeout(None)
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    line = raw.decode("utf-8", errors="replace").rstrip("\r")
+                    # The marker is preceded by an extra newline, so the
+                    # line before it is held back and dropped if empty.
+                    if line.startswith(marker):
+                        code = line[len(marker):].strip()
+                        if held:
+                            self._emit(held)
+                        held = None
+                        continue
+                    if held is not None:
+                        self._emit(held)
+                    held = line
+        except OSError as e:
+            if self.stopped is None:
+                return False, f"adb stream failed: {e}"
+        finally:
+            sock.close()
+            add_stage("device", since_ms(t1))
+        for line in (held, pending.decode("utf-8", errors="replace")):
+            if line:
+                self._emit(line)
+        if code is None:
+            return False, "" if self.stopped else "stream ended without an exit status"
+        return code == "0", "" if code == "0" else f"exit code {code}"
+
+    def _run_process(self, cmd):
+        startupinfo, creationflags = _subprocess_window_flags()
+        t0 = time.perf_counter()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                startupinfo=startupinfo,
+                creationflags=creationflags
+            )
+        except FileNotFoundError:
+            return False, "adb executable not found."
+        if not self._set_close(proc.kill):
+            proc.kill()
+        log("adb stream >", " ".join(cmd))
+        add_stage("setup", since_ms(t0))
+        t1 = time.perf_counter()
+        for raw in proc.stdout:
+            self._emit(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+        proc.wait()
+        add_stage("device", since_ms(t1))
+        return proc.returncode == 0, "" if proc.returncode == 0 else f"exit code {proc.returncode}"
+
+
+class _Lane:
+    def __init__(self, name: str, workers: int, maxsize: int):
+        self.name = name
+        self.queue = queue.Queue(maxsize)
+        self.workers = workers
+        self.threads = []
+        self.rejected = 0
+        self.completed = 0
+
+
+# Bounded replacement for thread-per-action: work is submitted to a named lane
+# with a fixed number of workers and a bounded queue, and is rejected rather
+# than piling up when the lane is full.
+class ActionExecutor:
+    def __init__(self, limits: dict | None = None):
+        self.limits = dict(LANE_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, name: str) -> _Lane:
+        lane = self._lanes.get(name)
+        if lane is None:
+            kind = name.split(":", 1)[0]
+            workers, maxsize = self.limits.get(kind, self.limits["control"])
+            lane = _Lane(name, workers, maxsize)
+            for _ in range(workers):
+                t = threading.Thread(target=self._worker, args=(lane,), daemon=True)
+                lane.threads.append(t)
+                t.start()
+            self._lanes[name] = lane
+        return lane
+
+    def _worker(self, lane: _Lane):
+        while True:
+            item = lane.queue.get()
+            if item is None:
+                return
+            fn, args = item
+            try:
+                fn(*args)
+            except Exception as e:
+                log(f"{lane.name} action failed >", repr(e), error=True)
+            with self._lock:
+                lane.completed += 1
+
+    def submit(self, lane_name: str, fn, *args) -> bool:
+        with self._lock:
+            lane = self._lane(lane_name)
+            try:
+                lane.queue.put_nowait((fn, args))
+            except queue.Full:
+                lane.rejected += 1
+                return False
+        return True
+
+    def close_lane(self, lane_name: str) -> None:
+        with self._lock:
+            lane = self._lanes.pop(lane_name, None)
+        if lane is None:
+            return
+        while True:
+            try:
+                lane.queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in lane.threads:
+            try:
+                lane.queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"depth": lane.queue.qsize(), "rejected": lane.rejected, "completed": lane.completed}
+                for name, lane in self._lanes.items()
+            }
+
+    def shutdown(self) -> None:
+        for name in list(self._lanes):
+            self.close_lane(name)
+
+
+def device_lane(serial: str | None) -> str:
+    return f"device:{serial or 'any'}"
+
+
+def slow_lane(serial: str | None) -> str:
+    return f"slow:{serial or 'any'}"
+
+
+# Ordered per-device key sender: pending presses are drained on the device's
+# executor lane and sent in a single `input keyevent a b c` invocation. With
+# an injector (key_inject.RawKeyInjector) a batch goes through it first and
+# only the keys it could not inject are sent with `input keyevent`.
+class KeyEventQueue:
+    def __init__(self, serial: str | None, executor: ActionExecutor, on_error=None,
+                 max_backlog: int = KEY_BACKLOG_LIMIT, max_batch: int = KEY_BATCH_MAX, injector=None):
+        self.serial = serial
+        self.executor = executor
+        self.on_error = on_error
+        self.injector = injector
+        self.max_backlog = max_backlog
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._stopped = False
+
+    def push(self, keycode: int) -> None:
+        with self._lock:
+            if self._stopped:
+                return
+            self._pending.append((int(keycode), time.perf_counter()))
+            overflow = len(self._pending) - self.max_backlog
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.dropped += overflow
+            if self._scheduled:
+                return
+            self._scheduled = True
+        if not self.executor.submit(device_lane(self.serial), self._drain):
+            with self._lock:
+                self.dropped += len(self._pending)
+                self._pending.clear()
+                self._scheduled = False
+
+    def backlog(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _drain(self):
+        idle = False
+        try:
+            while True:
+                with self._lock:
+                    if self._stopped or not self._pending:
+                        # Cleared under the lock so a push right after schedules a new drain.
+                        self._scheduled = False
+                        idle = True
+                        return
+                    batch = self._pending[:self.max_batch]
+                    del self._pending[:self.max_batch]
+                keycodes = [k for k, _ in batch]
+                # Queue wait is counted from the oldest press in the batch.
+                with TimedAction(self.serial, "key", queue_ms=since_ms(batch[0][1])) as timed:
+                    injected, error = self._inject(keycodes)
+                    if error is not None:
+                        # Lost in flight: they may have been pressed, so they are reported, not re-sent.
+                        timed.ok = False
+                        if self.on_error is not None:
+                            self.on_error(error, ())
+                    if injected < len(keycodes):
+                        timed.ok = self._send(keycodes[injected:]) and timed.ok
+                    elif error is None:
+                        timed.action = "key_raw"
+        finally:
+            if not idle:
+                # A failing injector or on_error must not leave the queue stuck as scheduled.
+                with self._lock:
+                    self._scheduled = False
+
+    def _inject(self, keycodes):
+        injector = self.injector
+        return injector.send(keycodes) if injector is not None else (0, None)
+
+    def _send(self, keycodes) -> bool:
+        ok, out, err = run_adb_shell(["input", "keyevent"] + [str(k) for k in keycodes], self.serial)
+        if not ok and self.on_error is not None:
+            self.on_error(err or out or "Failed to send key event", keycodes)
+        return ok
+
+    def set_injector(self, injector) -> None:
+        old, self.injector = self.injector, injector
+        if old is not None and old is not injector:
+            old.close()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            self._pending.clear()
+        self.set_injector(None)
+
+
+def keycode_for(name) -> int:
+    text = str(name).strip().upper()
+    if text.startswith("KEYCODE_"):
+        text = text[len("KEYCODE_"):]
+    if text.isdigit():
+        return int(text)
+    if text not in KEY_NAMES:
+        raise ValueError(f"unknown key: {name}")
+    return KEY_NAMES[text]
+
+
+def escape_adb_input_text(s: str) -> str:
+    return escape_adb_input_chunk((s or "").strip())
+
+
+def escape_adb_input_chunk(s: str) -> str:
+    if not s:
+        return ""
+    s = s.replace("\\", "\\\\").replace(" ", "%s")
+    # `#` and `~` are special at the start of a word, and any chunk can start a word.
+    for ch in "|&;<>()$`\"'*?[]{}!#~":
+        s = s.replace(ch, "\\" + ch)
+    return s
+
+
+def is_connection_error(message: str) -> bool:
+    text = (message or "").lower()
+    return any(hint in text for hint in CONNECTION_ERROR_HINTS)
+
+
+class _Outage:
+    def __init__(self):
+        self.since = time.monotonic()
+        self.attempts = 0
+        self.keys = []
+        self.cancel = threading.Event()
+
+
+# Re-establishes lost connections: one retry loop per lost device re-issues
+# `adb connect` with jittered exponential backoff, buffers recent safe key
+# presses made while the device is down, and reports attempts and downtime.
+# on_event(serial, kind, info) receives "attempt", "reconnected" (with the
+# keys to replay) and "gave_up".
+class ReconnectSupervisor:
+    def __init__(self, on_event=None, base_delay: float = RECONNECT_BASE_DELAY,
+                 max_delay: float = RECONNECT_MAX_DELAY, max_attempts: int = RECONNECT_MAX_ATTEMPTS):
+        self.on_event = on_event
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.reconnects = {}
+        self.downtime = {}
+        self._outages = {}
+        self._lock = threading.Lock()
+
+    def is_reconnecting(self, serial: str) -> bool:
+        with self._lock:
+            return serial in self._outages
+
+    def lost(self, serial: str) -> None:
+        with self._lock:
+            if serial in self._outages:
+                return
+            outage = _Outage()
+            self._outages[serial] = outage
+        threading.Thread(target=self._run, args=(serial, outage), daemon=True).start()
+
+    def cancel(self, serial: str) -> None:
+        with self._lock:
+            outage = self._outages.pop(serial, None)
+        if outage is not None:
+            outage.cancel.set()
+
+    def buffer_key(self, serial: str, keycode: int) -> bool:
+        if keycode in REPLAY_UNSAFE_KEYS:
+            return False
+        with self._lock:
+            outage = self._outages.get(serial)
+            if outage is None:
+                return False
+            outage.keys.append((time.monotonic(), keycode))
+            del outage.keys[:-REPLAY_MAX_KEYS]
+        return True
+
+    def _delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        return delay * random.uniform(0.5, 1.5)
+
+    def _emit(self, serial: str, kind: str, info: dict) -> None:
+        if self.on_event is not None:
+            try:
+                self.on_event(serial, kind, info)
+            except Exception as e:
+                log("reconnect listener failed >", repr(e), error=True)
+
+    def _run(self, serial: str, outage: _Outage):
+        while not outage.cancel.is_set():
+            if outage.attempts >= self.max_attempts:
+                with self._lock:
+                    self._outages.pop(serial, None)
+                self._emit(serial, "gave_up", {"attempts": outage.attempts,
+                                               "downtime": time.monotonic() - outage.since})
+                return
+            if outage.cancel.wait(self._delay(outage.attempts)):
+                return
+            outage.attempts += 1
+            self._emit(serial, "attempt", {"attempts": outage.attempts,
+                                           "downtime": time.monotonic() - outage.since})
+            ok, _, err = adb_connect(serial)
+            if ok and device_authorized(serial):
+                break
+            log(f"reconnect {serial} attempt {outage.attempts} failed >", err or "not ready", error=True)
+
+        with self._lock:
+            if self._outages.get(serial) is not outage:
+                return
+            del self._outages[serial]
+            downtime = time.monotonic() - outage.since
+            self.reconnects[serial] = self.reconnects.get(serial, 0) + 1
+            self.downtime[serial] = self.downtime.get(serial, 0.0) + downtime
+            cutoff = time.monotonic() - REPLAY_WINDOW
+            keys = [k for t, k in outage.keys if t >= cutoff]
+        self._emit(serial, "reconnected", {"attempts": outage.attempts, "downtime": downtime, "keys": keys})
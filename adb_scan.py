@@ -0,0 +1,187 @@
+import asyncio
+import ipaddress
+import socket
+import struct
+import threading
+import time
+
+from adb_client import AdbClient, AdbClientError
+
+A_CNXN = 0x4E584E43
+A_AUTH = 0x48545541
+A_VERSION = 0x01000000
+MAX_PAYLOAD = 256 * 1024
+
+SCAN_CACHE_TTL = 300
+
+# adb server device states as scan results report them.
+SERVER_STATES = {"device": "device", "unauthorized": "auth", "authorizing": "auth"}
+
+
+def _adb_packet(command: int, arg0: int, arg1: int, payload: bytes) -> bytes:
+    checksum = sum(payload) & 0xFFFFFFFF
+    header = struct.pack("<6I", command, arg0, arg1, len(payload), checksum, command ^ 0xFFFFFFFF)
+    return header + payload
+
+
+CNXN_PACKET = _adb_packet(A_CNXN, A_VERSION, MAX_PAYLOAD, b"host::\x00")
+
+
+class ScanResult:
+    def __init__(self, host: str, port: int, state: str):
+        self.host = host
+        self.port = port
+        self.state = state
+        self.model = ""
+        self.name = ""
+
+    @property
+    def serial(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def __repr__(self):
+        return f"ScanResult({self.serial!r}, {self.state!r}, model={self.model!r}, name={self.name!r})"
+
+
+async def probe_adb(host: str, port: int = 5555, timeout: float = 0.5) -> str | None:
+    # Sends an unsigned ADB CNXN and reads the reply header. Only says that
+    # adbd is listening: a stick with secure adbd (every retail Fire TV)
+    # answers AUTH whether or not it trusts our key, so "auth" here is not
+    # "unauthorized"; CNXN comes only from adbd with ro.adb.secure=0.
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(CNXN_PACKET)
+        await writer.drain()
+        header = await asyncio.wait_for(reader.readexactly(24), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return None
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    command, _, _, _, _, magic = struct.unpack("<6I", header)
+    if magic != command ^ 0xFFFFFFFF:
+        return None
+    if command == A_CNXN:
+        return "device"
+    if command == A_AUTH:
+        return "auth"
+    return None
+
+
+def server_devices(client: AdbClient | None = None) -> dict:
+    try:
+        return dict((client or AdbClient()).devices())
+    except AdbClientError:
+        return {}
+
+
+def fetch_device_props(result: ScanResult, client: AdbClient | None = None) -> None:
+    # Whether a stick trusts us is only known after the adb server has tried
+    # its key, so the state comes from host:devices: as is for a serial the
+    # server already has, after a host:connect otherwise (an untrusted stick
+    # then shows "Allow USB debugging?"). A stick that was not connected
+    # before is disconnected again afterwards.
+    client = client or AdbClient()
+    try:
+        devices = dict(client.devices())
+        was_connected = result.serial in devices
+        if not was_connected:
+            client.connect(result.serial)
+            devices = dict(client.devices())
+    except AdbClientError:
+        return
+    state = devices.get(result.serial)
+    ok = False
+    try:
+        if state is not None:
+            result.state = SERVER_STATES.get(state, state)
+        if state == "device":
+            ok, out, _ = client.shell(result.serial, "getprop ro.product.model; settings get global device_name", timeout=5)
+    except AdbClientError:
+        ok = False
+    finally:
+        if not was_connected:
+            try:
+                client.disconnect(result.serial)
+            except AdbClientError:
+                pass
+    if ok:
+        lines = out.splitlines() + ["", ""]
+        result.model = lines[0].strip()
+        name = lines[1].strip()
+        result.name = "" if name == "null" else name
+
+
+async def scan_network(cidr: str, port: int = 5555, concurrency: int = 256,
+                       timeout: float = 0.5, fetch_props: bool = False, on_found=None):
+    network = ipaddress.ip_network(cidr, strict=False)
+    sem = asyncio.Semaphore(concurrency)
+    found = []
+    # Serials the adb server already has get its state without a connect.
+    known = await asyncio.to_thread(server_devices)
+
+    async def check(host: str):
+        async with sem:
+            state = await probe_adb(host, port, timeout)
+        if state is None:
+            return
+        result = ScanResult(host, port, state)
+        if fetch_props:
+            async with sem:
+                await asyncio.to_thread(fetch_device_props, result)
+        elif result.serial in known:
+            result.state = SERVER_STATES.get(known[result.serial], known[result.serial])
+        found.append(result)
+        if on_found is not None:
+            on_found(result)
+
+    hosts = list(network.hosts()) if network.num_addresses > 1 else [network.network_address]
+    await asyncio.gather(*(check(str(h)) for h in hosts))
+    found.sort(key=lambda r: ipaddress.ip_address(r.host))
+    return found
+
+
+_scan_cache = {}
+_scan_cache_lock = threading.Lock()
+
+
+def scan(cidr: str, port: int = 5555, ttl: float = SCAN_CACHE_TTL, refresh: bool = False, **kwargs):
+    key = (str(ipaddress.ip_network(cidr, strict=False)), port, bool(kwargs.get("fetch_props")))
+    now = time.monotonic()
+    with _scan_cache_lock:
+        cached = _scan_cache.get(key)
+    if cached and not refresh and now - cached[0] < ttl:
+        on_found = kwargs.get("on_found")
+        if on_found is not None:
+            for result in cached[1]:
+                on_found(result)
+        return cached[1]
+    results = asyncio.run(scan_network(cidr, port, **kwargs))
+    with _scan_cache_lock:
+        _scan_cache[key] = (time.monotonic(), results)
+    return results
+
+
+def clear_scan_cache() -> None:
+    with _scan_cache_lock:
+        _scan_cache.clear()
+
+
+def local_subnet(prefix: int = 24) -> str | None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("10.255.255.255", 1))
+        ip = sock.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    if ip.startswith("127."):
+        return None
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
@@ -0,0 +1,36 @@
+import json
+import os
+import threading
+
+# Per-user settings that outlive a session (the devices to reconnect to on
+# launch). One small JSON file in the user's config folder, read once at
+# startup and replaced atomically on every save.
+
+SETTINGS_FILE = "settings.json"
+
+_lock = threading.Lock()
+
+
+def settings_path() -> str:
+    root = (os.environ.get("APPDATA") or os.environ.get("XDG_CONFIG_HOME")
+            or os.path.join(os.path.expanduser("~"), ".config"))
+    return os.path.join(root, "FirestickRemote", SETTINGS_FILE)
+
+
+def load_settings() -> dict:
+    try:
+        with open(settings_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(settings: dict) -> None:
+    path = settings_path()
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp, path)
@@ -0,0 +1,89 @@
+import argparse
+import os
+import statistics
+import stat
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+# Compares a key press sent through the old one-process-per-call path with
+# the adb server socket client and the persistent shell session, all against
+# the fake adb server so no device is needed. Each call is also timed as a
+# latency.TimedAction, and the per-stage breakdown (setup vs device) is
+# printed below the totals.
+
+SERIAL = "192.168.1.50:5555"
+
+
+def _install_adb_shim(directory: str) -> None:
+    shim = os.path.join(directory, "adb")
+    with open(shim, "w", encoding="utf-8") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(ROOT, "bench", "fake_adb.py")}" "$@"\n')
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+
+
+def _measure(fn, n: int, name: str, stats):
+    from latency import TimedAction
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        with TimedAction(SERIAL, name, stats=stats):
+            ok, _, err = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+        if not ok:
+            raise RuntimeError(err)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latency: adb subprocess vs socket client vs shell session.")
+    parser.add_argument("-n", type=int, default=50, help="key presses per path")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency per request (s)")
+    args = parser.parse_args()
+
+    server = FakeAdbServer(0, args.latency, [SERIAL]).start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+    shim_dir = tempfile.mkdtemp(prefix="fsr_adb_shim_")
+    _install_adb_shim(shim_dir)
+
+    import adb_commands as remote
+    from latency import LatencyStats
+    remote.adb_client.port = server.port
+    remote.LOG_COMMANDS = False
+
+    stats = LatencyStats()
+    key = ["input", "keyevent", "20"]
+    results = {
+        "subprocess": _measure(lambda: remote.run_adb_command(["-s", SERIAL, "shell"] + key), args.n,
+                               "subprocess", stats),
+        "socket_client": _measure(lambda: remote.adb_client.shell(SERIAL, " ".join(key)), args.n,
+                                  "socket_client", stats),
+        "shell_session": _measure(lambda: remote.run_adb_shell(key, SERIAL), args.n, "shell_session", stats),
+    }
+    remote.close_shell_session()
+    server.stop()
+
+    print(f"{'path':<16}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['mean_ms']:>10}")
+    print()
+    print(f"{'path':<16}{'stage':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in stats.rows("action"):
+        print(f"{row['action']:<16}{row['stage']:<8}{row['p50']:>10}{row['p95']:>10}{row['p99']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_release_server import FakeReleaseServer  # noqa: E402
+
+# Bin folder updates against a local release server: the whole-zip path, a
+# delta where the manifest lists per-file hashes and assets and only adb.exe
+# changed, and a release whose bin_version.txt is wrong (must roll back).
+# Prints bytes downloaded and files written for each.
+
+
+def _bin_files(version: str, adb: bytes, dll: bytes) -> dict:
+    return {"adb.exe": adb, "AdbWinApi.dll": dll, "AdbWinUsbApi.dll": dll[: len(dll) // 4],
+            "bin_version.txt": version.encode("ascii")}
+
+
+def _zip(files: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return buf.getvalue()
+
+
+def _release(server: FakeReleaseServer, files: dict, required: str, per_file: bool) -> dict:
+    manifest = {"bin_required_version": required, "bin_asset": "bin_update.zip"}
+    server.add_asset("bin_update.zip", _zip(files))
+    if per_file:
+        manifest["bin_files"] = {}
+        for name, data in files.items():
+            asset = f"bin-{hashlib.sha256(data).hexdigest()[:12]}-{name}"
+            server.add_asset(asset, data)
+            manifest["bin_files"][name] = {"sha256": hashlib.sha256(data).hexdigest(), "asset": asset}
+    return manifest
+
+
+def _snapshot(bin_dir: str) -> dict:
+    return {name: open(os.path.join(bin_dir, name), "rb").read() for name in sorted(os.listdir(bin_dir))}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Whole-zip vs delta bin updates.")
+    parser.add_argument("--dll-mb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    import FirestickRemote
+    from downloads import DownloadManager
+
+    work = tempfile.mkdtemp(prefix="fsr_bin_")
+    bin_dir = os.path.join(work, "bin")
+    manager = FirestickRemote.update_downloads = DownloadManager(os.path.join(work, "cache"))
+    # Leave any real adb server on this machine alone.
+    FirestickRemote.run_adb_command = lambda args: (True, "", "")
+    server = FakeReleaseServer().start()
+    dll = os.urandom(int(args.dll_mb * 1024 * 1024))
+    failures = 0
+
+    def step(name, files, required, per_file):
+        manifest = _release(server, files, required, per_file)
+        before = manager.bytes_downloaded
+        t0 = time.perf_counter()
+        try:
+            changed = FirestickRemote.apply_bin_update(server.release, manifest, bin_dir)
+            result = f"wrote {len(changed)}: {', '.join(changed)}"
+        except Exception as e:
+            result = f"{type(e).__name__}: {str(e).splitlines()[0]}"
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{name:<26}{manager.bytes_downloaded - before:>12,}{ms:>10.1f}  {result}")
+
+    def expect(cond, message):
+        nonlocal failures
+        if not cond:
+            failures += 1
+            print(f"FAIL: {message}", file=sys.stderr)
+
+    print(f"{'step':<26}{'bytes':>12}{'ms':>10}")
+    try:
+        v1 = _bin_files("1.0.0", b"MZ adb 1" * 1000, dll)
+        step("fresh install (zip)", v1, "1.0.0", False)
+        expect(_snapshot(bin_dir) == v1, "fresh install does not match the zip")
+        with open(os.path.join(bin_dir, "firestick_remote_adbkey"), "w") as f:
+            f.write("key")
+
+        v2 = _bin_files("1.1.0", b"MZ adb 2" * 1000, dll)
+        step("delta, adb.exe changed", v2, "1.1.0", True)
+        expect(_snapshot(bin_dir) == dict(v2, firestick_remote_adbkey=b"key"), "delta update result is wrong")
+
+        v3 = _bin_files("1.1.0", b"MZ adb 3" * 1000, dll)
+        step("bad bin_version (rollback)", v3, "1.2.0", True)
+        expect(_snapshot(bin_dir) == dict(v2, firestick_remote_adbkey=b"key"), "bin was not rolled back")
+        expect(not os.path.exists(bin_dir + ".staging") and not os.path.exists(bin_dir + ".old"),
+               "staging or backup folder left behind")
+
+        step("no changes", v2, "1.1.0", True)
+    finally:
+        server.stop()
+        shutil.rmtree(work, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from console import ConsoleBuffer, ConsoleView  # noqa: E402
+
+# Appends a million logcat-like lines to the console buffer and prints the
+# cost per append for each slice, which should stay flat once the ring is
+# full, then times a filter over the full buffer. With a display it also
+# pushes the same lines through the Tk view, one flush per simulated frame.
+
+
+def _line(i: int) -> str:
+    level = "EWID"[i % 4]
+    return f"10-16 12:00:{i % 60:02d}.{i % 1000:03d}  1234  5678 {level} ActivityManager: event {i} pkg=com.app{i % 97}"
+
+
+def _bench_buffer(total: int, slices: int, max_lines: int) -> ConsoleBuffer:
+    buffer = ConsoleBuffer(max_lines)
+    step = total // slices
+    block = buffer.begin_block("$ adb shell logcat")
+    print(f"{'lines':>10}{'us/append':>12}{'buffered':>10}")
+    for s in range(slices):
+        t0 = time.perf_counter()
+        for i in range(s * step, (s + 1) * step):
+            buffer.append(_line(i), block)
+        per = (time.perf_counter() - t0) / step * 1e6
+        print(f"{(s + 1) * step:>10}{per:>12.2f}{len(buffer):>10}")
+    return buffer
+
+
+def _bench_search(buffer: ConsoleBuffer) -> None:
+    for query in ("com.app42 ", "event 999999", "ActivityManager", "zzz"):
+        t0 = time.perf_counter()
+        found = buffer.search(query)
+        print(f"filter {query!r}: {len(found)} lines in {(time.perf_counter() - t0) * 1000:.2f} ms")
+
+
+def _bench_view(total: int, per_frame: int) -> None:
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Tk view skipped: {e}")
+        return
+    view = ConsoleView(root)
+    t0 = time.perf_counter()
+    worst = 0.0
+    for start in range(0, total, per_frame):
+        for i in range(start, start + per_frame):
+            view.buffer.append(_line(i))
+        f0 = time.perf_counter()
+        view._flush()
+        worst = max(worst, time.perf_counter() - f0)
+    elapsed = time.perf_counter() - t0
+    lines = int(view.text.index("end-1c").split(".")[0])
+    print(f"Tk view: {total} lines in {elapsed:.1f}s, worst frame {worst * 1000:.1f} ms, widget holds {lines} lines")
+    root.destroy()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Console append cost at 1M lines.")
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--slices", type=int, default=10)
+    parser.add_argument("--max-lines", type=int, default=5000)
+    parser.add_argument("--per-frame", type=int, default=2000, help="lines appended between view flushes")
+    args = parser.parse_args()
+
+    buffer = _bench_buffer(args.lines, args.slices, args.max_lines)
+    _bench_search(buffer)
+    _bench_view(args.lines, args.per_frame)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
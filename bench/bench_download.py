@@ -0,0 +1,82 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_release_server import FakeReleaseServer  # noqa: E402
+
+# Updater download paths against a local release server: release.json
+# revalidation (304) and TTL cache hits, a download cut off half way and
+# resumed, a repeat that comes from the cache, and a corrupted asset caught
+# by the SHA-256 check.
+# Prints the bytes that actually crossed the wire for each step.
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Resumable/cached updater downloads.")
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    args = parser.parse_args()
+
+    from downloads import DownloadError, DownloadManager, sha256_file
+
+    payload = os.urandom(int(args.size_mb * 1024 * 1024))
+    server = FakeReleaseServer().start()
+    digest = server.add_asset("FirestickRemote.exe", payload)
+    asset_url = server.release["assets"][0]["browser_download_url"]
+    cache_dir = tempfile.mkdtemp(prefix="fsr_cache_")
+    manager = DownloadManager(cache_dir, retries=2)
+    failures = 0
+
+    def step(name, fn):
+        before = manager.bytes_downloaded
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        except DownloadError as e:
+            result = f"DownloadError: {str(e).splitlines()[0]}"
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{name:<28}{manager.bytes_downloaded - before:>12,}{ms:>10.1f}  {result}")
+
+    def expect(cond, message):
+        nonlocal failures
+        if not cond:
+            failures += 1
+            print(f"FAIL: {message}", file=sys.stderr)
+
+    print(f"{'step':<28}{'bytes':>12}{'ms':>10}")
+    try:
+        step("release.json (cold)", lambda: len(manager.get_json(server.release_url)["assets"]))
+        step("release.json (304)", lambda: len(manager.get_json(server.release_url)["assets"]))
+        expect(manager.not_modified == 1, "second release lookup was not a 304")
+        requests = len(server.requests)
+        step("release.json (within TTL)", lambda: len(manager.get_json(server.release_url, max_age=3600)["assets"]))
+        expect(len(server.requests) == requests, "release lookup within the TTL hit the network")
+
+        server.drop_after = len(payload) // 2
+        step("asset, cut at 50% + resume", lambda: os.path.basename(manager.fetch(asset_url, digest)))
+        expect(manager.bytes_downloaded < len(payload) * 1.1, "resume re-downloaded the whole asset")
+        expect(sha256_file(os.path.join(cache_dir, "blobs", digest)) == digest, "cached blob is corrupt")
+
+        step("asset, cached", lambda: os.path.basename(manager.fetch(asset_url, digest)))
+        expect(manager.cache_hits == 1, "repeat download did not come from the cache")
+
+        server.add_asset("bin_update.zip", payload[:1024] + b"corrupt" + payload[1031:2048])
+        bad_url = server.url("/download/bin_update.zip")
+        step("asset, bad checksum", lambda: manager.fetch(bad_url, "0" * 64))
+        expect(not os.path.exists(os.path.join(cache_dir, "blobs", "0" * 64)), "bad asset was cached")
+    finally:
+        server.stop()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"requests: {[(path.rsplit('/', 1)[-1], code, n) for path, code, n in server.requests]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+# Logcat pane throughput: parse + store rate in process, the same lines
+# streamed end to end through the fake adb server, then indexed searches and
+# an export over the full ring.
+
+SERIAL = "192.168.1.50:5555"
+TAGS = ["ActivityManager", "WindowManager", "ExoPlayerImpl", "chromium", "MyApp", "AudioFlinger", "wpa_supplicant"]
+
+
+def _line(i: int) -> str:
+    level = "VDIIIWE"[i % 7]
+    tag = TAGS[(i * 3) % len(TAGS)]
+    return (f"10-16 12:{i // 60000 % 60:02d}:{i // 1000 % 60:02d}.{i % 1000:03d}  "
+            f"{1000 + i % 40:5d} {2000 + i % 300:5d} {level} {tag:<15}: message {i} state=ok value={i * 7}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Logcat parse/store/search throughput.")
+    parser.add_argument("--lines", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from logcat import LogcatReader, LogStore
+
+    lines = [_line(i) for i in range(args.lines)]
+    store = LogStore()
+    t0 = time.perf_counter()
+    for line in lines:
+        store.add_line(line)
+    rate = args.lines / (time.perf_counter() - t0)
+    print(f"parse+store: {rate:,.0f} lines/s, {len(store)} kept")
+
+    for query in ({"tag": "MyApp"}, {"pid": 1007}, {"level": "E"}, {"tag": "chromium", "level": "W"},
+                  {"text": "value=700007"}, {"pid": 1003, "text": "message 19"}):
+        t0 = time.perf_counter()
+        found = store.query(**query)
+        print(f"query {query}: {len(found)} in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    out = os.path.join(tempfile.mkdtemp(prefix="fsr_logcat_"), "export.txt")
+    t0 = time.perf_counter()
+    count = store.export(out)
+    print(f"export: {count} entries in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    source = os.path.join(os.path.dirname(out), "logcat.txt")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write("--------- beginning of main\n" + "\n".join(lines) + "\n")
+    os.environ["FSR_FAKE_LOGCAT"] = source
+    server = FakeAdbServer(0, 0.0, [SERIAL]).start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+    import adb_commands
+    adb_commands.adb_client.port = server.port
+    adb_commands.LOG_COMMANDS = False
+
+    streamed = LogStore()
+    reader = LogcatReader(SERIAL, streamed, ["MyApp", "chromium"], "I")
+    t0 = time.perf_counter()
+    reader.start()
+    reader._thread.join()
+    elapsed = time.perf_counter() - t0
+    print(f"streamed via fake adb: {streamed.next_seq:,} entries in {elapsed:.2f}s "
+          f"({streamed.next_seq / elapsed:,.0f} lines/s), unparsed {streamed.unparsed}")
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
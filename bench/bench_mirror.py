@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb_server import FakeAdbServer  # noqa: E402
+from fake_frames import FakeFrameSource, make_png, make_screencap  # noqa: E402
+
+# Runs the screen mirror against a fake 30 fps frame source with a consumer
+# that only polls a few times a second (like the Tk pane), then against
+# raw screencap and screencap -p through the fake adb server, and reports
+# delivered and dropped frames, capture time, capture-thread CPU, bytes per
+# frame over the adb link and peak Python memory.
+
+SERIAL = "192.168.1.50:5555"
+
+
+def _consume(mirror, seconds: float, poll_hz: float) -> int:
+    shown = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        time.sleep(1.0 / poll_hz)
+        if mirror.take() is not None:
+            shown += 1
+    return shown
+
+
+def _run(name: str, source, seconds: float, poll_hz: float, fps: float) -> None:
+    from screen_mirror import ScreenMirror
+
+    tracemalloc.start()
+    mirror = ScreenMirror(source, fps=fps)
+    mirror.start()
+    shown = _consume(mirror, seconds, poll_hz)
+    mirror.stop()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    s = mirror.stats()
+    link_kb = getattr(source, "link_bytes", 0) / 1024
+    print(f"{name:<14}{s['frames']:>8}{shown:>8}{s['dropped']:>9}{s['capture_ms']:>12.1f}"
+          f"{s['cpu_ms']:>10.1f}{link_kb:>10.1f}{s['frame_kb']:>10.1f}{peak / 1024 / 1024:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Screen mirror throughput, frame dropping and cost.")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--poll-hz", type=float, default=4.0, help="how often the fake UI takes a frame")
+    parser.add_argument("--fps", type=float, default=4.0, help="mirror target rate for paced sources")
+    parser.add_argument("--width", type=int, default=1920, help="fake screencap width")
+    parser.add_argument("--height", type=int, default=1080, help="fake screencap height")
+    args = parser.parse_args()
+
+    print(f"{'source':<14}{'frames':>8}{'shown':>8}{'dropped':>9}{'capture ms':>12}"
+          f"{'cpu ms':>10}{'link KB':>10}{'frame KB':>10}{'peak MB':>10}")
+    _run("fake 30fps", FakeFrameSource(), args.seconds, args.poll_hz, args.fps)
+
+    work = tempfile.mkdtemp(prefix="fsr_screen_")
+    for name, var, data in (("screen.raw", "FSR_FAKE_SCREEN", make_screencap(args.width, args.height)),
+                            ("screen.png", "FSR_FAKE_PNG", make_png(args.width, args.height))):
+        with open(os.path.join(work, name), "wb") as f:
+            f.write(data)
+        os.environ[var] = os.path.join(work, name)
+    server = FakeAdbServer(0, 0.0, [SERIAL]).start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+    import adb_commands
+    adb_commands.adb_client.port = server.port
+    adb_commands.LOG_COMMANDS = False
+    from screen_mirror import ScreencapSource
+    _run("screencap", ScreencapSource(SERIAL, raw=True), args.seconds, args.poll_hz, args.fps)
+    _run("screencap -p", ScreencapSource(SERIAL), args.seconds, args.poll_hz, args.fps)
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+# Key latency through `input keyevent` against the sendevent helper, over the
+# fake adb server. The fake `input` sleeps --input-delay (the JVM start a
+# Fire TV pays per call) and `sendevent` sleeps --sendevent-delay. Measures
+# single presses spaced apart, then a held key (presses at --rate for
+# --hold seconds) to show how many keys per second each path delivers.
+
+SERIAL = "192.168.1.50:5555"
+
+
+def _run_path(remote, raw: bool, args):
+    import key_inject
+    from latency import latency_stats
+
+    executor = remote.ActionExecutor()
+    delivered = [0]
+
+    class CountingQueue(remote.KeyEventQueue):
+        def _inject(self, keycodes):
+            n, error = super()._inject(keycodes)
+            if error is None:
+                delivered[0] += n
+            return n, error
+
+        def _send(self, keycodes) -> bool:
+            ok = super()._send(keycodes)
+            if ok:
+                delivered[0] += len(keycodes)
+            return ok
+
+    injector = key_inject.RawKeyInjector(SERIAL) if raw else None
+    queue = CountingQueue(SERIAL, executor, max_backlog=10_000, injector=injector)
+    if injector is not None and not injector.prepare():
+        raise RuntimeError(f"helper did not start: {injector.unavailable}")
+
+    latency_stats.reset()
+    for _ in range(args.n):
+        queue.push(20)
+        time.sleep(args.gap)
+    rows = [r for r in latency_stats.rows("action") if r["stage"] == "total"]
+    single = rows[0] if rows else {"p50": 0.0, "p95": 0.0, "count": 0}
+
+    delivered[0] = 0
+    pushed = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < args.hold:
+        queue.push(20)
+        pushed += 1
+        time.sleep(1.0 / args.rate)
+    while delivered[0] < pushed and time.perf_counter() - t0 < args.hold + 30:
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - t0
+    queue.stop()
+    executor.shutdown()
+    return {
+        "action": single.get("action", "-"),
+        "p50": single["p50"],
+        "p95": single["p95"],
+        "keys_per_sec": delivered[0] / elapsed,
+        "drain_s": elapsed - args.hold,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="input keyevent vs sendevent helper key latency.")
+    parser.add_argument("-n", type=int, default=20, help="single presses per path")
+    parser.add_argument("--gap", type=float, default=0.4, help="seconds between single presses")
+    parser.add_argument("--input-delay", type=float, default=0.3, help="seconds the fake `input` takes")
+    parser.add_argument("--sendevent-delay", type=float, default=0.002, help="seconds per fake `sendevent`")
+    parser.add_argument("--rate", type=float, default=20.0, help="held key presses per second")
+    parser.add_argument("--hold", type=float, default=3.0, help="seconds the key is held")
+    args = parser.parse_args()
+
+    os.environ["FSR_FAKE_INPUT_DELAY"] = str(args.input_delay)
+    os.environ["FSR_FAKE_SENDEVENT_DELAY"] = str(args.sendevent_delay)
+    server = FakeAdbServer(0, 0.0, [SERIAL]).start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+
+    import adb_commands as remote
+    import key_inject
+    remote.adb_client.port = server.port
+    remote.LOG_COMMANDS = False
+    # The fake device's filesystem is this machine's.
+    key_inject.HELPER_PATH = os.path.join(tempfile.mkdtemp(prefix="fsr_keys_"), "fsr_keys.sh")
+
+    results = {"input keyevent": _run_path(remote, False, args), "sendevent": _run_path(remote, True, args)}
+    remote.close_shell_session()
+    server.stop()
+
+    print(f"{'path':<16}{'timed as':<10}{'p50 ms':>9}{'p95 ms':>9}{'held keys/s':>13}{'drain s':>9}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['action']:<10}{r['p50']:>9.1f}{r['p95']:>9.1f}"
+              f"{r['keys_per_sec']:>13.1f}{r['drain_s']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import adb_scan  # noqa: E402
+from fake_adb_device import start_fleet  # noqa: E402
+
+# Times a subnet discovery sweep over loopback with fake adbd listeners on a
+# handful of addresses, then the cached repeat.
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time adb_scan against fake loopback devices.")
+    parser.add_argument("--cidr", default="127.0.0.0/24")
+    parser.add_argument("--devices", type=int, default=5)
+    parser.add_argument("--port", type=int, default=15555)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    fleet = start_fleet(args.devices, port=args.port)
+    t0 = time.perf_counter()
+    found = adb_scan.scan(args.cidr, args.port, concurrency=args.concurrency, timeout=args.timeout)
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    adb_scan.scan(args.cidr, args.port, concurrency=args.concurrency, timeout=args.timeout)
+    cached = time.perf_counter() - t0
+    for d in fleet:
+        d.stop()
+
+    for r in found:
+        print(r.serial, r.state)
+    print(f"found {len(found)}/{args.devices} in {cold:.2f}s (cached repeat {cached * 1000:.2f} ms)")
+    return 0 if len(found) == args.devices else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
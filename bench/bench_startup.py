@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start of the window: module import time in a fresh interpreter (no
+# display needed), then, where a display is available, a full launch with
+# FSR_STARTUP_REPORT set so the app writes its own startup breakdown and
+# quits once warm-up is done. Pass --exe to time a frozen build instead.
+
+
+def _import_ms(runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import FirestickRemote"], cwd=ROOT, check=True)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _launch(cmd, timeout: float):
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    env = dict(os.environ, FSR_STARTUP_REPORT=path)
+    try:
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env, timeout=timeout, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wall = (time.perf_counter() - t0) * 1000
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        report["process_ms"] = round(wall, 1)
+        return report
+    finally:
+        os.remove(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup time of the remote window.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="time this frozen FirestickRemote.exe instead of the source")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    args = parser.parse_args()
+
+    results = {}
+    if not args.exe:
+        samples = _import_ms(args.runs)
+        results["import_ms"] = {"median": round(statistics.median(samples), 1), "min": round(min(samples), 1)}
+
+    if sys.platform == "win32" or os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+        cmd = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT, "FirestickRemote.py")]
+        try:
+            results["launch"] = _launch(cmd, args.timeout)
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            results["launch_error"] = str(e)
+    else:
+        results["launch_error"] = "no display; only the import time was measured"
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 1 if args.exe and "launch_error" in results else 0
+
+    if "import_ms" in results:
+        print(f"import FirestickRemote   median {results['import_ms']['median']} ms, min {results['import_ms']['min']} ms")
+    launch = results.get("launch")
+    if launch:
+        for name, ms in launch["steps_ms"].items():
+            print(f"  {name:<22}{ms:>8.1f} ms")
+        print(f"  window shown after    {launch['window_ms']:>8.1f} ms")
+        for name, ms in launch["warm_up_ms"].items():
+            print(f"  warm-up {name:<14}{ms:>8.1f} ms")
+        print(f"  ready after           {launch['ready_ms']:>8.1f} ms (process {launch['process_ms']} ms)")
+    else:
+        print(f"launch: {results['launch_error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import argparse
+import os
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+# Chars/sec for typing text: one `input text` with the whole string (the old
+# path) against the chunked TextSender, over the fake adb server with a fixed
+# per-`input` delay standing in for the device's input handling.
+
+SERIAL = "192.168.1.50:5555"
+
+
+def _sample(length: int) -> str:
+    alphabet = string.ascii_letters + string.digits + " -_.:/?=&%"
+    return "".join(alphabet[(i * 7) % len(alphabet)] for i in range(length))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Text input throughput, single call vs chunked.")
+    parser.add_argument("--lengths", default="16,64,256,1024")
+    parser.add_argument("--input-delay", type=float, default=0.05, help="seconds the fake `input` takes per call")
+    args = parser.parse_args()
+
+    os.environ["FSR_FAKE_INPUT_DELAY"] = str(args.input_delay)
+    server = FakeAdbServer(0, 0.0, [SERIAL]).start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+
+    import adb_commands
+    adb_commands.adb_client.port = server.port
+    adb_commands.LOG_COMMANDS = False
+    from text_input import TextSender
+
+    print(f"{'chars':>6}{'single ms':>11}{'chunked ms':>12}{'chunks':>8}{'chars/s':>9}")
+    for length in (int(n) for n in args.lengths.split(",")):
+        text = _sample(length)
+        t0 = time.perf_counter()
+        ok, _, err = adb_commands.run_adb_shell(
+            ["input", "text", adb_commands.escape_adb_input_chunk(text)], SERIAL
+        )
+        single = (time.perf_counter() - t0) * 1000
+        sender = TextSender(SERIAL, text)
+        ok2, _, err2 = sender.run()
+        if not (ok and ok2):
+            print(err or err2, file=sys.stderr)
+            return 1
+        print(f"{length:>6}{single:>11.1f}{sender.elapsed * 1000:>12.1f}{sender.chunks:>8}"
+              f"{sender.chars_per_sec:>9.0f}")
+
+    sender = TextSender(SERIAL, "Wi-Fi: café ☕ naïve\tok")
+    ok, out, err = sender.run()
+    print(f"unicode: {out if ok else err}")
+    adb_commands.close_shell_session()
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
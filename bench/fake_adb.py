@@ -0,0 +1,88 @@
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adb_client import AdbClient, AdbClientError  # noqa: E402
+
+# Minimal stand-in for the adb executable: one process per call, talking to
+# whatever adb server ANDROID_ADB_SERVER_PORT points at. Used to measure the
+# subprocess path the way the remote pays for it with the real adb.exe.
+# $FSR_FAKE_ADB_DELAY adds seconds of start-up to every call (adb.exe is
+# slower to start than this script), and $FSR_FAKE_ADB_FAIL_RATE makes that
+# fraction of calls fail with "device offline" before doing anything.
+
+
+def _interactive_shell(client: AdbClient, serial: str | None) -> int:
+    sock = client.open_service(serial, "exec:sh")
+    sock.settimeout(None)
+
+    def pump_in():
+        for line in iter(sys.stdin.buffer.readline, b""):
+            sock.sendall(line)
+        sock.shutdown(socket.SHUT_WR)
+
+    threading.Thread(target=pump_in, daemon=True).start()
+    for chunk in iter(lambda: sock.recv(65536), b""):
+        sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def main(argv) -> int:
+    serial = None
+    while argv[:1] == ["-s"]:
+        serial = argv[1]
+        argv = argv[2:]
+    if not argv:
+        print("usage: fake_adb.py [-s SERIAL] devices|connect|disconnect|shell ...", file=sys.stderr)
+        return 1
+
+    delay = float(os.environ.get("FSR_FAKE_ADB_DELAY") or 0)
+    if delay:
+        time.sleep(delay)
+    if random.random() < float(os.environ.get("FSR_FAKE_ADB_FAIL_RATE") or 0):
+        print("error: device offline", file=sys.stderr)
+        return 1
+
+    client = AdbClient()
+    cmd, rest = argv[0], argv[1:]
+    try:
+        if cmd == "devices":
+            print("List of devices attached")
+            for s, state in client.devices():
+                print(f"{s}\t{state}")
+            return 0
+        if cmd == "connect":
+            ok, out, err = client.connect(rest[0])
+            print(out or err)
+            return 0 if ok else 1
+        if cmd == "disconnect":
+            ok, out, err = client.disconnect(rest[0] if rest else None)
+            print(out or err)
+            return 0 if ok else 1
+        if cmd == "start-server":
+            client.version()
+            return 0
+        if cmd == "shell" and not rest:
+            return _interactive_shell(client, serial)
+        if cmd == "shell":
+            ok, out, err = client.shell(serial, " ".join(rest))
+            if out:
+                print(out)
+            if err:
+                print(err, file=sys.stderr)
+            return 0 if ok else 1
+    except AdbClientError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"unknown command {cmd}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+import argparse
+import os
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adb_scan import A_AUTH, A_CNXN, A_VERSION, MAX_PAYLOAD, _adb_packet  # noqa: E402
+
+# Fake Fire TV adbd endpoint: answers an unsigned ADB CNXN the way a stick
+# does (secure adbd always asks for AUTH, trusted key or not; only adbd with
+# ro.adb.secure=0 answers CNXN), with optional delay, so discovery can be
+# exercised on loopback addresses. Whether a stick trusts the host is the
+# adb server's business; see fake_adb_server's unauthorized list.
+
+
+class FakeAdbDevice(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5555, secure: bool = True, delay: float = 0.0):
+        super().__init__((host, port), FakeAdbDeviceHandler)
+        self.secure = secure
+        self.delay = delay
+        self.handshakes = 0
+
+    def start(self) -> "FakeAdbDevice":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeAdbDeviceHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        try:
+            header = b""
+            while len(header) < 24:
+                chunk = self.request.recv(24 - len(header))
+                if not chunk:
+                    return
+                header += chunk
+        except OSError:
+            return
+        command = struct.unpack("<6I", header)[0]
+        if command != A_CNXN:
+            return
+        server.handshakes += 1
+        if server.delay:
+            time.sleep(server.delay)
+        if server.secure:
+            reply = _adb_packet(A_AUTH, 1, 0, os.urandom(20))
+        else:
+            reply = _adb_packet(A_CNXN, A_VERSION, MAX_PAYLOAD, b"device::ro.product.model=AFTMM;\x00")
+        try:
+            self.request.sendall(reply)
+        except OSError:
+            pass
+
+
+def start_fleet(count: int, base: str = "127.0.0", first: int = 10, port: int = 5555, **kwargs):
+    return [FakeAdbDevice(f"{base}.{first + i}", port, **kwargs).start() for i in range(count)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fake Fire TV adbd endpoints on loopback addresses.")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--insecure", action="store_true", help="answer CNXN like ro.adb.secure=0")
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    devices = start_fleet(args.count, port=args.port, secure=not args.insecure, delay=args.delay)
+    for d in devices:
+        print("fake device on", "%s:%d" % d.server_address, file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
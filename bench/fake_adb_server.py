@@ -0,0 +1,379 @@
+import argparse
+import os
+import random
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+# Stand-in for the adb server on tcp:5037. It speaks the host protocol and
+# runs exec:/shell: services through a local `sh` with Fire TV commands such
+# as `input` and `getprop` stubbed out, so the remote can be exercised
+# without a device. `screencap`, `screencap -p` and `logcat` print the files
+# named by $FSR_FAKE_SCREEN, $FSR_FAKE_PNG and $FSR_FAKE_LOGCAT, and `input` sleeps
+# $FSR_FAKE_INPUT_DELAY seconds to mimic a slow stick. `input`, `ime set` and
+# `am broadcast` append their arguments, one call per line, to
+# $FSR_FAKE_INPUT_LOG when it is set. `settings` keeps one
+# file per device and key under $FSR_FAKE_SETTINGS_DIR; without it, writes
+# are silently ignored, like a stick that refuses them. `getevent -p` lists a
+# Fire TV remote's key codes and `sendevent` sleeps $FSR_FAKE_SENDEVENT_DELAY.
+#
+# Faults can be injected for benchmarks: fail_rate refuses that fraction of
+# transport requests with "device offline" (seeded, so a run can be
+# repeated), and drop_every cuts an interactive shell after that many
+# writes from the client, the way a stick dropping off Wi-Fi does. kill()
+# (or host:kill) stops the server and drops every open stream, like
+# `adb kill-server`.
+
+DEVICE_PREAMBLE = r"""
+_record() { [ -n "$FSR_FAKE_INPUT_LOG" ] && printf '%s\n' "$*" >> "$FSR_FAKE_INPUT_LOG"; :; }
+input() { [ -n "$FSR_FAKE_INPUT_DELAY" ] && sleep "$FSR_FAKE_INPUT_DELAY"; _record input "$@"; }
+ime() {
+    case "$1" in
+        list) echo "com.android.adbkeyboard/.AdbIME" ;;
+        set) _record ime "$@" ;;
+    esac
+}
+am() {
+    case "$1" in
+        start) echo "Starting: Intent { cmp=$3 }" ;;
+        *) _record am "$@"; echo "Broadcast completed: result=0" ;;
+    esac
+}
+monkey() { echo "Events injected: 1"; }
+getprop() {
+    case "$1" in
+        "") printf '[ro.product.model]: [AFTMM]\n[ro.product.manufacturer]: [Amazon]\n[ro.build.version.release]: [9]\n' ;;
+        ro.product.model) echo "AFTMM" ;;
+        ro.product.manufacturer) echo "Amazon" ;;
+        ro.build.version.release) echo "9" ;;
+        *) echo "" ;;
+    esac
+}
+pm() {
+    [ "$1 $2" = "list packages" ] || return 1
+    [ "$3" = "-3" ] || echo "package:com.amazon.tv.launcher"
+    echo "package:com.netflix.ninja"
+    echo "package:org.xbmc.kodi"
+}
+cmd() {
+    [ "$1 $2" = "package query-activities" ] || return 1
+    case "$*" in
+        *LEANBACK_LAUNCHER*)
+            echo "com.netflix.ninja/.MainActivity"
+            echo "org.xbmc.kodi/.Splash" ;;
+        *) echo "com.amazon.tv.launcher/.ui.HomeActivity" ;;
+    esac
+}
+dumpsys() {
+    case "$1 $2" in
+        "package packages") cat <<'EOF'
+Packages:
+  Package [com.amazon.tv.launcher] (3f2a1b0):
+    versionCode=302010 minSdk=22 targetSdk=28
+    versionName=3.2.1
+  Package [com.netflix.ninja] (9c1d2e4):
+    versionCode=1600 minSdk=21 targetSdk=30
+    versionName=8.3.2
+  Package [org.xbmc.kodi] (1a2b3c4):
+    versionCode=2001 minSdk=21 targetSdk=30
+    versionName=20.1
+EOF
+        ;;
+        "activity activities") echo "  mResumedActivity: ActivityRecord{5e1c2a u0 com.amazon.tv.launcher/.ui.HomeActivity t12}" ;;
+    esac
+}
+stat() {
+    if [ "$*" = "-c %Y /data/app" ]; then echo "${FSR_FAKE_PACKAGES_STAMP:-1700000000}"; else command stat "$@"; fi
+}
+settings() {
+    if [ -z "$FSR_FAKE_SETTINGS_DIR" ]; then
+        [ "$1" = get ] && echo null
+        return 0
+    fi
+    d="$FSR_FAKE_SETTINGS_DIR/$FSR_FAKE_SERIAL/$2"
+    case "$1" in
+        get) cat "$d/$3" 2>/dev/null || echo null ;;
+        put) mkdir -p "$d" && echo "$4" > "$d/$3" ;;
+        delete) rm -f "$d/$3" ;;
+    esac
+}
+getevent() {
+    [ "$1" = "-p" ] || return 1
+    cat <<'EOF'
+add device 1: /dev/input/event0
+  name:     "gpio-keys"
+  events:
+    KEY (0001): 0074
+  input props:
+    <none>
+add device 2: /dev/input/event3
+  name:     "Amazon Fire TV Remote"
+  events:
+    KEY (0001): 0001  000e  001c  0066  0067  0069  006a  006c  0071  0072  0073  0074
+                008b  009e  00a3  00a4  00a5  00a8  00ac  00d0  00d9  0161
+    MSC (0004): 0004
+  input props:
+    <none>
+EOF
+}
+sendevent() { [ -n "$FSR_FAKE_SENDEVENT_DELAY" ] && sleep "$FSR_FAKE_SENDEVENT_DELAY"; :; }
+# `sh FILE` runs FILE in this shell so the stand-ins above apply to it too.
+sh() {
+    if [ $# -eq 1 ] && [ -f "$1" ]; then
+        . "$1"
+    else
+        command sh "$@"
+    fi
+}
+screencap() {
+    if [ "$1" = "-p" ]; then set -- "$FSR_FAKE_PNG"; else set -- "$FSR_FAKE_SCREEN"; fi
+    [ -n "$1" ] && cat "$1"
+}
+logcat() { [ -n "$FSR_FAKE_LOGCAT" ] && cat "$FSR_FAKE_LOGCAT"; }
+"""
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, devices=None, unauthorized=None,
+                 fail_rate: float = 0.0, drop_every: int = 0, seed: int | None = None):
+        super().__init__(("127.0.0.1", port), FakeAdbHandler)
+        self.latency = latency
+        self.devices = dict((d, "device") for d in (devices or []))
+        self.unauthorized = set(unauthorized or [])
+        self.fail_rate = fail_rate
+        self.drop_every = drop_every
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.injected = 0
+        self.lock = threading.Lock()
+        self.changed = threading.Condition()
+        self.version = 0
+        self.killed = False
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeAdbServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def kill(self) -> None:
+        with self.changed:
+            self.killed = True
+            self.changed.notify_all()
+        self.stop()
+
+    def set_device(self, serial: str, state: str | None) -> None:
+        with self.changed:
+            if state is None:
+                self.devices.pop(serial, None)
+            else:
+                self.devices[serial] = state
+            self.version += 1
+            self.changed.notify_all()
+
+    def device_list(self) -> str:
+        return "".join(f"{s}\t{state}\n" for s, state in sorted(self.devices.items()))
+
+    def inject_failure(self) -> bool:
+        with self.lock:
+            if self.fail_rate and self.random.random() < self.fail_rate:
+                self.injected += 1
+                return True
+            return False
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    def _read_exact(self, n: int) -> bytes:
+        buf = b""
+        while len(buf) < n:
+            chunk = self.request.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("client closed")
+            buf += chunk
+        return buf
+
+    def _read_request(self) -> str:
+        length = int(self._read_exact(4), 16)
+        return self._read_exact(length).decode("utf-8")
+
+    def _okay(self, payload: str | None = None) -> None:
+        data = b"OKAY"
+        if payload is not None:
+            body = payload.encode("utf-8")
+            data += b"%04x" % len(body) + body
+        self.request.sendall(data)
+
+    def _fail(self, message: str) -> None:
+        body = message.encode("utf-8")
+        self.request.sendall(b"FAIL" + b"%04x" % len(body) + body)
+
+    def handle(self):
+        server = self.server
+        try:
+            service = self._read_request()
+        except (ConnectionError, ValueError):
+            return
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        if service == "host:version":
+            self._okay("0029")
+        elif service == "host:devices":
+            self._okay(server.device_list())
+        elif service == "host:kill":
+            self._okay()
+            threading.Thread(target=server.kill, daemon=True).start()
+        elif service == "host:track-devices":
+            self._track_devices()
+        elif service.startswith("host:connect:"):
+            target = service[len("host:connect:"):]
+            if ":" not in target:
+                target += ":5555"
+            if target in server.devices:
+                self._okay(f"already connected to {target}")
+            else:
+                server.set_device(target, "unauthorized" if target in server.unauthorized else "device")
+                self._okay(f"connected to {target}")
+        elif service.startswith("host:disconnect:"):
+            target = service[len("host:disconnect:"):]
+            if not target:
+                for serial in list(server.devices):
+                    server.set_device(serial, None)
+                self._okay("disconnected everything")
+            elif target in server.devices:
+                server.set_device(target, None)
+                self._okay(f"disconnected {target}")
+            else:
+                self._fail(f"no such device '{target}'")
+        elif service.startswith("host:transport"):
+            self._transport(service)
+        else:
+            self._fail(f"unknown host service '{service}'")
+
+    def _track_devices(self):
+        server = self.server
+        self.request.sendall(b"OKAY")
+        seen = -1
+        while True:
+            with server.changed:
+                while server.version == seen and not server.killed:
+                    server.changed.wait()
+                if server.killed:
+                    return
+                seen = server.version
+                body = server.device_list().encode("utf-8")
+            try:
+                self.request.sendall(b"%04x" % len(body) + body)
+            except OSError:
+                return
+
+    def _transport(self, service: str):
+        server = self.server
+        if service == "host:transport-any":
+            ready = [s for s, state in server.devices.items() if state == "device"]
+            serial = ready[0] if ready else None
+            if serial is None:
+                self._fail("no devices/emulators found")
+                return
+        else:
+            serial = service[len("host:transport:"):]
+            state = server.devices.get(serial)
+            if state is None:
+                self._fail(f"device '{serial}' not found")
+                return
+            if state != "device":
+                self._fail(f"device {state}")
+                return
+        if server.inject_failure():
+            self._fail("device offline")
+            return
+        self._okay()
+        try:
+            inner = self._read_request()
+        except (ConnectionError, ValueError):
+            return
+        for prefix in ("exec:", "shell:"):
+            if inner.startswith(prefix):
+                self._okay()
+                self._run_shell(inner[len(prefix):], serial)
+                return
+        self._fail(f"unsupported service '{inner}'")
+
+    def _run_shell(self, command: str, serial: str):
+        interactive = command in ("", "sh")
+        env = dict(os.environ, FSR_FAKE_SERIAL=serial)
+        if interactive:
+            proc = subprocess.Popen(["sh", "-s"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT, env=env)
+            proc.stdin.write(DEVICE_PREAMBLE.encode("utf-8"))
+            proc.stdin.flush()
+        else:
+            # Like exec: on a stick, the command reads whatever the client sends.
+            proc = subprocess.Popen(["sh", "-c", DEVICE_PREAMBLE + command], stdin=subprocess.PIPE,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+
+        def pump_in():
+            writes = 0
+            try:
+                while True:
+                    chunk = self.request.recv(65536)
+                    if not chunk:
+                        break
+                    writes += 1
+                    if interactive and self.server.drop_every and writes % self.server.drop_every == 0:
+                        with self.server.lock:
+                            self.server.injected += 1
+                        proc.kill()
+                        break
+                    proc.stdin.write(chunk)
+                    proc.stdin.flush()
+            except (OSError, ValueError):
+                pass
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+        threading.Thread(target=pump_in, daemon=True).start()
+        try:
+            for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+                self.request.sendall(chunk)
+        except OSError:
+            proc.kill()
+        proc.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fake adb server for exercising FirestickRemote without a device.")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037)))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--device", action="append", default=[], help="serial to pre-register (repeatable)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of transports refused as offline")
+    parser.add_argument("--drop-every", type=int, default=0, help="cut interactive shells after N client writes")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeAdbServer(args.port, args.latency, args.device, fail_rate=args.fail_rate,
+                           drop_every=args.drop_every, seed=args.seed)
+    print(f"fake adb server listening on 127.0.0.1:{server.port}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import os
+import struct
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screen_mirror import Frame  # noqa: E402
+
+# Synthetic screens for the mirror: a solid background with a bar that moves
+# every frame, as raw RGBA (what screencap returns), PNG (screencap -p) or PPM
+# (what the capture sources hand to Tk). FakeFrameSource can stand in for a
+# real capture source.
+
+
+def _pixels(width: int, height: int, phase: int) -> list:
+    bar = (phase * 16) % width
+    rows = []
+    for y in range(height):
+        row = bytearray(b"\x10\x18\x30" * width)
+        lo, hi = bar * 3, min(bar + 32, width) * 3
+        row[lo:hi] = b"\xe5\xe7\xeb" * ((hi - lo) // 3)
+        rows.append(bytes(row))
+    return rows
+
+
+def make_screencap(width: int, height: int, phase: int = 0, fmt: int = 1, colorspace: bool = True) -> bytes:
+    # RGBA_8888 (1) or BGRA_8888 (5), with the Android 8+ colour space word by default.
+    header = struct.pack("<III", width, height, fmt) + (struct.pack("<I", 1) if colorspace else b"")
+    pixels = bytearray()
+    for row in _pixels(width, height, phase):
+        rgba = bytearray(width * 4)
+        r, g, b = (2, 1, 0) if fmt == 5 else (0, 1, 2)
+        rgba[r::4], rgba[g::4], rgba[b::4] = row[0::3], row[1::3], row[2::3]
+        rgba[3::4] = b"\xff" * width
+        pixels += rgba
+    return header + bytes(pixels)
+
+
+def _chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def make_png(width: int, height: int, phase: int = 0) -> bytes:
+    raw = b"".join(b"\x00" + row for row in _pixels(width, height, phase))
+    return (b"\x89PNG\r\n\x1a\n"
+            + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + _chunk(b"IDAT", zlib.compress(raw, 6))
+            + _chunk(b"IEND", b""))
+
+
+def make_ppm(width: int, height: int, phase: int = 0) -> bytes:
+    return b"P6\n%d %d\n255\n" % (width, height) + b"".join(_pixels(width, height, phase))
+
+
+class FakeFrameSource:
+    paced = False
+
+    def __init__(self, width: int = 512, height: int = 288, fps: float = 30.0):
+        self.width = width
+        self.height = height
+        self.interval = 1.0 / fps
+        self.phase = 0
+        self.closed = False
+
+    def read(self) -> Frame:
+        time.sleep(self.interval)
+        data = make_ppm(self.width, self.height, self.phase)
+        self.phase += 1
+        return Frame(data, "ppm", self.width, self.height)
+
+    def close(self) -> None:
+        self.closed = True
@@ -0,0 +1,110 @@
+import hashlib
+import http.server
+import json
+import threading
+import time
+from email.utils import formatdate
+
+# Stand-in for the GitHub release endpoints the updater talks to. Serves
+# /repos/<owner>/<repo>/releases/latest and asset files from memory with
+# ETag / If-None-Match (304), Range / If-Range (206) and Content-Length, and
+# can cut the connection after a number of body bytes to simulate a flaky
+# link or answer the next requests for a path with error statuses. Every
+# request is recorded, before the reply goes out, with the bytes it sent.
+
+
+class FakeReleaseServer:
+    def __init__(self, owner: str = "owner", repo: str = "repo"):
+        self.owner = owner
+        self.repo = repo
+        self.files = {}
+        self.release = {"tag_name": "v0", "assets": []}
+        self.drop_after = None
+        self.errors = {}
+        self.requests = []
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    @property
+    def release_url(self) -> str:
+        return self.url(f"/repos/{self.owner}/{self.repo}/releases/latest")
+
+    def add_asset(self, name: str, data: bytes) -> str:
+        self.files[f"/download/{name}"] = (data, '"' + hashlib.sha1(data).hexdigest() + '"')
+        self.release["assets"] = [a for a in self.release["assets"] if a["name"] != name]
+        self.release["assets"].append({"name": name, "browser_download_url": self.url(f"/download/{name}")})
+        return hashlib.sha256(data).hexdigest()
+
+    def fail(self, path: str, *codes: int) -> None:
+        # The next len(codes) requests for path get these statuses, in order.
+        self.errors.setdefault(path, []).extend(codes)
+
+    def start(self):
+        owner = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if owner.errors.get(self.path):
+                    self._reply(owner.errors[self.path].pop(0), b"", None)
+                    return
+                if self.path == f"/repos/{owner.owner}/{owner.repo}/releases/latest":
+                    data = json.dumps(owner.release).encode("utf-8")
+                    etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                elif self.path in owner.files:
+                    data, etag = owner.files[self.path]
+                else:
+                    self._reply(404, b"", None)
+                    return
+                if self.headers.get("If-None-Match") == etag:
+                    self._reply(304, b"", etag)
+                    return
+                start = 0
+                rng = self.headers.get("Range")
+                if rng and rng.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+                    start = int(rng[len("bytes="):].split("-")[0])
+                    if start >= len(data):
+                        self._reply(416, b"", etag)
+                        return
+                    self._reply(206, data[start:], etag, f"bytes {start}-{len(data) - 1}/{len(data)}")
+                    return
+                self._reply(200, data, etag)
+
+            def _reply(self, code, body, etag, content_range=None):
+                length = len(body)
+                limit = owner.drop_after
+                if limit is not None and code in (200, 206) and length > limit:
+                    owner.drop_after = None
+                    body = body[:limit]
+                    self.close_connection = True
+                owner.requests.append((self.path, code, len(body)))
+                self.send_response(code)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                if content_range:
+                    self.send_header("Content-Range", content_range)
+                self.send_header("Content-Length", str(length))
+                self.end_headers()
+                self.wfile.write(body)
+                self.wfile.flush()
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
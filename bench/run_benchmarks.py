@@ -0,0 +1,557 @@
+import argparse
+import functools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_adb_latency import _install_adb_shim  # noqa: E402
+from bench_bin_update import _bin_files, _release  # noqa: E402
+from fake_release_server import FakeReleaseServer  # noqa: E402
+
+# Repeatable throughput run of the command layer against the fake adb server
+# (started as its own process so its threads and `sh` children are not
+# counted as ours) and the fake adb executable on PATH. Every scenario runs
+# on N fake devices with the same seeded fault injection, and records keys
+# or calls per second, latency percentiles, the extra threads and child
+# processes it needed at peak, and resident memory.
+#
+#   run_adb_command   one adb process per key press, one thread per device
+#   sustained_keys    held keys through KeyEventQueue + shell sessions
+#   flaky_keys        the same with refused transports and dropped sessions
+#   sustained_keys_raw  held keys through the sendevent helper
+#   device_authorized tracker-backed lookups, then host:devices polling
+#   keep_alive_ping   keep-alive for many devices that refuse the stay-on
+#                     setting, pinging on a compressed interval
+#   keep_alive_settings  the same with devices that take the setting
+#   apply_bin_update  fresh zip install, then a one-file delta
+#
+# Results are written as JSON (--out); --compare OLD.json [NEW.json] prints
+# the change per metric and exits 1 when one regressed past --threshold.
+
+SERIAL_FORMAT = "192.168.1.{}:5555"
+SAMPLE_INTERVAL = 0.02
+DRAIN_TIMEOUT = 30.0
+
+# Compared metrics by suffix; everything else in a result is context.
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "_mb", "threads_peak", "processes_peak", "errors", "dropped")
+# Differences below these are run-to-run noise, whatever the percentage.
+NOISE_FLOOR = {"_ms": 0.5, "_mb": 2.0}
+
+
+def _serials(n: int):
+    return [SERIAL_FORMAT.format(50 + i) for i in range(n)]
+
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+class FakeServerProcess:
+    def __init__(self, serials, args, fail_rate: float = 0.0, drop_every: int = 0, settings_dir=None):
+        cmd = [sys.executable, os.path.join(ROOT, "bench", "fake_adb_server.py"), "--port", "0",
+               "--latency", str(args.latency), "--fail-rate", str(fail_rate),
+               "--drop-every", str(drop_every), "--seed", str(args.seed)]
+        for serial in serials:
+            cmd += ["--device", serial]
+        env = dict(os.environ, FSR_FAKE_INPUT_DELAY=str(args.input_delay))
+        env.pop("FSR_FAKE_SETTINGS_DIR", None)
+        if settings_dir:
+            env["FSR_FAKE_SETTINGS_DIR"] = settings_dir
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env)
+        line = self.proc.stderr.readline()
+        if "listening on" not in line:
+            self.stop()
+            raise RuntimeError(f"fake adb server did not start: {line.strip()}")
+        self.port = int(line.rsplit(":", 1)[1])
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def _child_processes(exclude) -> int:
+    me = str(os.getpid())
+    count = 0
+    try:
+        pids = os.listdir("/proc")
+    except OSError:
+        return 0
+    for pid in pids:
+        if not pid.isdigit() or int(pid) in exclude:
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        if stat.rsplit(")", 1)[1].split()[1] == me:
+            count += 1
+    return count
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+# Samples thread count, child processes and RSS while a scenario runs; peaks
+# are reported above the level at the start so scenarios compare on their own.
+class ResourceSampler:
+    def __init__(self, exclude_pids=()):
+        self.exclude = set(exclude_pids)
+        self._stop = threading.Event()
+        self._thread = None
+        self.base_threads = self.peak_threads = 0
+        self.base_procs = self.peak_procs = 0
+        self.base_rss = self.peak_rss = 0.0
+
+    def __enter__(self):
+        self.base_threads = self.peak_threads = threading.active_count()
+        self.base_procs = self.peak_procs = _child_processes(self.exclude)
+        self.base_rss = self.peak_rss = _rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        # The sampler's own thread is not part of the scenario.
+        self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+        self.peak_procs = max(self.peak_procs, _child_processes(self.exclude))
+        self.peak_rss = max(self.peak_rss, _rss_mb())
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    def result(self) -> dict:
+        return {
+            "threads_peak": self.peak_threads - self.base_threads,
+            "processes_peak": self.peak_procs - self.base_procs,
+            "rss_peak_mb": round(self.peak_rss, 1),
+            "rss_growth_mb": round(_rss_mb() - self.base_rss, 1),
+        }
+
+
+def _latency(stats, action: str) -> dict:
+    result = {}
+    for row in stats.rows("action"):
+        if row["action"] != action:
+            continue
+        if row["stage"] == "total":
+            result.update({"p50_ms": row["p50"], "p95_ms": row["p95"], "p99_ms": row["p99"]})
+        else:
+            result[f"{row['stage']}_p50_ms"] = row["p50"]
+    return result
+
+
+def _use_server(server: FakeServerProcess) -> None:
+    import adb_commands as remote
+    remote.close_shell_session()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+    remote.adb_client.port = server.port
+
+
+def bench_run_adb_command(args, serials) -> dict:
+    import adb_commands as remote
+    from latency import LatencyStats, TimedAction
+
+    stats = LatencyStats()
+    counts = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def press(serial):
+        while time.perf_counter() < deadline:
+            with TimedAction(serial, "run_adb_command", stats=stats) as timed:
+                ok, _, _ = remote.run_adb_command(["-s", serial, "shell", "input", "keyevent", "20"])
+                timed.ok = ok
+            with lock:
+                counts["ok" if ok else "errors"] += 1
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=press, args=(s,)) for s in serials]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return dict({"keys_per_sec": round(counts["ok"] / elapsed, 1), "errors": counts["errors"]},
+                **_latency(stats, "run_adb_command"))
+
+
+def bench_keys(args, serials, raw: bool = False) -> dict:
+    import adb_commands as remote
+    from key_inject import RawKeyInjector
+    from latency import latency_stats
+
+    class CountingQueue(remote.KeyEventQueue):
+        def _inject(self, keycodes):
+            n, error = super()._inject(keycodes)
+            with lock:
+                # Keys lost with the helper connection are not known to have landed.
+                counts["failed" if error else "delivered"] += n
+            return n, error
+
+        def _send(self, keycodes) -> bool:
+            ok = super()._send(keycodes)
+            if ok:
+                with lock:
+                    counts["delivered"] += len(keycodes)
+            return ok
+
+    def on_error(message, keycodes):
+        with lock:
+            counts["failed"] += len(keycodes)
+
+    latency_stats.reset()
+    lock = threading.Lock()
+    counts = {"pushed": 0, "delivered": 0, "failed": 0}
+    executor = remote.ActionExecutor()
+    queues = [CountingQueue(s, executor, on_error=on_error, injector=RawKeyInjector(s) if raw else None)
+              for s in serials]
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.duration
+
+    def hold(q):
+        next_press = time.perf_counter()
+        while next_press < deadline:
+            q.push(20)
+            with lock:
+                counts["pushed"] += 1
+            next_press += interval
+            time.sleep(max(0.0, next_press - time.perf_counter()))
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=hold, args=(q,)) for q in queues]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    drain_deadline = time.perf_counter() + DRAIN_TIMEOUT
+    while time.perf_counter() < drain_deadline:
+        with lock:
+            done = counts["delivered"] + counts["failed"] + sum(q.dropped for q in queues)
+        if done >= counts["pushed"]:
+            break
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - t0
+    for q in queues:
+        q.stop()
+    executor.shutdown()
+    remote.close_shell_session()
+    return dict({
+        "keys_per_sec": round(counts["delivered"] / elapsed, 1),
+        "keys_pushed": counts["pushed"],
+        "errors": counts["failed"],
+        "dropped": sum(q.dropped for q in queues),
+    }, **_latency(latency_stats, "key_raw" if raw else "key"))
+
+
+def bench_device_authorized(args, serials) -> dict:
+    import adb_commands as remote
+    from latency import LatencyStats, TimedAction
+
+    stats = LatencyStats()
+    tracker = remote.device_tracker
+    result = {}
+
+    def measure(name):
+        calls = wrong = 0
+        deadline = time.perf_counter() + args.duration / 2
+        t0 = time.perf_counter()
+        while time.perf_counter() < deadline:
+            serial = serials[calls % len(serials)]
+            with TimedAction(serial, name, stats=stats):
+                if not remote.device_authorized(serial):
+                    wrong += 1
+            calls += 1
+        result[f"{name}_calls_per_sec"] = round(calls / (time.perf_counter() - t0), 1)
+        result[f"{name}_errors"] = wrong
+        for key, value in _latency(stats, name).items():
+            result[f"{name}_{key}"] = value
+
+    tracker.start()
+    end = time.monotonic() + 5
+    while not tracker.connected and time.monotonic() < end:
+        time.sleep(0.01)
+    measure("push")
+    tracker.stop()
+    if tracker._thread is not None:
+        tracker._thread.join(5)
+    measure("poll")
+    return result
+
+
+def bench_keep_alive(args, serials) -> dict:
+    import adb_commands as remote
+    from keep_alive import KeepAlive, TimerWheel
+
+    # The 45 s ping interval is compressed to --keep-alive-tick.
+    executor = remote.ActionExecutor()
+    tick = args.keep_alive_tick
+    keeper = KeepAlive(executor, TimerWheel(tick / 4), interval=tick, check_interval=tick * 10)
+    t0 = time.perf_counter()
+    for serial in serials:
+        keeper.add(serial)
+    deadline = time.perf_counter() + DRAIN_TIMEOUT
+    while "setup" in keeper.modes().values() and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    setup_ms = (time.perf_counter() - t0) * 1000
+    pings = keeper.pings
+    time.sleep(args.duration)
+    pings = keeper.pings - pings
+    modes = list(keeper.modes().values())
+    keeper.stop()
+    t1 = time.perf_counter()
+    restored = sum(keeper.restore(serial) for serial in serials)
+    restore_ms = (time.perf_counter() - t1) * 1000
+    executor.shutdown()
+    return {
+        "pings_per_sec": round(pings / args.duration, 1),
+        "setup_all_ms": round(setup_ms, 1),
+        "restore_all_ms": round(restore_ms, 1),
+        "by_setting": modes.count("settings"),
+        "by_ping": modes.count("ping"),
+        "errors": len(serials) - restored,
+    }
+
+
+def bench_inventory(args, serials) -> dict:
+    from inventory import DeviceInventory
+    from latency import LatencyStats, TimedAction
+
+    # A cold fetch per device, then repeated reads (each one probing the
+    # package stamp) and launches served from the cache.
+    stats = LatencyStats()
+    inventory = DeviceInventory(probe_interval=0)
+    errors = 0
+    for serial in serials:
+        with TimedAction(serial, "inventory", stats=stats) as timed:
+            timed.ok, _, _ = inventory.get(serial)
+        errors += not timed.ok
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        for serial in serials:
+            with TimedAction(serial, "inventory_cached", stats=stats) as timed:
+                timed.ok, _, _ = inventory.get(serial)
+            with TimedAction(serial, "launch", stats=stats) as timed:
+                timed.ok, _, _ = inventory.launch(serial, "org.xbmc.kodi")
+            errors += not timed.ok
+    return {
+        "fetch_p50_ms": _latency(stats, "inventory").get("p50_ms", 0.0),
+        "cached_p50_ms": _latency(stats, "inventory_cached").get("p50_ms", 0.0),
+        "launch_p50_ms": _latency(stats, "launch").get("p50_ms", 0.0),
+        "launch_p95_ms": _latency(stats, "launch").get("p95_ms", 0.0),
+        "fetches": inventory.fetches,
+        "errors": errors,
+    }
+
+
+def bench_apply_bin_update(args, serials) -> dict:
+    import FirestickRemote as app
+    from downloads import DownloadManager
+
+    work = tempfile.mkdtemp(prefix="fsr_bench_bin_")
+    bin_dir = os.path.join(work, "bin")
+    manager = DownloadManager(os.path.join(work, "cache"))
+    saved = app.update_downloads, app.run_adb_command
+    app.update_downloads = manager
+    app.run_adb_command = lambda cmd_args: (True, "", "")
+    server = FakeReleaseServer().start()
+    result = {}
+    try:
+        dll = os.urandom(int(args.dll_mb * 1024 * 1024))
+        for name, files, per_file in (("fresh", _bin_files("1.0.0", b"MZ adb 1" * 1000, dll), False),
+                                      ("delta", _bin_files("1.1.0", b"MZ adb 2" * 1000, dll), True)):
+            manifest = _release(server, files, files["bin_version.txt"].decode("ascii"), per_file)
+            before = manager.bytes_downloaded
+            t0 = time.perf_counter()
+            changed = app.apply_bin_update(server.release, manifest, bin_dir)
+            result[f"{name}_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            result[f"{name}_bytes"] = manager.bytes_downloaded - before
+            result[f"{name}_files"] = len(changed)
+    finally:
+        app.update_downloads, app.run_adb_command = saved
+        server.stop()
+        shutil.rmtree(work, ignore_errors=True)
+    return result
+
+
+# name -> (function, fake device setup): "faults" injects failures, "settings"
+# lets the fake devices store settings, "many" uses --keep-alive-devices.
+SCENARIOS = {
+    "run_adb_command": (bench_run_adb_command, ()),
+    "sustained_keys": (bench_keys, ()),
+    "flaky_keys": (bench_keys, ("faults",)),
+    "sustained_keys_raw": (functools.partial(bench_keys, raw=True), ()),
+    "device_authorized": (bench_device_authorized, ()),
+    "keep_alive_ping": (bench_keep_alive, ("many",)),
+    "keep_alive_settings": (bench_keep_alive, ("many", "settings")),
+    "inventory": (bench_inventory, ()),
+    "apply_bin_update": (bench_apply_bin_update, ()),
+}
+
+
+def run(args) -> dict:
+    import adb_commands as remote
+    import key_inject
+    remote.LOG_COMMANDS = False
+    shim_dir = tempfile.mkdtemp(prefix="fsr_adb_shim_")
+    _install_adb_shim(shim_dir)
+    # The fake devices' filesystem is this machine's.
+    key_inject.HELPER_PATH = os.path.join(shim_dir, "fsr_keys.sh")
+    os.environ["FSR_FAKE_ADB_DELAY"] = str(args.adb_delay)
+    os.environ["FSR_FAKE_ADB_FAIL_RATE"] = "0"
+
+    settings_dir = os.path.join(shim_dir, "settings")
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    results = {}
+    try:
+        for name in names:
+            fn, setup = SCENARIOS[name]
+            serials = _serials(args.keep_alive_devices if "many" in setup else args.devices)
+            if "faults" in setup:
+                server = FakeServerProcess(serials, args, args.fail_rate, args.drop_every)
+                os.environ["FSR_FAKE_ADB_FAIL_RATE"] = str(args.fail_rate)
+            else:
+                shutil.rmtree(settings_dir, ignore_errors=True)
+                server = FakeServerProcess(serials, args, settings_dir="settings" in setup and settings_dir)
+            try:
+                _use_server(server)
+                with ResourceSampler([server.proc.pid]) as sampler:
+                    metrics = fn(args, serials)
+                metrics.update(sampler.result())
+            finally:
+                os.environ["FSR_FAKE_ADB_FAIL_RATE"] = "0"
+                remote.close_shell_session()
+                server.stop()
+            results[name] = metrics
+            print(f"{name:<20}" + "  ".join(f"{k}={v}" for k, v in metrics.items()), file=sys.stderr)
+    finally:
+        shutil.rmtree(shim_dir, ignore_errors=True)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("only", "out", "compare", "threshold")}
+    return {
+        "meta": {
+            "rev": _git_rev(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "scenarios": results,
+    }
+
+
+def _direction(metric: str) -> int:
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    if old.get("config") != new.get("config"):
+        print("warning: the two runs used different settings; compare with care", file=sys.stderr)
+    print(f"{old['meta']['rev']} -> {new['meta']['rev']}")
+    print(f"{'metric':<46}{'old':>12}{'new':>12}{'change':>11}")
+    regressions = 0
+    for scenario, metrics in new["scenarios"].items():
+        before = old["scenarios"].get(scenario, {})
+        for metric, value in metrics.items():
+            direction = _direction(metric)
+            if not direction or metric not in before:
+                continue
+            base = before[metric]
+            if base:
+                change = (value - base) / abs(base) * 100
+            else:
+                change = 0.0 if value == base else 100.0
+            floor = next((v for suffix, v in NOISE_FLOOR.items() if metric.endswith(suffix)), 0)
+            worse = change * direction < -threshold and abs(value - base) > floor
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"{scenario + '.' + metric:<46}{base:>12}{value:>12}{change:>+10.1f}%{flag}")
+    print(f"{regressions} regression(s) beyond {threshold}%")
+    return 1 if regressions else 0
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Command layer benchmarks against fake adb, saved as JSON.")
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--rate", type=float, default=20.0, help="key presses per second per device (held key)")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency per request (s)")
+    parser.add_argument("--input-delay", type=float, default=0.005, help="seconds the fake `input` takes")
+    parser.add_argument("--adb-delay", type=float, default=0.0, help="extra start-up per fake adb process (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="refused transports in flaky_keys")
+    parser.add_argument("--drop-every", type=int, default=50, help="cut shell sessions in flaky_keys")
+    parser.add_argument("--keep-alive-tick", type=float, default=0.1, help="keep-alive ping interval (s)")
+    parser.add_argument("--keep-alive-devices", type=int, default=32)
+    parser.add_argument("--dll-mb", type=float, default=4.0, help="size of the fake AdbWinApi.dll")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help="comma-separated scenarios: " + ",".join(SCENARIOS))
+    parser.add_argument("--out", help="write results here (default bench/results/bench_results_<rev>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="OLD [NEW]: compare two result files, or OLD against this run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        return compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold)
+
+    results = run(args)
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"bench_results_{results['meta']['rev']}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {out}", file=sys.stderr)
+    if args.compare:
+        return compare(_load(args.compare[0]), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import shutil
+import time
+import zipfile
+
+from downloads import sha256_file
+
+# Delta updates for the bin folder. The manifest lists each managed file with
+# its SHA-256; only files whose local hash differs are fetched. The new bin is
+# assembled in a staging folder next to the live one (unchanged files are
+# hard-linked, so staging costs no copies), swapped in with two renames and
+# swapped back if the new bin_version.txt does not validate. Files in bin that
+# the manifest does not list (e.g. the adb key) are carried over untouched.
+
+BIN_VERSION_FILE = "bin_version.txt"
+
+# Windows keeps adb.exe locked for a moment after its server exits.
+BIN_SWAP_ATTEMPTS = 10
+BIN_SWAP_RETRY_DELAY = 0.2
+
+
+class BinUpdateError(RuntimeError):
+    pass
+
+
+def safe_member_name(name: str) -> str | None:
+    name = name.replace("\\", "/")
+    if not name or name.endswith("/") or name.startswith("/") or ".." in name.split("/"):
+        return None
+    return name
+
+
+def manifest_bin_files(manifest: dict) -> dict:
+    # "bin_files": {"adb.exe": "<sha256>"} or {"adb.exe": {"sha256": ..., "asset": ...}}
+    files = {}
+    for name, entry in (manifest.get("bin_files") or {}).items():
+        name = safe_member_name(name)
+        if name is None:
+            continue
+        if isinstance(entry, str):
+            entry = {"sha256": entry}
+        files[name] = {"sha256": str(entry.get("sha256", "")).lower(), "asset": entry.get("asset")}
+    return files
+
+
+def zip_bin_files(zip_path: str) -> dict:
+    files = {}
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for member in z.infolist():
+            name = safe_member_name(member.filename)
+            if name is None:
+                continue
+            digest = hashlib.sha256()
+            with z.open(member, "r") as src:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            files[name] = {"sha256": digest.hexdigest(), "asset": None}
+    return files
+
+
+def extract_zip_member(zip_path: str, name: str, dest_path: str) -> None:
+    with zipfile.ZipFile(zip_path, "r") as z:
+        for member in z.infolist():
+            if safe_member_name(member.filename) == name:
+                with z.open(member, "r") as src, open(dest_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                return
+    raise BinUpdateError(f"{name} is not in the bin update zip.")
+
+
+# Where the new bin files come from for one release: each listed file's own
+# asset when it has one, otherwise the bin zip (downloaded at most once).
+# resolve(asset_name) returns the asset's URL or None.
+class BinReleaseSource:
+    def __init__(self, manifest: dict, resolve, downloads):
+        self.bin_name = manifest.get("bin_asset", "bin_update.zip")
+        self.bin_sha256 = manifest.get("bin_sha256")
+        self.resolve = resolve
+        self.downloads = downloads
+        self._manifest_files = manifest_bin_files(manifest)
+        self._files = None
+        self._zip_path = None
+
+    def _zip(self) -> str:
+        if self._zip_path is None:
+            url = self.resolve(self.bin_name)
+            if not url:
+                raise BinUpdateError(f"The release has no {self.bin_name} asset.")
+            self._zip_path = self.downloads.fetch(url, self.bin_sha256)
+        return self._zip_path
+
+    def files(self) -> dict:
+        if self._files is None:
+            self._files = self._manifest_files or zip_bin_files(self._zip())
+        return self._files
+
+    def _asset_url(self, name: str) -> str | None:
+        asset = self.files()[name]["asset"]
+        return self.resolve(asset) if asset else None
+
+    def fetch(self, name: str, dest_path: str) -> None:
+        url = self._asset_url(name)
+        if url:
+            shutil.copyfile(self.downloads.fetch(url, self.files()[name]["sha256"]), dest_path)
+        else:
+            extract_zip_member(self._zip(), name, dest_path)
+
+    def prefetch(self, bin_dir: str):
+        # Pulls everything a later apply_bin_delta() will need into the cache.
+        changed = changed_files(bin_dir, self.files())
+        for name in changed:
+            url = self._asset_url(name)
+            if url:
+                self.downloads.fetch(url, self.files()[name]["sha256"])
+            else:
+                self._zip()
+        return changed
+
+
+def changed_files(bin_dir: str, files: dict):
+    changed = []
+    for name, entry in files.items():
+        path = os.path.join(bin_dir, name)
+        if not os.path.isfile(path) or sha256_file(path) != entry["sha256"]:
+            changed.append(name)
+    return changed
+
+
+def _link_tree(src: str, dst: str) -> None:
+    for root, dirs, names in os.walk(src):
+        rel = os.path.relpath(root, src)
+        os.makedirs(os.path.join(dst, rel), exist_ok=True)
+        for name in names:
+            source = os.path.join(root, name)
+            target = os.path.join(dst, rel, name)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+
+def _remove_tree(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _replace_with_retry(src: str, dst: str) -> None:
+    for attempt in range(BIN_SWAP_ATTEMPTS):
+        try:
+            os.replace(src, dst)
+            return
+        except OSError:
+            if attempt == BIN_SWAP_ATTEMPTS - 1:
+                raise
+            time.sleep(BIN_SWAP_RETRY_DELAY)
+
+
+def apply_bin_delta(bin_dir: str, files: dict, fetch, validate, before_swap=None):
+    # fetch(name, dest_path) writes the new content of one file; validate(bin_dir)
+    # raises if the swapped-in folder is not usable; before_swap() runs once the
+    # staging folder is complete. Returns the changed names.
+    changed = changed_files(bin_dir, files)
+    if not changed:
+        validate(bin_dir)
+        return changed
+
+    bin_dir = os.path.abspath(bin_dir)
+    staging = bin_dir + ".staging"
+    backup = bin_dir + ".old"
+    _remove_tree(staging)
+    _remove_tree(backup)
+    if os.path.isdir(bin_dir):
+        _link_tree(bin_dir, staging)
+    else:
+        os.makedirs(staging)
+
+    try:
+        for name in changed:
+            target = os.path.join(staging, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = target + ".new"
+            fetch(name, tmp)
+            digest = sha256_file(tmp)
+            if digest != files[name]["sha256"]:
+                raise BinUpdateError(f"Checksum mismatch for {name}\n\nexpected {files[name]['sha256']}\ngot {digest}")
+            # Replace rather than rewrite: the staged file may be a hard link to the live one.
+            os.replace(tmp, target)
+    except BaseException:
+        _remove_tree(staging)
+        raise
+
+    if before_swap is not None:
+        before_swap()
+    had_bin = os.path.isdir(bin_dir)
+    moved = False
+    try:
+        if had_bin:
+            _replace_with_retry(bin_dir, backup)
+            moved = True
+        os.replace(staging, bin_dir)
+    except OSError as e:
+        if moved:
+            os.replace(backup, bin_dir)
+        _remove_tree(staging)
+        raise BinUpdateError(f"Could not swap in the new bin, previous bin kept.\n\n{e}")
+
+    try:
+        validate(bin_dir)
+    except Exception as e:
+        _remove_tree(staging)
+        os.replace(bin_dir, staging)
+        if had_bin:
+            os.replace(backup, bin_dir)
+        _remove_tree(staging)
+        raise BinUpdateError(f"New bin failed validation, previous bin restored.\n\n{e}")
+    _remove_tree(backup)
+    return changed
@@ -0,0 +1,264 @@
+import collections
+import threading
+import tkinter as tk
+
+# Output console for manual commands. ConsoleBuffer keeps a fixed number of
+# lines (trimmed in bulk once the slack is used up) plus a trigram index, so
+# a filter only looks at lines that can match. ConsoleView mirrors the buffer
+# into a Text widget once per frame, whatever the append rate, and shows each
+# command as a block whose output can be collapsed under its header.
+
+CONSOLE_MAX_LINES = 5000
+CONSOLE_TRIM_SLACK = 500
+CONSOLE_REFRESH_MS = 50
+
+
+def _trigrams(text: str):
+    lowered = text.lower()
+    return {lowered[i:i + 3] for i in range(len(lowered) - 2)}
+
+
+class ConsoleBlock:
+    def __init__(self, block_id: int, title: str, first_seq: int):
+        self.id = block_id
+        self.title = title
+        self.first_seq = first_seq
+        self.last_seq = first_seq
+        self.collapsed = False
+
+
+class ConsoleBuffer:
+    def __init__(self, max_lines: int = CONSOLE_MAX_LINES, trim_slack: int = CONSOLE_TRIM_SLACK,
+                 indexed: bool = True):
+        self.max_lines = max_lines
+        self.trim_slack = trim_slack
+        self.indexed = indexed
+        self.first_seq = 0
+        self.next_seq = 0
+        self.blocks = collections.OrderedDict()
+        self._lines = collections.deque()
+        self._index = {}
+        self._next_block = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lines)
+
+    def begin_block(self, title: str) -> int:
+        with self._lock:
+            block = ConsoleBlock(self._next_block, title, self.next_seq)
+            self._next_block += 1
+            self.blocks[block.id] = block
+            self._add(title, block.id, "header")
+            self._trim()
+            return block.id
+
+    def append(self, text: str, block_id: int | None = None, kind: str | None = None) -> None:
+        with self._lock:
+            block = self.blocks.get(block_id)
+            if block is None:
+                block_id = None
+            for line in text.split("\n"):
+                self._add(line, block_id, kind)
+                if block is not None:
+                    block.last_seq = self.next_seq - 1
+            self._trim()
+
+    def _add(self, line: str, block_id, kind) -> None:
+        seq = self.next_seq
+        self.next_seq += 1
+        self._lines.append((seq, block_id, kind, line))
+        if not self.indexed:
+            return
+        for gram in _trigrams(line):
+            postings = self._index.get(gram)
+            if postings is None:
+                postings = self._index[gram] = collections.deque()
+            postings.append(seq)
+
+    def _trim(self) -> None:
+        if len(self._lines) <= self.max_lines + self.trim_slack:
+            return
+        for _ in range(len(self._lines) - self.max_lines):
+            seq, _, _, line = self._lines.popleft()
+            if not self.indexed:
+                continue
+            for gram in _trigrams(line):
+                postings = self._index[gram]
+                postings.popleft()
+                if not postings:
+                    del self._index[gram]
+        self.first_seq = self._lines[0][0]
+        while self.blocks:
+            block = next(iter(self.blocks.values()))
+            if block.last_seq >= self.first_seq:
+                break
+            self.blocks.popitem(last=False)
+
+    def lines_since(self, seq: int):
+        # Returns (first_seq, entries) as of one moment, so the view can tell
+        # which of the lines it already shows have been trimmed meanwhile.
+        with self._lock:
+            start = max(seq, self.first_seq) - self.first_seq
+            return self.first_seq, [self._lines[i] for i in range(start, len(self._lines))]
+
+    def search(self, query: str):
+        needle = query.lower()
+        with self._lock:
+            grams = _trigrams(needle) if self.indexed else None
+            if not grams:
+                candidates = [entry[0] for entry in self._lines]
+            else:
+                postings = [self._index.get(g) for g in grams]
+                if not all(postings):
+                    return []
+                smallest = min(postings, key=len)
+                candidates = [seq for seq in smallest if seq >= self.first_seq]
+            matches = []
+            for seq in candidates:
+                entry = self._lines[seq - self.first_seq]
+                if needle in entry[3].lower():
+                    matches.append(entry)
+            return matches
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lines.clear()
+            self._index.clear()
+            self.blocks.clear()
+            self.first_seq = self.next_seq
+
+
+class ConsoleView:
+    def __init__(self, parent, buffer: ConsoleBuffer | None = None, refresh_ms: int = CONSOLE_REFRESH_MS, **options):
+        self.buffer = buffer or ConsoleBuffer()
+        self.refresh_ms = refresh_ms
+        self.text = tk.Text(parent, wrap="word", **options)
+        self.text.configure(state="disabled")
+        self.text.tag_configure("header", foreground="#38bdf8")
+        self.text.tag_configure("ok", foreground="#4ade80")
+        self.text.tag_configure("warn", foreground="#facc15")
+        self.text.tag_configure("error", foreground="#f87171")
+        self.text.tag_bind("header", "<Button-1>", self._on_header_click)
+        self.text.tag_bind("header", "<Enter>", lambda e: self.text.configure(cursor="hand2"))
+        self.text.tag_bind("header", "<Leave>", lambda e: self.text.configure(cursor=""))
+        self.query = ""
+        self.snapshot = False
+        self._drawn_first = 0
+        self._drawn_next = 0
+        self._scheduled = False
+
+    def grid(self, **kwargs):
+        self.text.grid(**kwargs)
+
+    def begin_block(self, title: str) -> int:
+        block_id = self.buffer.begin_block(title)
+        self._schedule()
+        return block_id
+
+    def append(self, text: str, block_id: int | None = None, kind: str | None = None) -> None:
+        # Safe from worker threads; drawing happens on the next frame.
+        self.buffer.append(text, block_id, kind)
+        self._schedule()
+
+    def _schedule(self):
+        if not self._scheduled:
+            self._scheduled = True
+            self.text.after(self.refresh_ms, self._flush)
+
+    def _line_tags(self, block_id, kind):
+        tags = []
+        if block_id is not None:
+            tags.append(f"block{block_id}" if kind == "header" else f"body{block_id}")
+        if kind:
+            tags.append(kind)
+        return tuple(tags)
+
+    def _header_text(self, block_id, title):
+        block = self.buffer.blocks.get(block_id)
+        return ("▶ " if block is not None and block.collapsed else "▼ ") + title
+
+    def _insert(self, entries):
+        chunks = []
+        for _, block_id, kind, line in entries:
+            if kind == "header":
+                line = self._header_text(block_id, line)
+            chunks.append(line + "\n")
+            chunks.append(self._line_tags(block_id, kind))
+        if chunks:
+            self.text.insert("end", *chunks)
+
+    def _flush(self):
+        self._scheduled = False
+        if self.snapshot:
+            return
+        first_seq, entries = self.buffer.lines_since(self._drawn_next)
+        if not entries:
+            return
+        at_end = self.text.yview()[1] >= 0.999
+        self.text.configure(state="normal")
+        if not self.query:
+            trimmed = min(first_seq, self._drawn_next) - self._drawn_first
+            if trimmed > 0:
+                self.text.delete("1.0", f"{trimmed + 1}.0")
+            self._drawn_first = first_seq
+        self._drawn_next = entries[-1][0] + 1
+        if self.query:
+            entries = [e for e in entries if self.query in e[3].lower()]
+        self._insert(entries)
+        if self.query:
+            excess = int(self.text.index("end-1c").split(".")[0]) - self.buffer.max_lines
+            if excess > 0:
+                self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.configure(state="disabled")
+        if at_end:
+            self.text.see("end")
+
+    def show_snapshot(self, lines, kinds=None) -> None:
+        # Replaces the live tail with fixed lines (e.g. search results) until
+        # set_filter() is called again.
+        self.snapshot = True
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self._insert([(None, None, kinds[i] if kinds else None, line) for i, line in enumerate(lines)])
+        self.text.configure(state="disabled")
+        self.text.see("end")
+
+    def set_filter(self, query: str) -> None:
+        self.query = (query or "").strip().lower()
+        self.snapshot = False
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        first_seq, entries = self.buffer.lines_since(0)
+        self._drawn_first = first_seq
+        self._drawn_next = entries[-1][0] + 1 if entries else first_seq
+        if self.query:
+            entries = [e for e in self.buffer.search(self.query) if e[0] < self._drawn_next]
+        self._insert(entries)
+        self.text.configure(state="disabled")
+        self.text.see("end")
+
+    def clear(self) -> None:
+        self.buffer.clear()
+        self.set_filter(self.query)
+
+    def _on_header_click(self, event):
+        index = self.text.index(f"@{event.x},{event.y}")
+        for tag in self.text.tag_names(index):
+            if tag.startswith("block"):
+                self.toggle_block(int(tag[len("block"):]))
+                return
+
+    def toggle_block(self, block_id: int) -> None:
+        block = self.buffer.blocks.get(block_id)
+        if block is None:
+            return
+        block.collapsed = not block.collapsed
+        self.text.tag_configure(f"body{block_id}", elide=block.collapsed)
+        ranges = self.text.tag_ranges(f"block{block_id}")
+        if ranges:
+            start = ranges[0]
+            self.text.configure(state="normal")
+            self.text.delete(start, f"{start}+1c")
+            self.text.insert(start, "▶" if block.collapsed else "▼", self._line_tags(block_id, "header"))
+            self.text.configure(state="disabled")
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Updater downloads. Assets are fetched into an on-disk cache keyed by their
+# SHA-256: an interrupted download keeps its .part file and resumes with an
+# HTTP Range request (guarded by If-Range so a changed file restarts), and a
+# finished one is verified against the manifest digest before it is used.
+# JSON lookups (release info, manifest) are cached with their ETag and
+# revalidated with If-None-Match, so an unchanged release costs a 304; given
+# a max_age, a recent enough cached copy is used without asking at all.
+
+USER_AGENT = "FirestickRemoteUpdater/1.0"
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_CHUNK = 64 * 1024
+CACHE_MAX_BYTES = 300 * 1024 * 1024
+
+# HTTPError is a URLError too; only these HTTP statuses are worth retrying.
+RETRYABLE_ERRORS = (urllib.error.URLError, socket.timeout, ConnectionError, TimeoutError)
+RETRYABLE_HTTP_CODES = (429,)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in RETRYABLE_HTTP_CODES
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+def default_cache_dir() -> str:
+    root = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(root, "FirestickRemote", "cache")
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class DownloadManager:
+    def __init__(self, cache_dir: str | None = None, timeout: float = DOWNLOAD_TIMEOUT,
+                 retries: int = DOWNLOAD_RETRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.timeout = timeout
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.bytes_downloaded = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.fresh_hits = 0
+        self._lock = threading.Lock()
+
+    def _path(self, *parts) -> str:
+        path = os.path.join(self.cache_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _open(self, url: str, headers: dict):
+        req = urllib.request.Request(url)
+        req.add_header("User-Agent", USER_AGENT)
+        for key, value in headers.items():
+            req.add_header(key, value)
+        return urllib.request.urlopen(req, timeout=self.timeout)
+
+    def _load_json_record(self, url: str):
+        try:
+            with open(os.path.join(self.cache_dir, "http", _url_key(url) + ".json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_json_record(self, url: str, record: dict) -> None:
+        meta_path = self._path("http", _url_key(url) + ".json")
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, meta_path)
+
+    def cached_json(self, url: str):
+        cached = self._load_json_record(url)
+        return cached["body"] if cached is not None else None
+
+    def get_json(self, url: str, headers: dict | None = None, max_age: float | None = None):
+        cached = self._load_json_record(url)
+        if cached is not None and max_age is not None and time.time() - cached.get("fetched_at", 0) < max_age:
+            self.fresh_hits += 1
+            return cached["body"]
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            with self._open(url, request_headers) as resp:
+                body = resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                self.not_modified += 1
+                cached["fetched_at"] = time.time()
+                self._store_json_record(url, cached)
+                return cached["body"]
+            raise
+        self.bytes_downloaded += len(body)
+        data = json.loads(body.decode("utf-8", errors="replace"))
+        self._store_json_record(url, {"url": url, "etag": etag, "last_modified": last_modified,
+                                      "fetched_at": time.time(), "body": data})
+        return data
+
+    def fetch(self, url: str, sha256: str | None = None, on_progress=None) -> str:
+        sha256 = (sha256 or "").strip().lower() or None
+        if sha256:
+            blob = os.path.join(self.cache_dir, "blobs", sha256)
+            if os.path.exists(blob):
+                if sha256_file(blob) == sha256:
+                    self.cache_hits += 1
+                    os.utime(blob)
+                    return blob
+                os.remove(blob)
+
+        with self._lock:
+            part = self._path("partial", (sha256 or _url_key(url)) + ".part")
+            attempt = 0
+            while True:
+                try:
+                    self._download(url, part, on_progress)
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if not is_retryable(e):
+                        raise DownloadError(f"Download failed: HTTP {e.code} {e.reason} for {url}")
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise DownloadError(f"Download failed after {attempt} attempts: {e}")
+                    time.sleep(min(2 ** (attempt - 1), 8))
+
+            digest = sha256_file(part)
+            if sha256 and digest != sha256:
+                self._discard(part)
+                self._discard(part + ".json")
+                raise DownloadError(f"Checksum mismatch for {url}\n\nexpected {sha256}\ngot {digest}")
+            blob = self._path("blobs", digest)
+            os.replace(part, blob)
+            self._discard(part + ".json")
+        self.prune()
+        return blob
+
+    def _download(self, url: str, part: str, on_progress) -> None:
+        meta_path = part + ".json"
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = None
+        if have:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta.get("url") == url:
+                    validator = meta.get("etag") or meta.get("last_modified")
+            except (OSError, ValueError):
+                pass
+            if not validator:
+                have = 0
+
+        headers = {}
+        if have:
+            headers["Range"] = f"bytes={have}-"
+            headers["If-Range"] = validator
+        try:
+            resp = self._open(url, headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and have:
+                return
+            raise
+
+        with resp:
+            if resp.status == 206:
+                mode = "ab"
+            else:
+                mode, have = "wb", 0
+            total = resp.headers.get("Content-Length")
+            total = have + int(total) if total is not None else None
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": resp.headers.get("ETag"),
+                           "last_modified": resp.headers.get("Last-Modified")}, f)
+            with open(part, mode) as f:
+                while True:
+                    chunk = resp.read(DOWNLOAD_CHUNK)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    have += len(chunk)
+                    self.bytes_downloaded += len(chunk)
+                    if on_progress is not None:
+                        on_progress(have, total)
+        if total is not None and have < total:
+            raise ConnectionError(f"connection closed at {have} of {total} bytes")
+
+    def _discard(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def prune(self) -> None:
+        blobs_dir = os.path.join(self.cache_dir, "blobs")
+        try:
+            blobs = [os.path.join(blobs_dir, n) for n in os.listdir(blobs_dir)]
+        except OSError:
+            return
+        blobs.sort(key=os.path.getmtime, reverse=True)
+        total = 0
+        for path in blobs:
+            total += os.path.getsize(path)
+            if total > self.max_bytes and path is not blobs[0]:
+                self._discard(path)
+
+    def copy_to(self, url: str, dest_path: str, sha256: str | None = None, on_progress=None) -> str:
+        shutil.copyfile(self.fetch(url, sha256, on_progress), dest_path)
+        return dest_path
@@ -0,0 +1,153 @@
+import argparse
+import sys
+import threading
+import time
+
+import adb_commands
+from adb_commands import adb_connect, adb_devices, adb_disconnect, close_shell_session, init_adb_keys, keycode_for
+from macros import parse_script, run_step
+
+# Headless entry point: `FirestickRemote.exe keys HOME DOWN OK` and friends,
+# running on the same adb layer as the window without importing tkinter.
+
+
+def run_steps(serial: str | None, steps, delay: float = 0.0, out=print, tagged: bool = False) -> bool:
+    prefix = f"[{serial}] " if tagged else ""
+    for i, (op, args) in enumerate(steps):
+        if i and delay and op != "sleep":
+            time.sleep(delay)
+        ok, stdout, stderr = run_step(serial, op, args)
+        if stdout:
+            out(f"{prefix}{stdout}")
+        if not ok:
+            out(f"{prefix}✗ {op} {' '.join(str(a) for a in args)}: {stderr or 'failed'}")
+            return False
+    return True
+
+
+def run_on_devices(serials, steps, delay: float = 0.0) -> bool:
+    if len(serials) <= 1:
+        return run_steps(serials[0] if serials else None, steps, delay)
+
+    results = {}
+    lock = threading.Lock()
+
+    def out(line):
+        with lock:
+            print(line, flush=True)
+
+    def worker(serial):
+        results[serial] = run_steps(serial, steps, delay, out, tagged=True)
+
+    threads = [threading.Thread(target=worker, args=(s,), daemon=True) for s in serials]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    failed = [s for s, ok in results.items() if not ok]
+    if failed:
+        print(f"failed on {len(failed)}/{len(serials)} device(s): {', '.join(failed)}", file=sys.stderr)
+    return not failed
+
+
+def _serials(args):
+    serials = []
+    for item in args.serial or []:
+        serials += [s.strip() for s in item.split(",") if s.strip()]
+    return serials
+
+
+def _connect_all(serials) -> bool:
+    ok_all = True
+    for serial in serials:
+        ok, out, err = adb_connect(serial)
+        if not ok:
+            print(f"[{serial}] ✗ connect: {err or out}", file=sys.stderr)
+            ok_all = False
+    return ok_all
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="firestick-remote",
+        description="Control Fire TV devices over ADB without the window."
+    )
+    parser.add_argument("-s", "--serial", action="append",
+                        help="device ip:port (repeatable or comma separated); default is the only attached device")
+    parser.add_argument("--connect", action="store_true", help="adb connect each --serial first")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait between steps")
+    parser.add_argument("-v", "--verbose", action="store_true", help="echo every adb call")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("devices", help="list attached devices")
+    p = sub.add_parser("connect", help="adb connect ip:port")
+    p.add_argument("targets", nargs="+")
+    p = sub.add_parser("disconnect", help="adb disconnect ip:port (all when omitted)")
+    p.add_argument("targets", nargs="*")
+    p = sub.add_parser("keys", help="send key presses, e.g. HOME DOWN DOWN OK or raw keycodes")
+    p.add_argument("keys", nargs="+")
+    p = sub.add_parser("text", help="type text into the focused field")
+    p.add_argument("text", nargs="+")
+    p = sub.add_parser("shell", help="run an adb shell command")
+    p.add_argument("cmd", nargs=argparse.REMAINDER)
+    p = sub.add_parser("run", help="run a script of steps (keys/text/shell/sleep, one per line)")
+    p.add_argument("script", help="script file, or - for stdin")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    adb_commands.LOG_COMMANDS = args.verbose
+    init_adb_keys()
+    serials = _serials(args)
+
+    try:
+        if args.command == "devices":
+            for serial, state in adb_devices():
+                print(f"{serial}\t{state}")
+            return 0
+        if args.command == "connect":
+            return 0 if _connect_all(args.targets) else 1
+        if args.command == "disconnect":
+            ok_all = True
+            for target in args.targets or [None]:
+                ok, out, err = adb_disconnect(target)
+                print(out or err)
+                ok_all = ok_all and ok
+            return 0 if ok_all else 1
+
+        if args.connect and not _connect_all(serials):
+            return 1
+
+        if args.command == "keys":
+            try:
+                steps = [("keys", [str(keycode_for(k)) for k in args.keys])]
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                return 2
+        elif args.command == "text":
+            steps = [("text", args.text)]
+        elif args.command == "shell":
+            if not args.cmd:
+                print("shell: missing command", file=sys.stderr)
+                return 2
+            steps = [("shell", args.cmd)]
+        else:
+            try:
+                if args.script == "-":
+                    text = sys.stdin.read()
+                else:
+                    with open(args.script, "r", encoding="utf-8") as f:
+                        text = f.read()
+                steps = parse_script(text)
+            except (OSError, ValueError, IndexError) as e:
+                print(f"script error: {e}", file=sys.stderr)
+                return 2
+
+        return 0 if run_on_devices(serials, steps, args.delay) else 1
+    finally:
+        close_shell_session()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
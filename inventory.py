@@ -0,0 +1,196 @@
+import re
+import threading
+import time
+
+from adb_commands import log, run_adb_shell
+
+# What is on a stick: properties, installed packages with versions, the
+# launcher activity of each app and the app in the foreground, collected in
+# one shell round trip per device and cached. An entry is refetched when it
+# is older than the TTL, when a cheap probe (the mtime of /data/app, no JVM)
+# says packages were installed or removed since, or when invalidate() is
+# called. Launching an app uses the cached launcher activity (`am start -n`)
+# and only falls back to `monkey` when none is known.
+
+INVENTORY_TTL = 600.0
+INVENTORY_PROBE_INTERVAL = 30.0
+
+LAUNCHER_CATEGORIES = ("android.intent.category.LEANBACK_LAUNCHER", "android.intent.category.LAUNCHER")
+
+SECTION_MARK = "@@FSR:"
+PACKAGE_STAMP_COMMAND = "stat -c %Y /data/app 2>/dev/null"
+
+_PROP_LINE = re.compile(r"^\[(.+?)\]: \[(.*)\]$")
+_PACKAGE_LINE = re.compile(r"^\s*Package \[([\w.]+)\]")
+_COMPONENT = re.compile(r"([A-Za-z0-9_.]+)/([A-Za-z0-9_.$]+)")
+
+
+def inventory_command() -> str:
+    sections = [
+        ("props", "getprop"),
+        ("packages", "dumpsys package packages | grep -E 'Package \\[|versionCode=|versionName='"),
+        ("third_party", "pm list packages -3"),
+    ]
+    for category in LAUNCHER_CATEGORIES:
+        sections.append(("launchable", f"cmd package query-activities --brief -a android.intent.action.MAIN "
+                                       f"-c {category}"))
+    sections += [
+        ("foreground", "dumpsys activity activities | grep -E 'ResumedActivity'"),
+        ("stamp", PACKAGE_STAMP_COMMAND),
+    ]
+    # `; true`: a section that finds nothing must not fail the whole batch.
+    return "; ".join(f"echo '{SECTION_MARK}{name}'; {command} 2>/dev/null" for name, command in sections) + "; true"
+
+
+def split_sections(out: str) -> dict:
+    sections = {}
+    current = None
+    for line in out.splitlines():
+        if line.startswith(SECTION_MARK):
+            current = sections.setdefault(line[len(SECTION_MARK):].strip(), [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def parse_foreground(lines) -> str | None:
+    for line in lines:
+        m = _COMPONENT.search(line.split("{", 1)[-1])
+        if m:
+            return f"{m.group(1)}/{m.group(2)}"
+    return None
+
+
+def parse_inventory(out: str) -> dict:
+    sections = split_sections(out)
+    props = {}
+    for line in sections.get("props", []):
+        m = _PROP_LINE.match(line.strip())
+        if m:
+            props[m.group(1)] = m.group(2)
+
+    packages = {}
+    current = None
+    for line in sections.get("packages", []):
+        m = _PACKAGE_LINE.match(line)
+        if m:
+            current = packages.setdefault(m.group(1), {"version_name": "", "version_code": None,
+                                                       "third_party": False, "activity": None})
+            continue
+        if current is None:
+            continue
+        for field in line.split():
+            key, _, value = field.partition("=")
+            if key == "versionCode" and value.isdigit():
+                current["version_code"] = int(value)
+            elif key == "versionName":
+                current["version_name"] = value
+
+    for line in sections.get("third_party", []):
+        if line.startswith("package:"):
+            name = line[len("package:"):].strip()
+            entry = packages.setdefault(name, {"version_name": "", "version_code": None,
+                                               "third_party": False, "activity": None})
+            entry["third_party"] = True
+
+    # The first category listed wins: a TV app's leanback activity over its phone one.
+    for line in sections.get("launchable", []):
+        m = _COMPONENT.fullmatch(line.strip())
+        if m and m.group(1) in packages and packages[m.group(1)]["activity"] is None:
+            packages[m.group(1)]["activity"] = m.group(2)
+
+    stamp = " ".join(sections.get("stamp", [])).strip()
+    return {
+        "props": props,
+        "packages": packages,
+        "foreground": parse_foreground(sections.get("foreground", [])),
+        "stamp": stamp or None,
+        "fetched_at": time.time(),
+    }
+
+
+def describe_device(entry: dict) -> str:
+    props = entry["props"]
+    model = props.get("ro.product.model", "?")
+    release = props.get("ro.build.version.release")
+    return f"{model}, Android {release}" if release else model
+
+
+def _launch_command(package: str, activity: str | None) -> str:
+    if activity:
+        component = activity if "/" in activity else f"{package}/{activity}"
+        return f"am start -n {component}"
+    return " || ".join(f"monkey -p {package} -c {category} 1" for category in LAUNCHER_CATEGORIES)
+
+
+# get(serial) returns the cached entry, refetching it as described above; a
+# fetch for a device already being fetched waits for that one instead of
+# starting another. Safe to call from any worker thread.
+class DeviceInventory:
+    def __init__(self, ttl: float = INVENTORY_TTL, probe_interval: float = INVENTORY_PROBE_INTERVAL):
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self.fetches = 0
+        self._entries = {}
+        self._probed = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def cached(self, serial: str | None) -> dict | None:
+        with self._lock:
+            return self._entries.get(serial)
+
+    def invalidate(self, serial: str | None = None) -> None:
+        with self._lock:
+            if serial is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(serial, None)
+
+    def _device_lock(self, serial: str | None) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(serial, threading.Lock())
+
+    def _still_valid(self, serial: str | None, entry: dict) -> bool:
+        if time.time() - entry["fetched_at"] > self.ttl:
+            return False
+        if entry["stamp"] is None or time.monotonic() - self._probed.get(serial, 0.0) < self.probe_interval:
+            return True
+        ok, out, _ = run_adb_shell([PACKAGE_STAMP_COMMAND], serial)
+        self._probed[serial] = time.monotonic()
+        # An unreadable stamp says nothing either way; keep the entry until the TTL.
+        return not ok or not out.strip() or out.strip() == entry["stamp"]
+
+    def get(self, serial: str | None, refresh: bool = False):
+        # -> (ok, entry, err)
+        with self._device_lock(serial):
+            entry = self.cached(serial)
+            if entry is not None and not refresh and self._still_valid(serial, entry):
+                return True, entry, ""
+            ok, out, err = run_adb_shell([inventory_command()], serial, timeout=60)
+            if not ok:
+                return False, entry, err or out or "inventory query failed"
+            entry = parse_inventory(out)
+            if not entry["packages"] and not entry["props"]:
+                return False, None, "the device returned no inventory"
+            self.fetches += 1
+            self._probed[serial] = time.monotonic()
+            with self._lock:
+                self._entries[serial] = entry
+            log(f"inventory {serial} > {len(entry['packages'])} package(s)")
+            return True, entry, ""
+
+    def launch(self, serial: str | None, package: str):
+        # Uses only what is cached; nothing is queried before the app starts.
+        entry = self.cached(serial)
+        info = entry["packages"].get(package) if entry else None
+        activity = info["activity"] if info else None
+        ok, out, err = run_adb_shell([_launch_command(package, activity)], serial)
+        if activity and (not ok or "Error" in out):
+            log(f"am start {package} failed, trying monkey >", err or out, error=True)
+            ok, out, err = run_adb_shell([_launch_command(package, None)], serial)
+        if ok and "No activities found" in out:
+            ok, out, err = False, "", out
+        if ok and entry is not None:
+            entry["foreground"] = f"{package}/{activity}" if activity else package
+        return ok, out, err
@@ -0,0 +1,320 @@
+import math
+import random
+import threading
+import time
+
+from adb_commands import log, run_adb_shell
+
+# Keeps connected Fire TVs from going to the screensaver or sleep. Where the
+# stick allows it, a one-time settings override does the job (stay on while
+# plugged in, screensaver off); the previous values are remembered and put
+# back when the device is disconnected or keep-alive is turned off. Sticks
+# that refuse the override get a no-op key press every ~45 s instead.
+#
+# All devices share one timer wheel thread; due work (pings, periodic checks
+# that the override is still in place) runs on one shared executor lane, so
+# the thread count does not grow with the number of devices.
+
+KEEP_ALIVE_INTERVAL = 45.0
+KEEP_ALIVE_CHECK_INTERVAL = 600.0
+KEEP_ALIVE_JITTER = 0.2
+KEEP_ALIVE_LANE = "keepalive"
+KEEP_ALIVE_CLOSE_TIMEOUT = 3.0
+
+WHEEL_TICK = 1.0
+WHEEL_SLOTS = 64
+
+# (namespace, key, value while keeping awake). 7 is what `svc power stayon true` writes.
+KEEP_AWAKE_SETTINGS = (
+    ("global", "stay_on_while_plugged_in", "7"),
+    ("secure", "screensaver_enabled", "0"),
+)
+
+
+def jittered(interval: float, jitter: float = KEEP_ALIVE_JITTER) -> float:
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+class _Timer:
+    __slots__ = ("fn", "args", "rounds", "cancelled")
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.rounds = 0
+        self.cancelled = False
+
+
+# Hashed timer wheel: a ring of slots one tick apart; a timer further out than
+# one turn waits in its slot for the remaining number of rounds. Scheduling
+# and cancelling are O(1) and one thread serves every timer. Callbacks run on
+# that thread and must only hand work off.
+class TimerWheel:
+    def __init__(self, tick: float = WHEEL_TICK, slots: int = WHEEL_SLOTS):
+        self.tick = tick
+        self.pending = 0
+        self._slots = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def schedule(self, delay: float, fn, *args) -> _Timer:
+        timer = _Timer(fn, args)
+        ticks = max(1, math.ceil(delay / self.tick))
+        with self._cond:
+            if self._stopped:
+                return timer
+            timer.rounds = (ticks - 1) // len(self._slots)
+            self._slots[(self._cursor + ticks) % len(self._slots)].append(timer)
+            self.pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return timer
+
+    def cancel(self, timer: _Timer | None) -> None:
+        # Cancelled timers are dropped when the wheel reaches their slot.
+        if timer is not None:
+            timer.cancelled = True
+
+    def stop(self) -> None:
+        # Final: timers scheduled after this never fire.
+        with self._cond:
+            self._stopped = True
+            for slot in self._slots:
+                slot.clear()
+            self.pending = 0
+            self._cond.notify()
+
+    def _advance(self):
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        due, keep = [], []
+        for timer in self._slots[self._cursor]:
+            if timer.cancelled:
+                self.pending -= 1
+            elif timer.rounds:
+                timer.rounds -= 1
+                keep.append(timer)
+            else:
+                self.pending -= 1
+                due.append(timer)
+        self._slots[self._cursor] = keep
+        return due
+
+    def _run(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self.pending:
+                        # Idle: sleep until something is scheduled.
+                        self._cond.wait()
+                        next_tick = time.monotonic() + self.tick
+                        continue
+                    remaining = next_tick - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped:
+                    return
+                next_tick += self.tick
+                due = self._advance()
+            for timer in due:
+                try:
+                    timer.fn(*timer.args)
+                except Exception as e:
+                    log("keep-alive timer failed >", repr(e), error=True)
+
+
+class _Device:
+    __slots__ = ("mode", "timer")
+
+    def __init__(self):
+        self.mode = "setup"
+        self.timer = None
+
+
+# add(serial) when a device is connected with keep-alive on, remove(serial)
+# when it goes away. restore(serial) puts the device's own settings back and
+# must run while it is still reachable. `saved` maps serial -> {"ns/key":
+# value} for overrides still in place (persist it so a crash or a lost
+# connection is cleaned up on the next connect); on_saved(saved) is called
+# with a copy whenever it changes.
+class KeepAlive:
+    def __init__(self, executor, wheel: TimerWheel | None = None, saved: dict | None = None, on_saved=None,
+                 interval: float = KEEP_ALIVE_INTERVAL, check_interval: float = KEEP_ALIVE_CHECK_INTERVAL,
+                 use_settings: bool = True):
+        self.executor = executor
+        self.wheel = wheel or TimerWheel()
+        self.saved = dict(saved or {})
+        self.on_saved = on_saved
+        self.interval = interval
+        self.check_interval = check_interval
+        self.use_settings = use_settings
+        self.pings = 0
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def add(self, serial: str) -> None:
+        with self._lock:
+            if serial in self._devices:
+                return
+            device = self._devices[serial] = _Device()
+        self._submit(serial, device, self._setup)
+
+    def remove(self, serial: str) -> None:
+        with self._lock:
+            device = self._devices.pop(serial, None)
+        if device is not None:
+            self.wheel.cancel(device.timer)
+
+    def clear(self):
+        with self._lock:
+            serials = list(self._devices)
+        for serial in serials:
+            self.remove(serial)
+        return serials
+
+    def mode(self, serial: str) -> str | None:
+        with self._lock:
+            device = self._devices.get(serial)
+            return device.mode if device else None
+
+    def modes(self) -> dict:
+        with self._lock:
+            return {serial: device.mode for serial, device in self._devices.items()}
+
+    def has_saved(self, serial: str) -> bool:
+        with self._lock:
+            return serial in self.saved
+
+    def restore(self, serial: str, timeout: float = 10) -> bool:
+        with self._lock:
+            original = self.saved.get(serial)
+        if original is None:
+            return True
+        commands = []
+        for ns, key, _ in KEEP_AWAKE_SETTINGS:
+            value = original.get(f"{ns}/{key}", "null")
+            if value == "null":
+                commands.append(f"settings delete {ns} {key}")
+            else:
+                commands.append(f"settings put {ns} {key} {value}")
+        ok, out, err = run_adb_shell(["; ".join(commands)], serial, timeout=timeout)
+        if not ok:
+            log(f"keep-alive restore {serial} failed >", err or out, error=True)
+            return False
+        self._set_saved(serial, None)
+        return True
+
+    def restore_all(self, serials, timeout: float = KEEP_ALIVE_CLOSE_TIMEOUT) -> int:
+        # All devices at once, within one overall deadline; unreachable ones
+        # keep their saved values and are restored on their next connect.
+        threads = [threading.Thread(target=self.restore, args=(serial, timeout), daemon=True)
+                   for serial in serials if self.has_saved(serial)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + timeout
+        for t in threads:
+            t.join(max(deadline - time.monotonic(), 0))
+        return sum(t.is_alive() for t in threads)
+
+    def _set_saved(self, serial: str, values: dict | None) -> None:
+        with self._lock:
+            if values is None:
+                self.saved.pop(serial, None)
+            else:
+                self.saved[serial] = values
+            snapshot = dict(self.saved)
+        if self.on_saved is not None:
+            self.on_saved(snapshot)
+
+    def _active(self, serial: str, device: _Device) -> bool:
+        with self._lock:
+            return self._devices.get(serial) is device
+
+    def _submit(self, serial: str, device: _Device, fn) -> None:
+        if not self.executor.submit(KEEP_ALIVE_LANE, fn, serial, device):
+            # Lane full: try again on the next turn rather than dropping the device.
+            self._schedule(serial, device, fn, self.wheel.tick)
+
+    def _schedule(self, serial: str, device: _Device, fn, delay: float) -> None:
+        with self._lock:
+            if self._devices.get(serial) is not device:
+                return
+            self.wheel.cancel(device.timer)
+            device.timer = self.wheel.schedule(delay, self._submit, serial, device, fn)
+
+    def _read(self, serial: str):
+        command = "; ".join(f"settings get {ns} {key}" for ns, key, _ in KEEP_AWAKE_SETTINGS)
+        ok, out, _ = run_adb_shell([command], serial)
+        lines = out.splitlines()
+        if not ok or len(lines) != len(KEEP_AWAKE_SETTINGS):
+            return None
+        return {f"{ns}/{key}": line.strip() for (ns, key, _), line in zip(KEEP_AWAKE_SETTINGS, lines)}
+
+    def _apply_settings(self, serial: str) -> bool:
+        current = self._read(serial)
+        if current is None:
+            return False
+        if not self.has_saved(serial):
+            self._set_saved(serial, current)
+        command = " && ".join(f"settings put {ns} {key} {value}" for ns, key, value in KEEP_AWAKE_SETTINGS)
+        ok, _, _ = run_adb_shell([command], serial)
+        return ok and self._settings_hold(serial)
+
+    def _settings_hold(self, serial: str) -> bool:
+        current = self._read(serial)
+        return current is not None and all(
+            current[f"{ns}/{key}"] == value for ns, key, value in KEEP_AWAKE_SETTINGS
+        )
+
+    def _setup(self, serial: str, device: _Device) -> None:
+        if not self._active(serial, device):
+            return
+        if self.use_settings and self._apply_settings(serial):
+            if not self._active(serial, device):
+                # Removed while the override went in; do not leave it behind.
+                self.restore(serial)
+                return
+            device.mode = "settings"
+            log(f"keep-alive {serial} > stay-on setting applied")
+            self._schedule(serial, device, self._check, jittered(self.check_interval))
+            return
+        if self.use_settings:
+            self.restore(serial)
+            log(f"keep-alive {serial} > settings override refused, pinging instead")
+        device.mode = "ping"
+        self._schedule(serial, device, self._ping, jittered(self.interval))
+
+    def _check(self, serial: str, device: _Device) -> None:
+        if not self._active(serial, device):
+            return
+        current = self._read(serial)
+        reset = current is not None and any(
+            current[f"{ns}/{key}"] != value for ns, key, value in KEEP_AWAKE_SETTINGS
+        )
+        # An unreadable device is left alone; the connection handling deals with it.
+        if reset and not self._apply_settings(serial):
+            self.restore(serial)
+            device.mode = "ping"
+            log(f"keep-alive {serial} > stay-on setting was reset, pinging instead")
+            self._ping(serial, device)
+            return
+        self._schedule(serial, device, self._check, jittered(self.check_interval))
+
+    def _ping(self, serial: str, device: _Device) -> None:
+        if not self._active(serial, device):
+            return
+        ok, out, err = run_adb_shell(["input", "keyevent", "0"], serial)
+        if ok:
+            self.pings += 1
+        else:
+            log(f"keep-alive ping {serial} failed >", err or out, error=True)
+        self._schedule(serial, device, self._ping, jittered(self.interval))
+
+    def stop(self) -> None:
+        self.clear()
+        self.wheel.stop()
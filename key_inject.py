@@ -0,0 +1,263 @@
+import re
+import socket
+import threading
+import time
+
+from adb_client import AdbClientError
+from adb_commands import adb_client, log, run_adb_shell
+from latency import add_stage, since_ms
+
+# Fast key presses without the `input` tool, which starts a JVM on the stick
+# for every call. A small helper script is written to the device once and
+# started over its own exec: stream; it reads "<node> <code>" lines and
+# writes a press and release to the input device node with `sendevent`
+# (native, no JVM), answering "ok" per key and stopping at the first error
+# so nothing after a failed key lands out of order. The node and Linux key
+# code for each Android keycode come from `getevent -p` and the standard key
+# layout below. Keys the device has no code for, or a key the helper reports
+# as failed, fall back to `input keyevent`; keys lost with the connection may
+# already have been pressed and are reported, never sent again. After a few
+# failures in a row the helper is given up.
+
+HELPER_PATH = "/data/local/tmp/fsr_keys.sh"
+HELPER_TIMEOUT = 5.0
+HELPER_MAX_FAILURES = 3
+
+HELPER_SCRIPT = """\
+echo ready
+while read -r node code; do
+    if sendevent "$node" 1 "$code" 1 && sendevent "$node" 0 0 0 \\
+            && sendevent "$node" 1 "$code" 0 && sendevent "$node" 0 0 0; then
+        echo ok
+    else
+        # Never exit with the key held down.
+        sendevent "$node" 1 "$code" 0; sendevent "$node" 0 0 0
+        echo "err $node $code"
+        exit 1
+    fi
+done
+"""
+
+EV_KEY_TYPE = "KEY"
+
+# Android keycode -> Linux key codes that produce it under Generic.kl, best first.
+LINUX_KEY_CODES = {
+    3: (172, 102),      # HOME: KEY_HOMEPAGE, KEY_HOME
+    4: (158, 1),        # BACK: KEY_BACK, KEY_ESC
+    19: (103,),         # DPAD_UP
+    20: (108,),         # DPAD_DOWN
+    21: (105,),         # DPAD_LEFT
+    22: (106,),         # DPAD_RIGHT
+    23: (353, 352),     # DPAD_CENTER: KEY_SELECT, KEY_OK
+    24: (115,),         # VOLUME_UP
+    25: (114,),         # VOLUME_DOWN
+    26: (116,),         # POWER
+    61: (15,),          # TAB
+    66: (28, 96),       # ENTER: KEY_ENTER, KEY_KPENTER
+    67: (14,),          # DEL: KEY_BACKSPACE
+    82: (139,),         # MENU
+    84: (217,),         # SEARCH
+    85: (164,),         # MEDIA_PLAY_PAUSE
+    87: (163,),         # MEDIA_NEXT
+    88: (165,),         # MEDIA_PREVIOUS
+    89: (168,),         # MEDIA_REWIND
+    90: (208,),         # MEDIA_FAST_FORWARD
+    164: (113,),        # VOLUME_MUTE
+    223: (142,),        # SLEEP
+    224: (143,),        # WAKEUP
+}
+
+# Nodes whose name contains one of these are preferred, in this order.
+NODE_NAME_HINTS = ("remote", "keyboard", "keys")
+
+_HEX_CODE = re.compile(r"[0-9a-f]{4}\*?")
+
+
+def parse_getevent(output: str):
+    # [{"path": "/dev/input/event3", "name": "...", "keys": {103, 108, ...}}]
+    devices = []
+    device = None
+    section = None
+    for line in output.splitlines():
+        text = line.strip()
+        m = re.match(r"add device \d+: (\S+)", text)
+        if m:
+            device = {"path": m.group(1), "name": "", "keys": set()}
+            devices.append(device)
+            section = None
+            continue
+        if device is None:
+            continue
+        if text.startswith("name:"):
+            device["name"] = text[len("name:"):].strip().strip('"')
+            continue
+        m = re.match(r"([A-Z]+) \(([0-9a-f]{4})\):(.*)", text)
+        if m:
+            section, rest = m.group(1), m.group(3)
+        elif section and line[:1].isspace() and text and all(_HEX_CODE.fullmatch(t) for t in text.split()):
+            rest = text
+        else:
+            section = None
+            continue
+        if section == EV_KEY_TYPE:
+            device["keys"].update(int(t.rstrip("*"), 16) for t in rest.split() if _HEX_CODE.fullmatch(t))
+    return devices
+
+
+def _node_rank(device) -> int:
+    name = device["name"].lower()
+    for i, hint in enumerate(NODE_NAME_HINTS):
+        if hint in name:
+            return i
+    return len(NODE_NAME_HINTS)
+
+
+def scancode_map(devices) -> dict:
+    # Android keycode -> (node path, Linux key code) for every key some node can send.
+    ranked = sorted(devices, key=_node_rank)
+    mapping = {}
+    for keycode, codes in LINUX_KEY_CODES.items():
+        for code in codes:
+            node = next((d["path"] for d in ranked if code in d["keys"]), None)
+            if node is not None:
+                mapping[keycode] = (node, code)
+                break
+    return mapping
+
+
+def _install_command() -> str:
+    # Quoted heredoc: nothing in the script is expanded on the way in.
+    return f"cat > {HELPER_PATH} <<'FSR_EOF'\n{HELPER_SCRIPT}FSR_EOF\n"
+
+
+# One per device. send() is called from the device's executor lane with a
+# batch of keycodes and returns (taken, error): the first `taken` keys were
+# handled and the caller sends the rest with `input keyevent`. With an error,
+# the last of the taken keys were lost in flight and may or may not have
+# been pressed.
+class RawKeyInjector:
+    def __init__(self, serial: str | None):
+        self.serial = serial
+        self.keymap = None
+        self.unavailable = None
+        self.sent = 0
+        self._failures = 0
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def prepare(self) -> bool:
+        with self._lock:
+            return self._ensure_started()
+
+    def send(self, keycodes):
+        with self._lock:
+            if not self._ensure_started():
+                return 0, None
+            targets = []
+            for keycode in keycodes:
+                target = self.keymap.get(int(keycode))
+                if target is None:
+                    break
+                targets.append(target)
+            if not targets:
+                return 0, None
+            sent, error = self._press(targets)
+            self.sent += sent
+            return (len(targets), error) if error else (sent, None)
+
+    def close(self) -> None:
+        # Not under the lock: shutting the socket down wakes a send() waiting on the helper.
+        self.unavailable = "closed"
+        self._close()
+
+    def _ensure_started(self) -> bool:
+        if self.unavailable is not None:
+            return False
+        if self._sock is not None:
+            return True
+        t0 = time.perf_counter()
+        try:
+            if self.keymap is None:
+                self.keymap = self._discover()
+            self._start_helper()
+        except (AdbClientError, OSError, RuntimeError) as e:
+            self._close()
+            self._failed(str(e))
+            return False
+        add_stage("setup", since_ms(t0))
+        return True
+
+    def _discover(self) -> dict:
+        ok, out, err = run_adb_shell(["getevent", "-p"], self.serial)
+        if not ok:
+            raise RuntimeError(f"getevent -p failed: {err or out}")
+        mapping = scancode_map(parse_getevent(out))
+        if not mapping:
+            raise RuntimeError("no input device with remote keys found")
+        log(f"raw keys {self.serial} > {len(mapping)} key(s) mapped")
+        return mapping
+
+    def _start_helper(self) -> None:
+        ok, out, err = run_adb_shell([_install_command()], self.serial)
+        if not ok:
+            raise RuntimeError(f"could not write {HELPER_PATH}: {err or out}")
+        sock = adb_client.open_service(self.serial, f"exec:sh {HELPER_PATH}", timeout=HELPER_TIMEOUT)
+        self._sock = sock
+        sock.settimeout(HELPER_TIMEOUT)
+        self._reader = sock.makefile("rb")
+        line = self._reader.readline().strip()
+        if line != b"ready":
+            raise RuntimeError(f"helper did not start: {line.decode('utf-8', errors='replace')}")
+
+    def _press(self, targets):
+        # All lines go out at once; the replies say how many keys landed.
+        # -> (acknowledged, error if the rest were lost in flight)
+        t0 = time.perf_counter()
+        sock, reader = self._sock, self._reader
+        if sock is None:
+            return 0, None
+        sent = 0
+        reply = b""
+        lost = None
+        try:
+            sock.sendall("".join(f"{node} {code}\n" for node, code in targets).encode("ascii"))
+            while sent < len(targets):
+                reply = reader.readline().strip()
+                if reply != b"ok":
+                    break
+                sent += 1
+        except (OSError, ValueError) as e:
+            lost = f"helper connection lost: {e}"
+        add_stage("device", since_ms(t0))
+        if sent == len(targets):
+            self._failures = 0
+            return sent, None
+        if not reply:
+            lost = lost or "helper closed"
+        # The helper stops at an error; start a fresh one next time.
+        self._close()
+        self._failed(lost or reply.decode("utf-8", errors="replace"))
+        if lost:
+            return sent, f"{len(targets) - sent} key(s) may not have reached the device ({lost})"
+        return sent, None
+
+    def _failed(self, reason: str) -> None:
+        if self.unavailable is not None:
+            return
+        self._failures += 1
+        log(f"raw keys {self.serial} failed, using input keyevent >", reason, error=True)
+        if self._failures >= HELPER_MAX_FAILURES or self.keymap is None:
+            self.unavailable = reason
+
+    def _close(self) -> None:
+        sock, self._sock, self._reader = self._sock, None, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
@@ -0,0 +1,224 @@
+import csv
+import json
+import math
+import threading
+import time
+
+# Where the time of each adb action goes. An action (a key batch, a text
+# send, a manual command) is timed in stages: queue wait, connection or
+# process setup, execution on the device and the UI callback that shows the
+# result. Every stage lands in a histogram per device and action type. The
+# adb layer reports setup/device time into whichever action is running on
+# its thread, so nothing below the action needs an extra parameter.
+#
+# Histograms use fixed log-spaced buckets (8 per doubling, ~9% wide) from
+# 10 us up, so memory per histogram is constant and percentiles are exact to
+# within one bucket.
+
+STAGES = ("queue", "setup", "device", "ui", "total")
+BUCKET_BASE_MS = 0.01
+BUCKETS_PER_DOUBLING = 8
+BUCKET_COUNT = 240
+
+_local = threading.local()
+_trace_hooks = []
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(ms: float) -> int:
+        if ms <= BUCKET_BASE_MS:
+            return 0
+        index = math.ceil(math.log2(ms / BUCKET_BASE_MS) * BUCKETS_PER_DOUBLING)
+        return min(index, BUCKET_COUNT - 1)
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return BUCKET_BASE_MS * 2 ** (index / BUCKETS_PER_DOUBLING)
+
+    def record(self, ms: float) -> None:
+        self.counts[self.bucket(ms)] += 1
+        self.count += 1
+        self.sum += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other: "Histogram") -> None:
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class LatencyStats:
+    def __init__(self):
+        self.version = 0
+        self._hists = {}
+        self._lock = threading.Lock()
+
+    def record(self, serial: str | None, action: str, stages: dict) -> None:
+        with self._lock:
+            for stage, ms in stages.items():
+                key = (serial or "any", action, stage)
+                hist = self._hists.get(key)
+                if hist is None:
+                    hist = self._hists[key] = Histogram()
+                hist.record(ms)
+            self.version += 1
+
+    def rows(self, by: str = "action"):
+        # by: "action", "device" or "both"; one row per group and stage.
+        merged = {}
+        with self._lock:
+            for (serial, action, stage), hist in self._hists.items():
+                group = (action if by != "device" else "*", serial if by != "action" else "*")
+                target = merged.get((group, stage))
+                if target is None:
+                    target = merged[(group, stage)] = Histogram()
+                target.merge(hist)
+        rows = []
+        for ((action, device), stage), hist in merged.items():
+            rows.append({
+                "action": action, "device": device, "stage": stage, "count": hist.count,
+                "p50": round(hist.percentile(50), 2), "p95": round(hist.percentile(95), 2),
+                "p99": round(hist.percentile(99), 2), "mean": round(hist.mean, 2), "max": round(hist.max, 2),
+            })
+        rows.sort(key=lambda r: (r["action"], r["device"], STAGES.index(r["stage"])))
+        return rows
+
+    def export_json(self, path: str, by: str = "both") -> int:
+        rows = self.rows(by)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"unit": "ms", "generated": time.time(), "rows": rows}, f, indent=2)
+        return len(rows)
+
+    def export_csv(self, path: str, by: str = "both") -> int:
+        rows = self.rows(by)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["action", "device", "stage", "count",
+                                                   "p50", "p95", "p99", "mean", "max"])
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists.clear()
+            self.version += 1
+
+
+latency_stats = LatencyStats()
+
+
+def add_trace_hook(fn) -> None:
+    # fn(event: dict) is called for "invoke" (a UI action was triggered),
+    # "start" and "end" (an action ran on a worker; "end" carries its stages).
+    _trace_hooks.append(fn)
+
+
+def remove_trace_hook(fn) -> None:
+    if fn in _trace_hooks:
+        _trace_hooks.remove(fn)
+
+
+def trace(event: str, **fields) -> None:
+    if not _trace_hooks:
+        return
+    fields["event"] = event
+    fields["time"] = time.time()
+    for fn in list(_trace_hooks):
+        try:
+            fn(fields)
+        except Exception:
+            pass
+
+
+def jsonl_trace_hook(path: str):
+    lock = threading.Lock()
+
+    def hook(event):
+        line = json.dumps(event, default=str)
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return hook
+
+
+def add_stage(stage: str, ms: float) -> None:
+    # Called from the adb layer; a no-op unless an action is being timed on this thread.
+    action = getattr(_local, "action", None)
+    if action is not None:
+        action.stages[stage] = action.stages.get(stage, 0.0) + ms
+
+
+class TimedAction:
+    def __init__(self, serial: str | None, action: str, queue_ms: float | None = None,
+                 ui: bool = False, stats: LatencyStats | None = None):
+        self.serial = serial
+        self.action = action
+        self.stages = {}
+        if queue_ms is not None:
+            self.stages["queue"] = max(queue_ms, 0.0)
+        self.ui = ui
+        self.stats = stats or latency_stats
+        self.ok = True
+        self._started = None
+        self._ended = None
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = getattr(_local, "action", None)
+        _local.action = self
+        self._started = time.perf_counter()
+        trace("start", action=self.action, device=self.serial)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.action = self._outer
+        self._ended = time.perf_counter()
+        if exc_type is not None:
+            self.ok = False
+        if not self.ui:
+            self._finish()
+        return False
+
+    def ui_done(self) -> None:
+        # Call at the end of the UI callback that shows this action's result.
+        if self._ended is not None and "ui" not in self.stages:
+            self.stages["ui"] = (time.perf_counter() - self._ended) * 1000
+            self._finish()
+
+    def _finish(self) -> None:
+        run_ms = (self._ended - self._started) * 1000
+        self.stages["total"] = run_ms + self.stages.get("queue", 0.0) + self.stages.get("ui", 0.0)
+        self.stats.record(self.serial, self.action, self.stages)
+        trace("end", action=self.action, device=self.serial, ok=self.ok,
+              stages={k: round(v, 2) for k, v in self.stages.items()})
+
+
+def since_ms(t: float) -> float:
+    return (time.perf_counter() - t) * 1000
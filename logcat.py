@@ -0,0 +1,194 @@
+import collections
+import heapq
+import re
+import sys
+import threading
+
+from adb_commands import StreamingCommand
+
+# Live `adb logcat` for the log pane. Tag/priority filtering happens on the
+# device (logcat filterspecs and --pid) so only wanted lines cross the link.
+# Parsed entries go into LogStore, a ring of plain tuples with per-tag,
+# per-pid and per-level indexes, so a search walks only the entries that can
+# match instead of the whole ring.
+
+LOG_MAX_ENTRIES = 50000
+LOG_TRIM_SLACK = 5000
+LOG_TAIL_LINES = 500
+
+LEVELS = "VDIWEF"
+
+THREADTIME_RE = re.compile(
+    r"^(\d\d-\d\d \d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*: (.*)$"
+)
+
+# Entry fields, in tuple order.
+SEQ, STAMP, PID, TID, LEVEL, TAG, MESSAGE = range(7)
+
+
+def logcat_args(tags=None, level: str = "V", pid: int | None = None, tail: int = LOG_TAIL_LINES):
+    args = ["logcat", "-v", "threadtime"]
+    if tail:
+        args += ["-T", str(tail)]
+    if pid:
+        args.append(f"--pid={int(pid)}")
+    level = (level or "V").upper()
+    if tags:
+        for tag in tags:
+            args.append(tag if ":" in tag else f"{tag}:{level}")
+        args.append("*:S")
+    else:
+        args.append(f"*:{level}")
+    return args
+
+
+def parse_tags(text: str):
+    return [t.strip() for t in re.split(r"[,\s]+", text or "") if t.strip()]
+
+
+def parse_query(text: str) -> dict:
+    query = {}
+    words = []
+    for word in (text or "").split():
+        key, sep, value = word.partition(":")
+        if sep and key in ("tag", "pid", "level") and value:
+            query[key] = value
+        else:
+            words.append(word)
+    if "pid" in query:
+        query["pid"] = int(query["pid"]) if query["pid"].isdigit() else -1
+    if "level" in query:
+        query["level"] = query["level"][0].upper()
+    if words:
+        query["text"] = " ".join(words)
+    return query
+
+
+def format_entry(entry) -> str:
+    return f"{entry[STAMP]} {entry[PID]:>5} {entry[TID]:>5} {entry[LEVEL]} {entry[TAG]}: {entry[MESSAGE]}"
+
+
+class LogStore:
+    def __init__(self, max_entries: int = LOG_MAX_ENTRIES, trim_slack: int = LOG_TRIM_SLACK):
+        self.max_entries = max_entries
+        self.trim_slack = trim_slack
+        self.first_seq = 0
+        self.next_seq = 0
+        self.unparsed = 0
+        self._entries = collections.deque()
+        self._by_tag = {}
+        self._by_pid = {}
+        self._by_level = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add_line(self, line: str):
+        m = THREADTIME_RE.match(line)
+        if m is None:
+            if not line.startswith("---------"):
+                self.unparsed += 1
+            return None
+        stamp, pid, tid, level, tag, message = m.groups()
+        with self._lock:
+            entry = (self.next_seq, stamp, int(pid), int(tid), level, sys.intern(tag), message)
+            self.next_seq += 1
+            self._entries.append(entry)
+            for index, key in ((self._by_tag, entry[TAG]), (self._by_pid, entry[PID]), (self._by_level, level)):
+                postings = index.get(key)
+                if postings is None:
+                    postings = index[key] = collections.deque()
+                postings.append(entry[SEQ])
+            if len(self._entries) > self.max_entries + self.trim_slack:
+                self._trim()
+        return entry
+
+    def _trim(self) -> None:
+        for _ in range(len(self._entries) - self.max_entries):
+            entry = self._entries.popleft()
+            for index, key in ((self._by_tag, entry[TAG]), (self._by_pid, entry[PID]), (self._by_level, entry[LEVEL])):
+                postings = index[key]
+                postings.popleft()
+                if not postings:
+                    del index[key]
+        self.first_seq = self._entries[0][SEQ]
+
+    def query(self, tag: str | None = None, pid: int | None = None, level: str | None = None,
+              text: str | None = None, limit: int | None = None):
+        with self._lock:
+            levels = LEVELS[LEVELS.index(level):] + "A" if level and level in LEVELS else None
+            sources = []
+            if tag is not None:
+                sources.append(self._by_tag.get(tag, ()))
+            if pid is not None:
+                sources.append(self._by_pid.get(pid, ()))
+            if sources:
+                candidates = min(sources, key=len)
+            elif levels is not None:
+                candidates = heapq.merge(*(self._by_level.get(lv, ()) for lv in levels))
+            else:
+                candidates = (e[SEQ] for e in self._entries)
+            needle = text.lower() if text else None
+            matches = []
+            for seq in candidates:
+                entry = self._entries[seq - self.first_seq]
+                if tag is not None and entry[TAG] != tag:
+                    continue
+                if pid is not None and entry[PID] != pid:
+                    continue
+                if levels is not None and entry[LEVEL] not in levels:
+                    continue
+                if needle is not None and needle not in entry[MESSAGE].lower() and needle not in entry[TAG].lower():
+                    continue
+                matches.append(entry)
+        if limit is not None:
+            matches = matches[-limit:]
+        return matches
+
+    def export(self, path: str, entries=None) -> int:
+        if entries is None:
+            with self._lock:
+                entries = list(self._entries)
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(format_entry(entry) + "\n")
+        return len(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._by_pid.clear()
+            self._by_level.clear()
+            self.first_seq = self.next_seq
+
+
+# Streams logcat for one device on its own thread until stopped; each parsed
+# entry is stored and handed to on_entry.
+class LogcatReader:
+    def __init__(self, serial: str | None, store: LogStore, tags=None, level: str = "V",
+                 pid: int | None = None, on_entry=None, on_done=None):
+        self.serial = serial
+        self.store = store
+        self.on_entry = on_entry
+        self.on_done = on_done
+        self.stream = StreamingCommand(logcat_args(tags, level, pid), serial, on_line=self._on_line)
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.stream.cancel("stopped")
+
+    def _on_line(self, line: str) -> None:
+        entry = self.store.add_line(line)
+        if entry is not None and self.on_entry is not None:
+            self.on_entry(entry)
+
+    def _run(self):
+        ok, out, err = self.stream.run()
+        if self.on_done is not None:
+            self.on_done(ok, out or err)
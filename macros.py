@@ -0,0 +1,245 @@
+import heapq
+import shlex
+import threading
+import time
+
+from adb_commands import KEY_NAMES, device_lane, keycode_for, run_adb_shell
+from text_input import TextSender
+
+# Macros are stored in the same step format the CLI `run` command reads
+# (keys/text/shell/sleep, one per line), so a recorded macro is also a script.
+
+STEP_OPS = ("keys", "text", "shell", "sleep")
+
+KEY_LABELS = {}
+for _name, _code in KEY_NAMES.items():
+    KEY_LABELS.setdefault(_code, _name)
+
+
+def parse_script(text: str):
+    steps = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = shlex.split(line, comments=True)
+        op, args = parts[0].lower(), parts[1:]
+        if op not in STEP_OPS:
+            raise ValueError(f"line {lineno}: unknown step '{parts[0]}'")
+        if op == "keys":
+            args = [str(keycode_for(k)) for k in args]
+        elif op == "sleep":
+            args = [float(args[0])]
+        steps.append((op, args))
+    return steps
+
+
+def run_step(serial: str | None, op: str, args):
+    if op == "keys":
+        return run_adb_shell(["input", "keyevent"] + list(args), serial)
+    if op == "text":
+        return TextSender(serial, " ".join(args)).run()
+    if op == "shell":
+        return run_adb_shell(list(args), serial, use_session=False)
+    if op == "sleep":
+        time.sleep(args[0])
+        return True, "", ""
+    return False, "", f"unknown step {op}"
+
+
+def _format_step(op: str, args) -> str:
+    if op == "keys":
+        return "keys " + " ".join(KEY_LABELS.get(int(k), str(k)) for k in args)
+    if op == "sleep":
+        return f"sleep {args[0]:.3f}".rstrip("0").rstrip(".")
+    return op + " " + " ".join(shlex.quote(str(a)) for a in args)
+
+
+class Macro:
+    def __init__(self, steps=None, name: str = ""):
+        self.steps = list(steps or [])
+        self.name = name
+
+    @classmethod
+    def from_text(cls, text: str, name: str = "") -> "Macro":
+        return cls(parse_script(text), name)
+
+    @classmethod
+    def load(cls, path: str) -> "Macro":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_text(f.read(), name=path)
+
+    def to_text(self) -> str:
+        return "\n".join(_format_step(op, args) for op, args in self.steps) + "\n"
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_text())
+
+    def timeline(self):
+        offset = 0.0
+        events = []
+        for op, args in self.steps:
+            if op == "sleep":
+                offset += args[0]
+            else:
+                events.append((offset, op, list(args)))
+        return events
+
+    def event_count(self) -> int:
+        return sum(len(args) if op == "keys" else 1 for op, args in self.steps if op != "sleep")
+
+    def duration(self) -> float:
+        return sum(args[0] for op, args in self.steps if op == "sleep")
+
+
+class MacroRecorder:
+    def __init__(self, min_gap: float = 0.01):
+        self.min_gap = min_gap
+        self.recording = False
+        self._steps = []
+        self._last = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self._steps = []
+            self._last = None
+            self.recording = True
+
+    def _add(self, op: str, args) -> None:
+        with self._lock:
+            if not self.recording:
+                return
+            now = time.monotonic()
+            gap = 0.0 if self._last is None else now - self._last
+            self._last = now
+            if gap >= self.min_gap:
+                self._steps.append(("sleep", [round(gap, 3)]))
+            elif op == "keys" and self._steps and self._steps[-1][0] == "keys":
+                self._steps[-1][1].extend(args)
+                return
+            self._steps.append((op, list(args)))
+
+    def record_key(self, keycode: int) -> None:
+        self._add("keys", [str(int(keycode))])
+
+    def record_text(self, text: str) -> None:
+        self._add("text", [text])
+
+    def stop(self) -> Macro:
+        with self._lock:
+            self.recording = False
+            return Macro(self._steps)
+
+
+# Replays a macro on one dedicated timing thread. Events are scheduled against
+# absolute times from the start (so a slow send does not push every later
+# step back), handed to each device's executor lane early by that device's
+# measured send latency, and keys that fall inside the batch window are sent
+# as one `input keyevent` call.
+class MacroPlayer:
+    def __init__(self, macro: Macro, serials, executor, speed: float = 1.0,
+                 batch_window: float = 0.05, on_done=None, on_error=None):
+        self.macro = macro
+        self.serials = list(serials) or [None]
+        self.executor = executor
+        self.speed = max(speed, 0.01)
+        self.batch_window = batch_window
+        self.on_done = on_done
+        self.on_error = on_error
+        self.latency = dict((s, 0.0) for s in self.serials)
+        self.max_lateness = 0.0
+        self.sent = 0
+        self.failed = 0
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _groups(self):
+        groups = []
+        for offset, op, args in self.macro.timeline():
+            at = offset / self.speed
+            if (op == "keys" and groups and groups[-1][1] == "keys"
+                    and at - groups[-1][0] <= self.batch_window):
+                groups[-1][2].extend(args)
+                continue
+            groups.append((at, op, list(args)))
+        return groups
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self):
+        groups = self._groups()
+        heap = [(at, i, serial) for i, (at, _, _) in enumerate(groups) for serial in self.serials]
+        heapq.heapify(heap)
+        with self._lock:
+            self._pending = len(heap)
+        if not heap:
+            self._finish()
+            return
+        t0 = time.monotonic()
+        while heap and not self._cancel.is_set():
+            at, i, serial = heap[0]
+            due = t0 + at - self.latency[serial]
+            delay = due - time.monotonic()
+            if delay > 0.001:
+                self._cancel.wait(delay)
+                continue
+            heapq.heappop(heap)
+            _, op, args = groups[i]
+            if not self.executor.submit(device_lane(serial), self._send, serial, op, args, t0 + at):
+                self._complete(serial, False, "device queue full")
+        if self._cancel.is_set():
+            with self._lock:
+                self._pending -= len(heap)
+                finished = self._pending <= 0
+            if finished:
+                self._finish()
+
+    def _send(self, serial, op, args, target):
+        if self._cancel.is_set():
+            self._complete(serial, None, "")
+            return
+        started = time.monotonic()
+        ok, out, err = run_step(serial, op, args)
+        elapsed = time.monotonic() - started
+        self.latency[serial] = self.latency[serial] * 0.7 + elapsed * 0.3
+        self.max_lateness = max(self.max_lateness, time.monotonic() - target)
+        self._complete(serial, ok, err or out)
+
+    def _complete(self, serial, ok, message):
+        # ok is None for a step skipped after cancel(): neither sent nor failed.
+        if ok is False and self.on_error is not None:
+            self.on_error(serial, message or "failed")
+        with self._lock:
+            if ok:
+                self.sent += 1
+            elif ok is False:
+                self.failed += 1
+            self._pending -= 1
+            finished = self._pending <= 0
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self._done.set()
+        if self.on_done is not None:
+            self.on_done(self)
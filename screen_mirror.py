@@ -0,0 +1,348 @@
+import ipaddress
+import math
+import struct
+import subprocess
+import threading
+import time
+
+from adb_client import AdbClientError, AdbServerUnavailable
+from adb_commands import _subprocess_window_flags, adb_client, adb_path, log
+
+# Preview of the TV screen for the remote. Frames are captured, decoded and
+# scaled down to at most MIRROR_MAX_SIZE on a background thread where that
+# can be done without PyAV, and only the newest one is kept; whatever the UI
+# has not picked up by the time the next frame lands is dropped. PNG frames
+# from `screencap -p` reach the UI full size when PyAV is missing.
+
+MIRROR_MAX_SIZE = (512, 288)
+MIRROR_FPS = 4
+MIRROR_ERROR_BACKOFF = 1.0
+SCREENRECORD_BIT_RATE = 2_000_000
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# screencap's raw pixel formats -> offsets of R, G and B in each 4-byte pixel.
+RAW_CHANNELS = {1: (0, 1, 2), 2: (0, 1, 2), 5: (2, 1, 0)}
+
+_av = None
+_av_loaded = False
+
+
+def _load_av():
+    # PyAV (optional) takes a while to import; only pay for it once a preview starts.
+    global _av, _av_loaded
+    if not _av_loaded:
+        try:
+            import av
+            _av = av
+        except ImportError:
+            _av = None
+        _av_loaded = True
+    return _av
+
+
+class MirrorError(Exception):
+    pass
+
+
+class Frame:
+    def __init__(self, data: bytes, fmt: str, width: int, height: int):
+        self.data = data
+        self.format = fmt
+        self.width = width
+        self.height = height
+        self.captured = time.monotonic()
+
+    def __repr__(self):
+        return f"Frame({self.format!r}, {self.width}x{self.height}, {len(self.data)} bytes)"
+
+
+def png_size(data: bytes):
+    if not data.startswith(PNG_SIGNATURE) or data[12:16] != b"IHDR":
+        raise MirrorError(data[:200].decode("utf-8", errors="replace").strip() or "screencap returned no image")
+    return struct.unpack(">II", data[16:24])
+
+
+def fit_size(width: int, height: int, max_size=MIRROR_MAX_SIZE):
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    return max(int(width * scale) // 2 * 2, 2), max(int(height * scale) // 2 * 2, 2)
+
+
+def raw_header(data: bytes):
+    # -> (width, height, pixel format, offset of the first pixel). The header
+    # is width, height and format, plus a colour space word since Android 8.
+    if len(data) >= 12:
+        width, height, fmt = struct.unpack("<III", data[:12])
+        for offset in (12, 16):
+            if width and height and len(data) - offset == width * height * 4:
+                return width, height, fmt, offset
+    raise MirrorError(data[:200].decode("utf-8", errors="replace").strip() or "screencap returned no image")
+
+
+def raw_to_ppm(data: bytes, max_size=MIRROR_MAX_SIZE) -> Frame:
+    # Nearest-neighbour downscale by keeping every n-th pixel of every n-th
+    # row; the strided slices do the per-pixel work in C.
+    width, height, fmt, offset = raw_header(data)
+    if fmt not in RAW_CHANNELS:
+        raise MirrorError(f"unsupported screencap pixel format {fmt}")
+    step = max(math.ceil(width / max_size[0]), math.ceil(height / max_size[1]), 1)
+    stride = width * 4
+    out_w = math.ceil(width / step)
+    out_h = math.ceil(height / step)
+    rgb = bytearray(out_w * out_h * 3)
+    row_bytes = out_w * 3
+    for i, y in enumerate(range(0, height, step)):
+        start = offset + y * stride
+        base = i * row_bytes
+        for channel, src in enumerate(RAW_CHANNELS[fmt]):
+            rgb[base + channel:base + row_bytes:3] = data[start + src:start + stride:step * 4]
+    return Frame(b"P6\n%d %d\n255\n" % (out_w, out_h) + bytes(rgb), "ppm", out_w, out_h)
+
+
+def av_frame_to_ppm(decoded, max_size=MIRROR_MAX_SIZE) -> Frame:
+    w, h = fit_size(decoded.width, decoded.height, max_size)
+    rgb = decoded.reformat(width=w, height=h, format="rgb24")
+    plane = rgb.planes[0]
+    raw = bytes(plane)
+    row = w * 3
+    if plane.line_size != row:
+        raw = b"".join(raw[y * plane.line_size:y * plane.line_size + row] for y in range(h))
+    return Frame(b"P6\n%d %d\n255\n" % (w, h) + raw, "ppm", w, h)
+
+
+def png_to_frame(data: bytes, max_size=MIRROR_MAX_SIZE) -> Frame:
+    width, height = png_size(data)
+    av = _load_av()
+    if av is None:
+        return Frame(data, "png", width, height)
+    try:
+        codec = av.CodecContext.create("png", "r")
+        decoded = codec.decode(av.Packet(data))
+    except (OSError, ValueError) as e:
+        raise MirrorError(f"could not decode screencap: {e}")
+    if not decoded:
+        raise MirrorError("could not decode screencap")
+    return av_frame_to_ppm(decoded[-1], max_size)
+
+
+def local_link(serial: str | None) -> bool:
+    # USB, emulators and anything on this machine; not adb over Wi-Fi or a VPN.
+    if not serial:
+        return False
+    if ":" not in serial or serial.startswith("emulator-"):
+        return True
+    host = serial.rsplit(":", 1)[0].strip("[]")
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# Repeated `screencap`, paced by the mirror to MIRROR_FPS. Over the network
+# it is `screencap -p`: a 1080p raw capture is 8 MB (33 MB/s at 4 fps), far
+# more than Wi-Fi or a VPN carries, while the PNG is a fraction of that.
+# Local links (USB, loopback) take raw frames, which skip PNG encoding on
+# the stick and are scaled down here on the mirror thread.
+class ScreencapSource:
+    paced = True
+
+    def __init__(self, serial: str | None, timeout: float = 10, max_size=MIRROR_MAX_SIZE, raw: bool | None = None):
+        self.serial = serial
+        self.timeout = timeout
+        self.max_size = max_size
+        self.raw = local_link(serial) if raw is None else raw
+        self.link_bytes = 0
+
+    def read(self) -> Frame:
+        args = ["screencap"] if self.raw else ["screencap", "-p"]
+        try:
+            data = adb_client.exec_out(self.serial, " ".join(args), timeout=self.timeout)
+        except AdbServerUnavailable:
+            data = self._read_subprocess(args)
+        except AdbClientError as e:
+            raise MirrorError(str(e))
+        self.link_bytes = len(data)
+        if self.raw:
+            return raw_to_ppm(data, self.max_size)
+        return png_to_frame(data, self.max_size)
+
+    def _read_subprocess(self, args) -> bytes:
+        cmd = [adb_path()] + (["-s", self.serial] if self.serial else []) + ["exec-out"] + args
+        startupinfo, creationflags = _subprocess_window_flags()
+        try:
+            completed = subprocess.run(
+                cmd,
+                capture_output=True,
+                timeout=self.timeout,
+                startupinfo=startupinfo,
+                creationflags=creationflags
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise MirrorError(f"screencap failed: {e}")
+        if completed.returncode != 0:
+            raise MirrorError(completed.stderr.decode("utf-8", errors="replace").strip() or "screencap failed")
+        return completed.stdout
+
+    def close(self) -> None:
+        pass
+
+
+# `screenrecord --output-format=h264` streamed over one exec: socket and
+# decoded with PyAV when it is installed. Every packet has to be decoded to
+# keep the picture intact, but only frames at least 1/fps apart are
+# converted to RGB. Falls back to screencap when the stream cannot start
+# (no decoder, screenrecord missing or refusing a protected screen).
+class ScreenrecordSource:
+    def __init__(self, serial: str | None, max_size=MIRROR_MAX_SIZE, fps: float = MIRROR_FPS):
+        self.serial = serial
+        self.max_size = max_size
+        self.min_interval = 1.0 / fps
+        self.frames = 0
+        self._sock = None
+        self._codec = None
+        self._last_converted = 0.0
+        self._fallback = None if _load_av() is not None else ScreencapSource(serial, max_size=max_size)
+
+    @property
+    def paced(self) -> bool:
+        return self._fallback is not None
+
+    def _open(self):
+        w, h = self.max_size
+        command = f"screenrecord --output-format=h264 --size {w}x{h} --bit-rate {SCREENRECORD_BIT_RATE} -"
+        self._sock = adb_client.open_service(self.serial, f"exec:{command}", timeout=10)
+        self._codec = _load_av().CodecContext.create("h264", "r")
+
+    def read(self) -> Frame:
+        if self._fallback is not None:
+            return self._fallback.read()
+        try:
+            return self._read_stream()
+        except (AdbClientError, OSError, ValueError) as e:
+            self.close()
+            if self.frames:
+                raise MirrorError(f"screenrecord stream failed: {e}")
+            log("screenrecord unavailable, using screencap >", e, error=True)
+            self._fallback = ScreencapSource(self.serial, max_size=self.max_size)
+            return self._fallback.read()
+
+    def _read_stream(self) -> Frame:
+        while True:
+            if self._sock is None:
+                self._open()
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                # screenrecord stops itself after its time limit; start over.
+                self.close()
+                if not self.frames:
+                    raise MirrorError("screenrecord produced no video")
+                continue
+            latest = None
+            for packet in self._codec.parse(chunk):
+                for decoded in self._codec.decode(packet):
+                    latest = decoded
+            if latest is None:
+                continue
+            now = time.monotonic()
+            if self.frames and now - self._last_converted < self.min_interval:
+                continue
+            self._last_converted = now
+            self.frames += 1
+            return av_frame_to_ppm(latest, self.max_size)
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._codec = None
+
+
+def open_source(serial: str | None, max_size=MIRROR_MAX_SIZE, fps: float = MIRROR_FPS):
+    return ScreenrecordSource(serial, max_size, fps)
+
+
+class ScreenMirror:
+    def __init__(self, source, fps: float = MIRROR_FPS, on_error=None):
+        self.source = source
+        self.fps = fps
+        self.on_error = on_error
+        self.frames = 0
+        self.dropped = 0
+        self.errors = 0
+        self.capture_ms = 0.0
+        self.cpu_ms = 0.0
+        self.frame_bytes = 0
+        self._latest = None
+        self._recent = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.source.close()
+
+    def take(self):
+        with self._lock:
+            frame, self._latest = self._latest, None
+        return frame
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            recent = [t for t in self._recent if now - t <= 5.0]
+            self._recent = recent
+            return {
+                "fps": len(recent) / 5.0,
+                "frames": self.frames,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "capture_ms": self.capture_ms,
+                "cpu_ms": self.cpu_ms,
+                "frame_kb": self.frame_bytes / 1024,
+            }
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        while not self._stop.is_set():
+            started = time.monotonic()
+            cpu_started = time.thread_time()
+            try:
+                frame = self.source.read()
+            except (MirrorError, OSError) as e:
+                if self._stop.is_set():
+                    return
+                self.errors += 1
+                if self.on_error is not None:
+                    self.on_error(str(e))
+                self._stop.wait(MIRROR_ERROR_BACKOFF)
+                continue
+            elapsed = time.monotonic() - started
+            cpu = time.thread_time() - cpu_started
+            with self._lock:
+                if self._latest is not None:
+                    self.dropped += 1
+                self._latest = frame
+                self._recent.append(frame.captured)
+                # Smoothed so the stats line does not flicker.
+                weight = 0.2 if self.frames else 1.0
+                self.capture_ms += (elapsed * 1000 - self.capture_ms) * weight
+                self.cpu_ms += (cpu * 1000 - self.cpu_ms) * weight
+                self.frames += 1
+                self.frame_bytes = len(frame.data)
+            if self.source.paced:
+                self._stop.wait(max(interval - elapsed, 0.0))
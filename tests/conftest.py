@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+import adb_commands  # noqa: E402
+from fake_adb_server import FakeAdbServer  # noqa: E402
+
+# The tests talk to the fakes in bench/ over real sockets: fake_adb_server
+# for everything that goes through the adb server (shell commands run in a
+# local sh with device stand-ins), fake_adb_device for adbd endpoints and
+# fake_release_server for the updater.
+
+SERIAL = "192.168.1.50:5555"
+
+
+@pytest.fixture
+def adb_server(monkeypatch):
+    server = FakeAdbServer(0, 0.0, [SERIAL]).start()
+    monkeypatch.setenv("ANDROID_ADB_SERVER_PORT", str(server.port))
+    monkeypatch.setattr(adb_commands.adb_client, "port", server.port)
+    monkeypatch.setattr(adb_commands, "LOG_COMMANDS", False)
+    adb_commands.close_shell_session()
+    yield server
+    adb_commands.close_shell_session()
+    server.stop()
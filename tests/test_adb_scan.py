@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import adb_scan
+from adb_client import AdbClient
+from conftest import SERIAL
+from fake_adb_device import FakeAdbDevice
+
+
+@pytest.fixture
+def fleet(adb_server):
+    # Two retail sticks and one ro.adb.secure=0 build on the same port,
+    # 127.0.0.40/29; the adb server decides which of them trust us.
+    first = FakeAdbDevice("127.0.0.41", 0).start()
+    port = first.server_address[1]
+    devices = [first, FakeAdbDevice("127.0.0.42", port).start(), FakeAdbDevice("127.0.0.43", port, secure=False).start()]
+    adb_scan.clear_scan_cache()
+    yield port, devices
+    adb_scan.clear_scan_cache()
+    for device in devices:
+        device.stop()
+
+
+def test_probe_cannot_see_trust(fleet, adb_server):
+    port, _ = fleet
+    adb_server.set_device(f"127.0.0.41:{port}", "device")
+    # Secure adbd asks for AUTH even when the server already holds a session.
+    assert asyncio.run(adb_scan.probe_adb("127.0.0.41", port)) == "auth"
+    assert asyncio.run(adb_scan.probe_adb("127.0.0.43", port)) == "device"
+    assert asyncio.run(adb_scan.probe_adb("127.0.0.44", port, timeout=0.2)) is None
+
+
+def test_scan_takes_known_states_from_the_adb_server(fleet, adb_server):
+    port, _ = fleet
+    adb_server.set_device(f"127.0.0.41:{port}", "device")
+    adb_server.set_device(f"127.0.0.42:{port}", "unauthorized")
+    reported = []
+    found = adb_scan.scan("127.0.0.40/29", port, timeout=0.2, on_found=reported.append)
+    assert [(r.serial, r.state) for r in found] == [
+        (f"127.0.0.41:{port}", "device"),
+        (f"127.0.0.42:{port}", "auth"),
+        (f"127.0.0.43:{port}", "device"),
+    ]
+    assert sorted(r.serial for r in reported) == [r.serial for r in found]
+
+
+def test_scan_does_not_connect_without_identify(fleet, adb_server):
+    port, _ = fleet
+    requests = adb_server.requests
+    found = adb_scan.scan("127.0.0.40/29", port, timeout=0.2)
+    assert [r.state for r in found] == ["auth", "auth", "device"]
+    # One host:devices for the whole sweep.
+    assert adb_server.requests == requests + 1
+
+
+def test_identify_decides_state_through_the_adb_server(fleet, adb_server):
+    port, _ = fleet
+    adb_server.unauthorized.add(f"127.0.0.42:{port}")
+    found = adb_scan.scan("127.0.0.40/29", port, timeout=0.2, fetch_props=True)
+    assert [(r.state, r.model) for r in found] == [("device", "AFTMM"), ("auth", ""), ("device", "AFTMM")]
+    assert set(adb_server.devices) == {SERIAL}
+
+
+def test_cached_scan_reports_without_probing(fleet):
+    port, devices = fleet
+    first = adb_scan.scan("127.0.0.40/29", port, timeout=0.2)
+    handshakes = sum(d.handshakes for d in devices)
+    reported = []
+    assert adb_scan.scan("127.0.0.40/29", port, timeout=0.2, on_found=reported.append) is first
+    assert reported == first
+    assert sum(d.handshakes for d in devices) == handshakes
+    adb_scan.scan("127.0.0.40/29", port, timeout=0.2, refresh=True)
+    assert sum(d.handshakes for d in devices) == handshakes + 3
+
+
+def test_identify_skips_the_shell_for_untrusted_hosts(adb_server):
+    adb_server.unauthorized.add("127.0.0.42:5555")
+    result = adb_scan.ScanResult("127.0.0.42", 5555, "auth")
+    adb_scan.fetch_device_props(result, AdbClient(port=adb_server.port))
+    assert (result.state, result.model) == ("auth", "")
+    assert "127.0.0.42:5555" not in adb_server.devices
+
+
+def test_identify_disconnects_hosts_it_connected(adb_server):
+    result = adb_scan.ScanResult("127.0.0.41", 5555, "auth")
+    adb_scan.fetch_device_props(result, AdbClient(port=adb_server.port))
+    assert (result.state, result.model) == ("device", "AFTMM")
+    assert result.serial not in adb_server.devices
+
+
+def test_identify_keeps_existing_connections(adb_server):
+    adb_server.set_device("127.0.0.41:5555", "device")
+    result = adb_scan.ScanResult("127.0.0.41", 5555, "auth")
+    adb_scan.fetch_device_props(result, AdbClient(port=adb_server.port))
+    assert result.model == "AFTMM"
+    assert adb_server.devices[result.serial] == "device"
+
+
+def test_offline_hosts_keep_the_server_state(adb_server):
+    adb_server.set_device("127.0.0.41:5555", "offline")
+    result = adb_scan.ScanResult("127.0.0.41", 5555, "auth")
+    adb_scan.fetch_device_props(result, AdbClient(port=adb_server.port))
+    assert (result.state, result.model) == ("offline", "")
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import pytest
+
+from adb_client import AdbClient, AdbClientError
+from adb_commands import (
+    AdbShellSession, escape_adb_input_chunk, get_shell_session, run_adb_command, run_adb_shell
+)
+from conftest import SERIAL
+
+
+def test_shell_returns_output_and_exit_status(adb_server):
+    client = AdbClient(port=adb_server.port)
+    assert client.shell(SERIAL, "echo one; echo two") == (True, "one\ntwo", "")
+    assert client.shell(SERIAL, "exit 3") == (False, "", "exit code 3")
+    ok, out, err = client.shell(SERIAL, "echo broken >&2; false")
+    assert (ok, out, err) == (False, "", "broken")
+
+
+def test_shell_fails_for_unknown_device(adb_server):
+    with pytest.raises(AdbClientError):
+        AdbClient(port=adb_server.port).shell("10.0.0.99:5555", "true")
+
+
+def test_session_frames_every_command(adb_server):
+    assert run_adb_shell(["echo", "hello"], SERIAL) == (True, "hello", "")
+    assert run_adb_shell(["exit", "4"], SERIAL) == (False, "", "exit code 4")
+    # Output without a trailing newline must not swallow the marker.
+    assert run_adb_shell(["printf", "no-newline"], SERIAL) == (True, "no-newline", "")
+    # A command that reads stdin gets nothing rather than the next command.
+    assert run_adb_shell(["cat"], SERIAL) == (True, "", "")
+    assert run_adb_shell(["echo", "after"], SERIAL) == (True, "after", "")
+
+
+def test_session_is_reused(adb_server):
+    run_adb_shell(["true"], SERIAL)
+    requests = adb_server.requests
+    for _ in range(5):
+        assert run_adb_shell(["true"], SERIAL)[0]
+    assert adb_server.requests == requests
+
+
+def test_session_restarts_after_the_shell_exits(adb_server):
+    session = get_shell_session(SERIAL)
+    assert session.run("echo before") == (True, "before", "")
+    session.close()
+    assert run_adb_shell(["echo", "again"], SERIAL) == (True, "again", "")
+
+
+def test_command_is_not_rerun_after_a_timeout(adb_server, tmp_path):
+    marker = tmp_path / "runs"
+    ok, _, err = run_adb_shell([f"echo run >> {marker}; sleep 1"], SERIAL, timeout=0.2)
+    assert not ok and "timed out" in err
+    time.sleep(1.5)
+    assert marker.read_text().splitlines() == ["run"]
+    assert run_adb_shell(["echo", "next"], SERIAL) == (True, "next", "")
+
+
+def test_session_that_cannot_start_falls_back(adb_server, monkeypatch):
+    def refuse(self):
+        from adb_commands import AdbSessionError
+        raise AdbSessionError("no shell")
+    monkeypatch.setattr(AdbShellSession, "start", refuse)
+    assert run_adb_shell(["echo", "via socket"], SERIAL) == (True, "via socket", "")
+
+
+@pytest.mark.parametrize("text", [
+    "#tag", "a" * 31 + " #tag", "~root", "it's \"quoted\"", "$HOME `id` $(id)", "a;b&c|d", "(x) [y] {z} *?!",
+    "back\\slash",
+])
+def test_input_text_escaping_survives_the_framed_shell(adb_server, text):
+    ok, out, err = run_adb_shell(["printf", "%s", escape_adb_input_chunk(text)], SERIAL, timeout=5)
+    assert (ok, err) == (True, "")
+    # `input text` turns %s into a space; printf leaves it as is.
+    assert out == text.replace(" ", "%s").strip()
+
+
+def test_run_adb_command_uses_the_adb_executable(adb_server, monkeypatch, tmp_path):
+    fake_adb = os.path.join(os.path.dirname(__file__), os.pardir, "bench", "fake_adb.py")
+    shim = tmp_path / "adb"
+    shim.write_text(f"#!/bin/sh\nexec {sys.executable} {os.path.abspath(fake_adb)} \"$@\"\n")
+    shim.chmod(0o755)
+    import adb_commands
+    monkeypatch.setattr(adb_commands, "adb_path", lambda: str(shim))
+    ok, out, err = run_adb_command(["-s", SERIAL, "shell", "echo", "spawned"])
+    assert (ok, out.strip()) == (True, "spawned"), err
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import os
+import time
+import zipfile
+
+import pytest
+
+import adb_commands
+import bin_update
+import FirestickRemote
+from adb_client import AdbClient
+from adb_commands import DeviceTracker, device_tracker
+from bin_update import BinUpdateError
+from conftest import SERIAL
+from downloads import DownloadManager
+from fake_release_server import FakeReleaseServer
+
+
+def _bin_files(version: str, adb: bytes) -> dict:
+    return {"adb.exe": adb, "AdbWinApi.dll": b"dll" * 1000, "bin_version.txt": version.encode("ascii")}
+
+
+def _zip(files: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return buf.getvalue()
+
+
+def _snapshot(bin_dir) -> dict:
+    return {path.name: path.read_bytes() for path in sorted(bin_dir.iterdir())}
+
+
+@pytest.fixture
+def updater(tmp_path, monkeypatch):
+    server = FakeReleaseServer().start()
+    kills = []
+    monkeypatch.setattr(FirestickRemote, "update_downloads", DownloadManager(str(tmp_path / "cache"), timeout=5))
+    monkeypatch.setattr(bin_update, "BIN_SWAP_RETRY_DELAY", 0.01)
+
+    def run_adb_command(args):
+        kills.append((args[0], device_tracker.paused))
+        return True, "", ""
+    monkeypatch.setattr(FirestickRemote, "run_adb_command", run_adb_command)
+
+    def apply(files, required, per_file=True):
+        manifest = {"bin_required_version": required, "bin_asset": "bin_update.zip"}
+        server.add_asset("bin_update.zip", _zip(files))
+        if per_file:
+            manifest["bin_files"] = {}
+            for name, data in files.items():
+                digest = hashlib.sha256(data).hexdigest()
+                server.add_asset(f"bin-{digest[:12]}-{name}", data)
+                manifest["bin_files"][name] = {"sha256": digest, "asset": f"bin-{digest[:12]}-{name}"}
+        return FirestickRemote.apply_bin_update(server.release, manifest, str(tmp_path / "bin"))
+
+    yield apply, server, kills
+    server.stop()
+
+
+def test_delta_update_fetches_only_changed_files(updater, tmp_path):
+    apply, server, kills = updater
+    v1 = _bin_files("1.0.0", b"MZ adb 1")
+    assert sorted(apply(v1, "1.0.0", per_file=False)) == sorted(v1)
+    (tmp_path / "bin" / "firestick_remote_adbkey").write_bytes(b"key")
+
+    server.requests.clear()
+    v2 = _bin_files("1.1.0", b"MZ adb 2")
+    assert sorted(apply(v2, "1.1.0")) == ["adb.exe", "bin_version.txt"]
+    fetched = sorted(path.rsplit("-", 1)[1] for path, _, _ in server.requests)
+    assert fetched == ["adb.exe", "bin_version.txt"]
+    assert _snapshot(tmp_path / "bin") == dict(v2, firestick_remote_adbkey=b"key")
+    assert kills == [("kill-server", True)] * 2
+    assert not device_tracker.paused
+
+
+def test_failed_validation_rolls_back(updater, tmp_path):
+    apply, _, _ = updater
+    v2 = _bin_files("1.1.0", b"MZ adb 2")
+    apply(v2, "1.1.0")
+    (tmp_path / "bin" / "firestick_remote_adbkey").write_bytes(b"key")
+
+    with pytest.raises(BinUpdateError, match="previous bin restored"):
+        apply(_bin_files("1.1.0", b"MZ adb 3"), "1.2.0")
+    assert _snapshot(tmp_path / "bin") == dict(v2, firestick_remote_adbkey=b"key")
+    assert sorted(os.listdir(tmp_path)) == ["bin", "cache"]
+
+
+def test_unchanged_bin_downloads_nothing(updater, tmp_path):
+    apply, server, kills = updater
+    v2 = _bin_files("1.1.0", b"MZ adb 2")
+    apply(v2, "1.1.0")
+    server.requests.clear()
+    assert apply(v2, "1.1.0") == []
+    assert server.requests == [] and kills == [("kill-server", True)]
+
+
+def _lock(monkeypatch, path, times):
+    # Fails the rename of path away from its place `times` times, like
+    # Windows does while adb.exe in it is still running.
+    replace = os.replace
+    failures = []
+
+    def locked_replace(src, dst):
+        if os.path.abspath(src) == os.path.abspath(path) and len(failures) < times:
+            failures.append(dst)
+            raise PermissionError(13, "The process cannot access the file", src)
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", locked_replace)
+    return failures
+
+
+def test_swap_waits_for_a_locked_bin(updater, tmp_path, monkeypatch):
+    apply, _, _ = updater
+    apply(_bin_files("1.1.0", b"MZ adb 2"), "1.1.0")
+    failures = _lock(monkeypatch, tmp_path / "bin", 3)
+    v3 = _bin_files("1.2.0", b"MZ adb 3")
+    apply(v3, "1.2.0")
+    assert len(failures) == 3
+    assert _snapshot(tmp_path / "bin") == v3
+    assert sorted(os.listdir(tmp_path)) == ["bin", "cache"]
+
+
+def test_bin_that_stays_locked_is_kept(updater, tmp_path, monkeypatch):
+    apply, _, _ = updater
+    v2 = _bin_files("1.1.0", b"MZ adb 2")
+    apply(v2, "1.1.0")
+    _lock(monkeypatch, tmp_path / "bin", bin_update.BIN_SWAP_ATTEMPTS)
+    with pytest.raises(BinUpdateError, match="previous bin kept"):
+        apply(_bin_files("1.2.0", b"MZ adb 3"), "1.2.0")
+    assert _snapshot(tmp_path / "bin") == v2
+    assert sorted(os.listdir(tmp_path)) == ["bin", "cache"]
+    assert not device_tracker.paused
+
+
+def test_paused_tracker_does_not_restart_the_server(adb_server, monkeypatch):
+    starts = []
+    monkeypatch.setattr(adb_commands, "run_adb_command", lambda args: starts.append(args) or (True, "", ""))
+    tracker = DeviceTracker(AdbClient(port=adb_server.port))
+    tracker.start()
+    try:
+        deadline = time.monotonic() + 2
+        while tracker.state(SERIAL) != "device" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert tracker.connected and tracker.state(SERIAL) == "device"
+        tracker.pause()
+        adb_server.kill()
+        time.sleep(1.0)
+        assert starts == [] and not tracker.connected
+        tracker.resume()
+        time.sleep(2.0)
+        assert ["start-server"] in starts
+    finally:
+        tracker.stop()
@@ -0,0 +1,69 @@
+import pytest
+
+from console import ConsoleBuffer
+
+
+def _texts(entries):
+    return [entry[3] for entry in entries]
+
+
+def test_buffer_is_trimmed_in_bulk_to_the_limit():
+    buffer = ConsoleBuffer(max_lines=100, trim_slack=20)
+    buffer.append("\n".join(f"line {i}" for i in range(120)))
+    assert len(buffer) == 120 and buffer.first_seq == 0
+    buffer.append("line 120")
+    assert len(buffer) == 100 and buffer.first_seq == 21
+    first, entries = buffer.lines_since(0)
+    assert first == 21 and _texts(entries) == [f"line {i}" for i in range(21, 121)]
+
+
+def test_lines_since_returns_only_new_lines():
+    buffer = ConsoleBuffer()
+    buffer.append("one\ntwo")
+    _, entries = buffer.lines_since(0)
+    buffer.append("three")
+    assert _texts(buffer.lines_since(entries[-1][0] + 1)[1]) == ["three"]
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_search_matches_substrings_case_insensitively(indexed):
+    buffer = ConsoleBuffer(max_lines=50, trim_slack=0, indexed=indexed)
+    for i in range(80):
+        buffer.append(f"pkg com.amazon.app{i} version={i % 7}")
+    buffer.append("ERROR: Activity not found")
+    assert _texts(buffer.search("activity NOT")) == ["ERROR: Activity not found"]
+    assert _texts(buffer.search("APP4")) == [f"pkg com.amazon.app{i} version={i % 7}" for i in range(40, 50)]
+    # The first 31 lines were trimmed away and are not found any more.
+    assert buffer.search("app3 ") == [] and len(buffer.search("app3")) == 9
+    # Queries shorter than a trigram scan every line.
+    assert len(buffer.search("=3")) == len([i for i in range(31, 80) if i % 7 == 3])
+    assert buffer.search("no such text") == []
+
+
+def test_index_and_scan_agree():
+    indexed, scanned = ConsoleBuffer(200, 10), ConsoleBuffer(200, 10, indexed=False)
+    for i in range(500):
+        line = f"{i:04d} {'abc' if i % 3 else 'xyz'} {i * 37 % 101}"
+        indexed.append(line)
+        scanned.append(line)
+    for query in ("xyz", "abc 1", "0450", "bc 9", "99"):
+        assert indexed.search(query) == scanned.search(query)
+
+
+def test_blocks_go_once_their_lines_are_trimmed():
+    buffer = ConsoleBuffer(max_lines=10, trim_slack=0)
+    old = buffer.begin_block("$ old")
+    buffer.append("a\nb", old)
+    new = buffer.begin_block("$ new")
+    buffer.append("\n".join("x" * 9), new)
+    assert list(buffer.blocks) == [new]
+    assert buffer.blocks[new].last_seq == buffer.next_seq - 1
+
+
+def test_clear_keeps_sequence_numbers_moving():
+    buffer = ConsoleBuffer()
+    buffer.append("one\ntwo")
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.search("one") == []
+    buffer.append("three")
+    assert buffer.lines_since(0) == (2, [(2, None, None, "three")])
@@ -0,0 +1,102 @@
+import hashlib
+import os
+
+import pytest
+
+import downloads
+from downloads import DownloadError, DownloadManager
+from fake_release_server import FakeReleaseServer
+
+ASSET = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def release():
+    server = FakeReleaseServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloads.time, "sleep", lambda seconds: None)
+    return DownloadManager(str(tmp_path / "cache"), timeout=5, retries=0)
+
+
+def _partials(manager):
+    path = os.path.join(manager.cache_dir, "partial")
+    return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+
+def test_release_json_is_revalidated_with_its_etag(release, manager):
+    first = manager.get_json(release.release_url)
+    assert manager.get_json(release.release_url) == first
+    assert manager.not_modified == 1
+    assert [code for _, code, _ in release.requests] == [200, 304]
+    assert manager.get_json(release.release_url, max_age=60) == first
+    assert manager.fresh_hits == 1 and len(release.requests) == 2
+
+
+def test_changed_release_json_is_downloaded_again(release, manager):
+    manager.get_json(release.release_url)
+    release.release["tag_name"] = "v1"
+    assert manager.get_json(release.release_url)["tag_name"] == "v1"
+    assert manager.not_modified == 0
+
+
+def test_interrupted_download_resumes_with_a_range_request(release, manager):
+    sha = release.add_asset("adb.exe", ASSET)
+    url = release.url("/download/adb.exe")
+    release.drop_after = 100 * 1024
+    with pytest.raises(DownloadError):
+        manager.fetch(url, sha)
+    assert _partials(manager) == [sha + ".part", sha + ".part.json"]
+    blob = manager.fetch(url, sha)
+    with open(blob, "rb") as f:
+        assert f.read() == ASSET
+    assert [(code, sent) for _, code, sent in release.requests] == [(200, 100 * 1024), (206, 200 * 1024)]
+    assert _partials(manager) == []
+
+
+def test_changed_asset_restarts_instead_of_resuming(release, manager):
+    release.add_asset("adb.exe", os.urandom(len(ASSET)))
+    url = release.url("/download/adb.exe")
+    release.drop_after = 100 * 1024
+    with pytest.raises(DownloadError):
+        manager.fetch(url)
+    release.add_asset("adb.exe", ASSET)
+    with open(manager.fetch(url), "rb") as f:
+        assert f.read() == ASSET
+    assert [code for _, code, _ in release.requests] == [200, 200]
+
+
+def test_checksum_mismatch_keeps_nothing(release, manager):
+    release.add_asset("adb.exe", ASSET)
+    sha = hashlib.sha256(b"other").hexdigest()
+    with pytest.raises(DownloadError, match="Checksum mismatch"):
+        manager.fetch(release.url("/download/adb.exe"), sha)
+    blobs = os.path.join(manager.cache_dir, "blobs")
+    assert not os.path.isdir(blobs) or os.listdir(blobs) == []
+    assert _partials(manager) == []
+
+
+def test_cached_blob_is_used_without_a_request(release, manager):
+    sha = release.add_asset("adb.exe", ASSET)
+    url = release.url("/download/adb.exe")
+    assert manager.fetch(url, sha) == manager.fetch(url, sha)
+    assert manager.cache_hits == 1 and len(release.requests) == 1
+
+
+def test_client_errors_are_not_retried(release, manager):
+    manager.retries = 3
+    with pytest.raises(DownloadError, match="HTTP 404"):
+        manager.fetch(release.url("/download/missing.zip"))
+    assert len(release.requests) == 1
+
+
+def test_server_errors_are_retried(release, manager):
+    manager.retries = 3
+    sha = release.add_asset("adb.exe", ASSET)
+    release.fail("/download/adb.exe", 503, 429)
+    manager.fetch(release.url("/download/adb.exe"), sha)
+    assert [code for _, code, _ in release.requests] == [503, 429, 200]
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from adb_commands import ActionExecutor, device_lane, slow_lane
+
+
+@pytest.fixture
+def executor():
+    executor = ActionExecutor({"device": (1, 4), "slow": (2, 2)})
+    yield executor
+    executor.shutdown()
+
+
+def _wait(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_device_lane_runs_actions_in_order(executor):
+    done = []
+    for i in range(4):
+        assert executor.submit(device_lane("a"), done.append, i)
+    assert _wait(lambda: len(done) == 4)
+    assert done == [0, 1, 2, 3]
+
+
+def test_full_lane_rejects_instead_of_queueing(executor):
+    release = threading.Event()
+    executor.submit(device_lane("a"), release.wait)
+    assert _wait(lambda: executor.stats()[device_lane("a")]["depth"] == 0)
+    accepted = [executor.submit(device_lane("a"), time.sleep, 0) for _ in range(6)]
+    assert accepted == [True] * 4 + [False] * 2
+    assert executor.stats()[device_lane("a")]["rejected"] == 2
+    release.set()
+    assert _wait(lambda: executor.stats()[device_lane("a")]["completed"] == 5)
+
+
+def test_busy_lane_does_not_hold_up_others(executor):
+    release = threading.Event()
+    executor.submit(device_lane("a"), release.wait)
+    other = threading.Event()
+    executor.submit(device_lane("b"), other.set)
+    assert other.wait(1)
+    release.set()
+
+
+def test_thread_count_is_bounded_by_the_lane_limits(executor):
+    release = threading.Event()
+    threads = set()
+
+    def work():
+        threads.add(threading.current_thread())
+        release.wait()
+    accepted = sum(executor.submit(slow_lane(None), work) for _ in range(20))
+    # At most two running plus two queued; the rest is turned away.
+    assert 2 <= accepted <= 4
+    assert _wait(lambda: len(threads) == 2)
+    release.set()
+    assert _wait(lambda: executor.stats()[slow_lane(None)]["completed"] == accepted)
+    assert len(threads) == 2
+
+
+def test_failing_action_does_not_stop_the_worker(executor):
+    done = threading.Event()
+    executor.submit(device_lane("a"), lambda: 1 / 0)
+    executor.submit(device_lane("a"), done.set)
+    assert done.wait(1)
+
+
+def test_closed_lane_drops_queued_work(executor):
+    release = threading.Event()
+    ran = []
+    executor.submit(device_lane("a"), release.wait)
+    assert _wait(lambda: executor.stats()[device_lane("a")]["depth"] == 0)
+    executor.submit(device_lane("a"), ran.append, 1)
+    executor.close_lane(device_lane("a"))
+    release.set()
+    time.sleep(0.1)
+    assert ran == [] and device_lane("a") not in executor.stats()
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+import keep_alive
+from adb_commands import ActionExecutor, run_adb_shell
+from conftest import SERIAL
+from keep_alive import KeepAlive, TimerWheel
+
+
+@pytest.fixture
+def wheel():
+    wheel = TimerWheel(tick=0.02, slots=8)
+    yield wheel
+    wheel.stop()
+
+
+@pytest.fixture
+def executor():
+    executor = ActionExecutor()
+    yield executor
+    executor.shutdown()
+
+
+def _wait(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def _settings(serial):
+    ok, out, _ = run_adb_shell(["settings get global stay_on_while_plugged_in; "
+                                "settings get secure screensaver_enabled"], serial)
+    assert ok
+    return out.splitlines()
+
+
+def test_timers_fire_after_their_delay(wheel):
+    fired = {}
+    started = time.monotonic()
+    for delay in (0.05, 0.1, 0.3):
+        # 0.3 s is two turns of this 8 x 20 ms wheel.
+        wheel.schedule(delay, lambda d: fired.setdefault(d, time.monotonic() - started), delay)
+    assert _wait(lambda: len(fired) == 3)
+    for delay, at in fired.items():
+        assert delay <= at < delay + 0.1
+    assert wheel.pending == 0
+
+
+def test_cancelled_timers_do_not_fire(wheel):
+    fired = threading.Event()
+    timer = wheel.schedule(0.05, fired.set)
+    wheel.cancel(timer)
+    assert not fired.wait(0.2)
+    assert wheel.pending == 0
+
+
+def test_stopped_wheel_drops_everything(wheel):
+    fired = threading.Event()
+    wheel.schedule(0.05, fired.set)
+    wheel.stop()
+    wheel.schedule(0.05, fired.set)
+    assert not fired.wait(0.2) and wheel.pending == 0
+
+
+def test_pings_repeat_at_the_interval(adb_server, wheel, executor, monkeypatch):
+    monkeypatch.setattr(keep_alive, "jittered", lambda interval: interval)
+    alive = KeepAlive(executor, wheel, interval=0.2, use_settings=False)
+    alive.add(SERIAL)
+    time.sleep(1.1)
+    alive.remove(SERIAL)
+    assert alive.mode(SERIAL) is None
+    # Due at 0.2, 0.4 ... 1.0 s, give or take the time a ping takes.
+    assert 4 <= alive.pings <= 5
+    pings = alive.pings
+    time.sleep(0.4)
+    assert alive.pings == pings
+
+
+def test_settings_override_is_put_back(adb_server, wheel, executor, tmp_path, monkeypatch):
+    monkeypatch.setenv("FSR_FAKE_SETTINGS_DIR", str(tmp_path))
+    assert run_adb_shell(["settings", "put", "global", "stay_on_while_plugged_in", "0"], SERIAL)[0]
+    saved = []
+    alive = KeepAlive(executor, wheel, on_saved=saved.append)
+    alive.add(SERIAL)
+    assert _wait(lambda: alive.mode(SERIAL) == "settings")
+    assert _settings(SERIAL) == ["7", "0"]
+    assert saved[-1] == {SERIAL: {"global/stay_on_while_plugged_in": "0", "secure/screensaver_enabled": "null"}}
+
+    alive.remove(SERIAL)
+    assert alive.restore(SERIAL)
+    assert _settings(SERIAL) == ["0", "null"]
+    assert saved[-1] == {} and not alive.has_saved(SERIAL)
+
+
+def test_refused_override_falls_back_to_pings(adb_server, wheel, executor, monkeypatch):
+    # Without a settings dir the fake stick ignores writes, like one that refuses them.
+    monkeypatch.delenv("FSR_FAKE_SETTINGS_DIR", raising=False)
+    alive = KeepAlive(executor, wheel, interval=0.1)
+    alive.add(SERIAL)
+    assert _wait(lambda: alive.mode(SERIAL) == "ping")
+    assert _wait(lambda: alive.pings >= 2)
+    alive.stop()
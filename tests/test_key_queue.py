@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+import adb_commands
+from adb_commands import ActionExecutor, KeyEventQueue, device_lane
+from conftest import SERIAL
+
+
+@pytest.fixture
+def executor():
+    executor = ActionExecutor()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    calls = []
+
+    def run_adb_shell(args, serial=None, timeout=30, use_session=True):
+        calls.append(args[2:])
+        return True, "", ""
+    monkeypatch.setattr(adb_commands, "run_adb_shell", run_adb_shell)
+    return calls
+
+
+def _hold_lane(executor):
+    # Keeps the device lane busy until the returned event is set.
+    release = threading.Event()
+    executor.submit(device_lane(SERIAL), release.wait)
+    return release
+
+
+def _settle(queue, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while (queue.backlog() or queue._scheduled) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class FailingInjector:
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, keycodes):
+        self.calls += 1
+        return 0, "raw key stream closed"
+
+    def close(self):
+        pass
+
+
+def test_keys_pressed_while_busy_go_out_in_one_command(executor, sent):
+    queue = KeyEventQueue(SERIAL, executor)
+    release = _hold_lane(executor)
+    for keycode in (19, 19, 19, 22, 23):
+        queue.push(keycode)
+    release.set()
+    _settle(queue)
+    assert sent == [["19", "19", "19", "22", "23"]]
+
+
+def test_batches_are_capped(executor, sent):
+    queue = KeyEventQueue(SERIAL, executor, max_backlog=20, max_batch=4)
+    release = _hold_lane(executor)
+    for _ in range(10):
+        queue.push(20)
+    release.set()
+    _settle(queue)
+    assert [len(batch) for batch in sent] == [4, 4, 2]
+
+
+def test_full_backlog_drops_the_oldest_presses(executor, sent):
+    queue = KeyEventQueue(SERIAL, executor, max_backlog=8)
+    release = _hold_lane(executor)
+    for keycode in range(1, 13):
+        queue.push(keycode)
+    assert queue.backlog() == 8 and queue.dropped == 4
+    release.set()
+    _settle(queue)
+    assert sent == [[str(k) for k in range(5, 13)]]
+
+
+def test_queue_keeps_draining_after_on_error_raises(executor, sent):
+    errors = []
+
+    def on_error(message, keycodes):
+        errors.append(message)
+        raise RuntimeError("listener bug")
+    queue = KeyEventQueue(SERIAL, executor, on_error=on_error, injector=FailingInjector())
+    queue.push(3)
+    _settle(queue)
+    assert errors == ["raw key stream closed"] and not queue._scheduled
+    queue.set_injector(None)
+    queue.push(4)
+    _settle(queue)
+    assert sent == [["4"]]
+
+
+def test_stopped_queue_ignores_presses(executor, sent):
+    queue = KeyEventQueue(SERIAL, executor)
+    queue.stop()
+    queue.push(3)
+    time.sleep(0.1)
+    assert sent == [] and queue.backlog() == 0
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from conftest import SERIAL
+from logcat import LEVEL, MESSAGE, PID, TAG, LogcatReader, LogStore, format_entry, logcat_args, parse_query
+
+LINES = [
+    "--------- beginning of main",
+    "10-16 12:00:00.001  1234  1240 I ActivityManager: Start proc com.amazon.tv.launcher",
+    "10-16 12:00:00.002  1234  1241 D ActivityManager: idle",
+    "10-16 12:00:00.003  2048  2050 W Netflix : buffering stalled",
+    "10-16 12:00:00.004  2048  2051 E Netflix : playback failed: DRM error",
+    "10-16 12:00:00.005   512   512 F libc    : Fatal signal 11 (SIGSEGV)",
+    "not a logcat line",
+]
+
+
+@pytest.fixture
+def store():
+    store = LogStore()
+    for line in LINES:
+        store.add_line(line)
+    return store
+
+
+def test_filters_are_built_for_the_device():
+    assert logcat_args(["Netflix", "ActivityManager:D"], "w", pid=2048, tail=100) == [
+        "logcat", "-v", "threadtime", "-T", "100", "--pid=2048", "Netflix:W", "ActivityManager:D", "*:S",
+    ]
+    assert logcat_args(level="E", tail=0) == ["logcat", "-v", "threadtime", "*:E"]
+
+
+def test_search_query_is_parsed():
+    assert parse_query("tag:Netflix level:warn pid:2048 drm  error") == {
+        "tag": "Netflix", "level": "W", "pid": 2048, "text": "drm error",
+    }
+    assert parse_query("pid:abc") == {"pid": -1}
+
+
+def test_lines_are_parsed_and_counted(store):
+    assert len(store) == 5 and store.unparsed == 1
+    entry = store.query(tag="Netflix")[-1]
+    assert (entry[PID], entry[LEVEL], entry[TAG], entry[MESSAGE]) == (2048, "E", "Netflix", "playback failed: DRM error")
+    assert format_entry(entry) == "10-16 12:00:00.004  2048  2051 E Netflix: playback failed: DRM error"
+
+
+def test_queries_combine_tag_pid_level_and_text(store):
+    def messages(**query):
+        return [e[MESSAGE] for e in store.query(**query)]
+    assert messages(tag="ActivityManager") == ["Start proc com.amazon.tv.launcher", "idle"]
+    assert messages(pid=2048, level="E") == ["playback failed: DRM error"]
+    assert messages(level="W") == ["buffering stalled", "playback failed: DRM error", "Fatal signal 11 (SIGSEGV)"]
+    assert messages(text="netflix") == ["buffering stalled", "playback failed: DRM error"]
+    assert messages(text="drm", level="I", limit=1) == ["playback failed: DRM error"]
+    assert messages(tag="Nope") == [] and messages(pid=1) == []
+
+
+def test_store_is_trimmed_and_indexes_follow():
+    store = LogStore(max_entries=10, trim_slack=5)
+    for i in range(40):
+        store.add_line(f"10-16 12:00:{i:02d}.000  {100 + i % 2}  1 {'IW'[i % 2]} Tag{i % 4}: message {i}")
+    assert 10 <= len(store) <= 15 and store.first_seq == store.next_seq - len(store)
+    kept = store.query()
+    assert kept[0][MESSAGE] == f"message {40 - len(store)}"
+    assert store.query(tag="Tag1") == [e for e in kept if e[TAG] == "Tag1"]
+    assert store.query(pid=101, level="W") == [e for e in kept if e[PID] == 101]
+
+
+def test_export_writes_what_is_shown(store, tmp_path):
+    path = tmp_path / "log.txt"
+    assert store.export(str(path), store.query(level="E")) == 2
+    assert path.read_text().splitlines()[0].endswith("E Netflix: playback failed: DRM error")
+
+
+def test_reader_streams_from_the_device(adb_server, tmp_path, monkeypatch):
+    log = tmp_path / "logcat.txt"
+    log.write_text("\n".join(LINES) + "\n")
+    monkeypatch.setenv("FSR_FAKE_LOGCAT", str(log))
+    store = LogStore()
+    seen = []
+    done = threading.Event()
+    reader = LogcatReader(SERIAL, store, tags=["Netflix"], on_entry=seen.append, on_done=lambda ok, msg: done.set())
+    reader.start()
+    assert done.wait(5)
+    assert len(seen) == 5 and store.query(tag="Netflix") == seen[2:4]
@@ -0,0 +1,22 @@
+import pytest
+
+from macros import Macro, parse_script
+
+
+def test_inline_comments_are_not_step_arguments():
+    steps = parse_script("# open home\nkeys HOME # go home\ntext hi # note\nsleep 0.5  # settle\n")
+    assert steps == [("keys", ["3"]), ("text", ["hi"]), ("sleep", [0.5])]
+
+
+def test_quoted_hash_is_text():
+    assert parse_script("text '#tag' \"C#\"") == [("text", ["#tag", "C#"])]
+
+
+def test_recorded_text_with_a_hash_round_trips():
+    macro = Macro([("text", ["C# #1"]), ("keys", ["3"])])
+    assert Macro.from_text(macro.to_text()).steps == macro.steps
+
+
+def test_unknown_steps_name_the_line():
+    with pytest.raises(ValueError, match="line 2: unknown step 'tap'"):
+        parse_script("keys HOME\ntap 1 2 # not a step\n")
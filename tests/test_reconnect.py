@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from adb_commands import REPLAY_MAX_KEYS, ReconnectSupervisor
+
+TARGET = "192.168.1.60:5555"
+
+
+class Events:
+    def __init__(self):
+        self.items = []
+        self.done = threading.Event()
+
+    def __call__(self, serial, kind, info):
+        self.items.append((serial, kind, info))
+        if kind in ("reconnected", "gave_up"):
+            self.done.set()
+
+    def kinds(self):
+        return [kind for _, kind, _ in self.items]
+
+
+@pytest.fixture
+def events():
+    return Events()
+
+
+def test_lost_device_is_reconnected_through_the_server(adb_server, events):
+    supervisor = ReconnectSupervisor(events, base_delay=0.01, max_attempts=5)
+    supervisor.lost(TARGET)
+    assert supervisor.is_reconnecting(TARGET)
+    assert events.done.wait(2)
+    assert events.kinds() == ["attempt", "reconnected"]
+    assert adb_server.devices[TARGET] == "device"
+    assert supervisor.reconnects == {TARGET: 1} and not supervisor.is_reconnecting(TARGET)
+
+
+def test_safe_keys_pressed_while_down_are_replayed(adb_server, events):
+    adb_server.set_device(TARGET, "unauthorized")
+    supervisor = ReconnectSupervisor(events, base_delay=0.05, max_delay=0.05, max_attempts=50)
+    supervisor.lost(TARGET)
+    for keycode in (19, 26, 20, 223, 23):
+        supervisor.buffer_key(TARGET, keycode)
+    time.sleep(0.2)
+    adb_server.set_device(TARGET, "device")
+    assert events.done.wait(2)
+    _, kind, info = events.items[-1]
+    # Power and sleep are never replayed.
+    assert kind == "reconnected" and info["keys"] == [19, 20, 23]
+    assert info["attempts"] >= 2 and info["downtime"] >= 0.2
+
+
+def test_replay_buffer_keeps_only_the_newest_keys(adb_server, events):
+    adb_server.set_device(TARGET, "unauthorized")
+    supervisor = ReconnectSupervisor(events, base_delay=0.05, max_delay=0.05, max_attempts=50)
+    supervisor.lost(TARGET)
+    for keycode in range(REPLAY_MAX_KEYS + 5):
+        supervisor.buffer_key(TARGET, 100 + keycode)
+    adb_server.set_device(TARGET, "device")
+    assert events.done.wait(2)
+    assert events.items[-1][2]["keys"] == list(range(105, 105 + REPLAY_MAX_KEYS))
+
+
+def test_keys_are_not_buffered_for_connected_devices(adb_server, events):
+    supervisor = ReconnectSupervisor(events)
+    assert not supervisor.buffer_key(TARGET, 19)
+
+
+def test_unauthorized_device_gives_up(adb_server, events):
+    adb_server.unauthorized.add(TARGET)
+    supervisor = ReconnectSupervisor(events, base_delay=0.01, max_delay=0.01, max_attempts=3)
+    supervisor.lost(TARGET)
+    assert events.done.wait(2)
+    assert events.kinds() == ["attempt"] * 3 + ["gave_up"]
+    assert not supervisor.is_reconnecting(TARGET) and supervisor.reconnects == {}
+
+
+def test_cancel_stops_the_retry_loop(adb_server, events):
+    adb_server.unauthorized.add(TARGET)
+    supervisor = ReconnectSupervisor(events, base_delay=0.05, max_delay=0.05, max_attempts=50)
+    supervisor.lost(TARGET)
+    time.sleep(0.15)
+    supervisor.cancel(TARGET)
+    attempts = len(events.items)
+    time.sleep(0.2)
+    assert len(events.items) == attempts and not events.done.is_set()
+
+
+def test_backoff_doubles_up_to_the_cap_with_jitter():
+    supervisor = ReconnectSupervisor(base_delay=1.0, max_delay=30.0)
+    for attempt, nominal in ((0, 1.0), (1, 2.0), (3, 8.0), (10, 30.0)):
+        delays = [supervisor._delay(attempt) for _ in range(200)]
+        assert nominal * 0.5 <= min(delays) and max(delays) <= nominal * 1.5
+        assert max(delays) - min(delays) > nominal * 0.5
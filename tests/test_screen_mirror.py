@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+import screen_mirror
+from conftest import SERIAL
+from fake_frames import FakeFrameSource, make_png, make_ppm, make_screencap
+from screen_mirror import (
+    MIRROR_MAX_SIZE, MirrorError, ScreencapSource, ScreenMirror, local_link, png_size, raw_header, raw_to_ppm
+)
+
+
+@pytest.mark.parametrize("colorspace", [True, False])
+def test_raw_header_with_and_without_colour_space(colorspace):
+    data = make_screencap(64, 36, colorspace=colorspace)
+    assert raw_header(data) == (64, 36, 1, 16 if colorspace else 12)
+
+
+@pytest.mark.parametrize("fmt", [1, 5])
+def test_full_size_frames_pass_through_unchanged(fmt):
+    frame = raw_to_ppm(make_screencap(128, 72, phase=2, fmt=fmt), max_size=(128, 72))
+    assert (frame.format, frame.width, frame.height) == ("ppm", 128, 72)
+    assert frame.data == make_ppm(128, 72, phase=2)
+
+
+def test_large_frames_are_scaled_to_the_cap():
+    frame = raw_to_ppm(make_screencap(1920, 1080))
+    assert (frame.width, frame.height) == (480, 270)
+    assert frame.width <= MIRROR_MAX_SIZE[0] and frame.height <= MIRROR_MAX_SIZE[1]
+    header = b"P6\n480 270\n255\n"
+    assert frame.data.startswith(header) and len(frame.data) == len(header) + 480 * 270 * 3
+
+
+def test_scaling_keeps_every_nth_pixel():
+    # Phase 0 puts a 32 px bar at x 0..31 on a dark background.
+    frame = raw_to_ppm(make_screencap(1024, 576, phase=0))
+    pixels = frame.data[len(b"P6\n512 288\n255\n"):]
+    assert pixels[:3] == b"\xe5\xe7\xeb"
+    assert pixels[16 * 3:17 * 3] == b"\x10\x18\x30"
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"", "no image"),
+    (b"screencap: permission denied\n", "permission denied"),
+    (make_screencap(64, 36)[:-10], None),
+], ids=["empty", "error text", "truncated"])
+def test_bad_captures_raise(data, message):
+    with pytest.raises(MirrorError, match=message):
+        raw_to_ppm(data)
+
+
+def test_unknown_pixel_format_raises():
+    data = bytearray(make_screencap(8, 8))
+    data[8] = 4
+    with pytest.raises(MirrorError, match="pixel format 4"):
+        raw_to_ppm(bytes(data))
+
+
+@pytest.mark.parametrize("serial, local", [
+    ("G070VM1234567890", True), ("emulator-5554", True), ("127.0.0.1:5555", True), ("localhost:5555", True),
+    ("[::1]:5555", True), ("192.168.1.50:5555", False), ("10.8.0.12:5555", False), ("tv.example.net:5555", False),
+    (None, False),
+])
+def test_raw_capture_is_only_used_on_local_links(serial, local):
+    assert local_link(serial) is local
+    assert ScreencapSource(serial).raw is local
+
+
+def test_png_header_is_read_for_the_size():
+    assert png_size(make_png(64, 36)) == (64, 36)
+    with pytest.raises(MirrorError, match="denied"):
+        png_size(b"screencap: permission denied\n")
+
+
+def test_network_links_fetch_png(adb_server, tmp_path, monkeypatch):
+    png = tmp_path / "screen.png"
+    png.write_bytes(make_png(1280, 720, phase=1))
+    monkeypatch.setenv("FSR_FAKE_PNG", str(png))
+    monkeypatch.delenv("FSR_FAKE_SCREEN", raising=False)
+    # Without PyAV the PNG goes to Tk as is, which scales it down.
+    monkeypatch.setattr(screen_mirror, "_load_av", lambda: None)
+    source = ScreencapSource(SERIAL)
+    frame = source.read()
+    assert source.link_bytes == png.stat().st_size
+    assert (frame.format, frame.width, frame.height, frame.data) == ("png", 1280, 720, png.read_bytes())
+
+
+def test_local_links_fetch_raw_frames(adb_server, tmp_path, monkeypatch):
+    screen = tmp_path / "screen.raw"
+    screen.write_bytes(make_screencap(1280, 720, phase=1))
+    monkeypatch.setenv("FSR_FAKE_SCREEN", str(screen))
+    monkeypatch.delenv("FSR_FAKE_PNG", raising=False)
+    source = ScreencapSource(SERIAL, raw=True)
+    frame = source.read()
+    assert (frame.format, frame.width, frame.height) == ("ppm", 427, 240)
+    assert source.link_bytes == 1280 * 720 * 4 + 16
+
+
+@pytest.mark.parametrize("raw", [True, False])
+def test_screencap_source_reports_device_errors(adb_server, monkeypatch, raw):
+    monkeypatch.delenv("FSR_FAKE_SCREEN", raising=False)
+    monkeypatch.delenv("FSR_FAKE_PNG", raising=False)
+    with pytest.raises(MirrorError):
+        ScreencapSource(SERIAL, raw=raw).read()
+
+
+def test_mirror_keeps_only_the_newest_frame():
+    source = FakeFrameSource(width=64, height=36, fps=100)
+    mirror = ScreenMirror(source)
+    mirror.start()
+    time.sleep(0.3)
+    frame = mirror.take()
+    mirror.stop()
+    assert frame is not None and frame.format == "ppm"
+    assert mirror.take() is None or mirror.frames > 1
+    stats = mirror.stats()
+    assert stats["frames"] > 1 and stats["dropped"] >= stats["frames"] - 2
+    assert source.closed
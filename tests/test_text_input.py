@@ -0,0 +1,102 @@
+import base64
+import threading
+
+import pytest
+
+import text_input
+from adb_commands import run_adb_shell
+from conftest import SERIAL
+from text_input import ADB_IME, TextSender, chunk_text, split_text
+
+
+@pytest.fixture
+def device_log(adb_server, tmp_path, monkeypatch):
+    path = tmp_path / "input.log"
+    monkeypatch.setenv("FSR_FAKE_INPUT_LOG", str(path))
+    monkeypatch.setattr(text_input, "_ime_available", {})
+    monkeypatch.setattr(text_input, "TEXT_CHUNK_PAUSE", 0.0)
+    monkeypatch.setattr(text_input, "IME_SWITCH_DELAY", 0.0)
+
+    def calls():
+        return path.read_text().splitlines() if path.exists() else []
+    return calls
+
+
+def _typed(calls) -> str:
+    # What the focused field ends up with, from the device's side.
+    text = ""
+    for call in calls:
+        parts = call.split(" ")
+        if parts[:2] == ["input", "text"]:
+            text += " ".join(parts[2:]).replace("%s", " ")
+        elif parts[:2] == ["input", "keyevent"]:
+            text += {"66": "\n", "61": "\t"}[parts[2]]
+        elif parts[:2] == ["am", "broadcast"]:
+            text += base64.b64decode(parts[-1]).decode("utf-8")
+    return text
+
+
+def test_split_text_groups_runs_by_kind():
+    assert split_text("ab\n\ncé ü!\t") == [
+        ("text", "ab"), ("key", "66"), ("key", "66"), ("text", "c"), ("unicode", "é"), ("text", " "),
+        ("unicode", "ü"), ("text", "!"), ("key", "61"),
+    ]
+
+
+def test_chunks_never_carry_a_literal_percent_s():
+    chunks = chunk_text("50%s off, 100%sure", 8)
+    assert "".join(chunks) == "50%s off, 100%sure"
+    assert all("%s" not in chunk for chunk in chunks)
+
+
+def test_long_text_arrives_in_order_and_in_chunks(device_log):
+    text = "Wi-Fi p@ss #1: it's \"quoted\" & (brackets) [x] {y} $HOME `id` ~/path; a|b 100%s " * 4
+    sender = TextSender(SERIAL, text, chunk_size=16)
+    ok, out, err = sender.run()
+    assert (ok, err) == (True, "")
+    assert _typed(device_log()) == text
+    assert sender.sent == len(text) and sender.chunks == len(device_log()) > 1
+    assert "chars/s" in out
+
+
+def test_newlines_and_tabs_are_key_presses(device_log):
+    assert TextSender(SERIAL, "user\tpass\n").run()[0]
+    assert device_log() == ["input text user", "input keyevent 61", "input text pass", "input keyevent 66"]
+
+
+def test_unicode_goes_through_the_ime_and_restores_the_keyboard(device_log, tmp_path, monkeypatch):
+    monkeypatch.setenv("FSR_FAKE_SETTINGS_DIR", str(tmp_path / "settings"))
+    run_adb_shell(["settings", "put", "secure", "default_input_method", "com.amazon.tv.ime/.FireTVIME"], SERIAL)
+    assert TextSender(SERIAL, "Café Straße").run()[0]
+    calls = device_log()
+    # Switched once, at the first non-ASCII run, and back once at the end.
+    assert [c for c in calls if c.startswith("ime")] == [f"ime set {ADB_IME}", "ime set com.amazon.tv.ime/.FireTVIME"]
+    assert calls[0] == "input text Caf" and calls[1] == f"ime set {ADB_IME}"
+    assert calls[-1] == "ime set com.amazon.tv.ime/.FireTVIME"
+    assert _typed(calls) == "Café Straße"
+
+
+def test_unicode_without_the_ime_fails_without_typing(device_log, monkeypatch):
+    monkeypatch.setattr(text_input, "_ime_available", {SERIAL: False})
+    ok, _, err = TextSender(SERIAL, "ok é").run()
+    assert not ok and "ADBKeyBoard" in err
+    assert device_log() == ["input text ok%s"]
+
+
+def test_slow_device_gets_smaller_chunks(device_log, monkeypatch):
+    monkeypatch.setenv("FSR_FAKE_INPUT_DELAY", "0.06")
+    monkeypatch.setattr(text_input, "TEXT_SLOW_CHUNK", 0.05)
+    sender = TextSender(SERIAL, "x" * 64, chunk_size=32)
+    assert sender.run()[0]
+    sizes = [len(call) - len("input text ") for call in device_log()]
+    assert sizes[:3] == [32, 16, 8] and sender.chunk_size == text_input.TEXT_CHUNK_MIN
+
+
+def test_cancel_stops_between_chunks(device_log):
+    cancel = threading.Event()
+
+    def on_progress(sent, total):
+        cancel.set()
+    sender = TextSender(SERIAL, "y" * 40, chunk_size=8, on_progress=on_progress, cancel=cancel)
+    assert sender.run() == (False, "", "cancelled")
+    assert sender.sent == 8 and len(device_log()) == 1
@@ -0,0 +1,171 @@
+import base64
+import threading
+import time
+
+from adb_commands import escape_adb_input_chunk, log, run_adb_shell
+
+# Typing long strings (Wi-Fi passwords, URLs, searches) into the focused
+# field. Text is split into chunks that are sent one at a time over the
+# device's shell session; each `input text` returns only once its events are
+# injected, so the next chunk never overtakes a slow device. Chunks shrink
+# when the device is slow and grow back when it keeps up. Characters
+# `input text` cannot type (anything outside printable ASCII) go through the
+# ADBKeyBoard IME broadcast instead of being dropped.
+
+TEXT_CHUNK_SIZE = 32
+TEXT_CHUNK_MIN = 8
+TEXT_CHUNK_MAX = 64
+TEXT_SLOW_CHUNK = 1.0
+TEXT_CHUNK_PAUSE = 0.02
+
+ADB_IME = "com.android.adbkeyboard/.AdbIME"
+IME_SWITCH_DELAY = 0.3
+
+CONTROL_KEYS = {"\n": 66, "\t": 61}
+
+_ime_available = {}
+_ime_lock = threading.Lock()
+
+
+def split_text(text: str):
+    segments = []
+    for ch in text:
+        if ch in CONTROL_KEYS:
+            kind, value = "key", str(CONTROL_KEYS[ch])
+        elif " " <= ch <= "~":
+            kind, value = "text", ch
+        else:
+            kind, value = "unicode", ch
+        if segments and segments[-1][0] == kind and kind != "key":
+            segments[-1][1] += value
+        else:
+            segments.append([kind, value])
+    return [(kind, value) for kind, value in segments]
+
+
+def chunk_text(text: str, size: int):
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        piece = text[start:end]
+        # `input text` turns a literal "%s" into a space; never send it in one piece.
+        if "%s" in piece:
+            end = start + piece.index("%s") + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def adb_ime_available(serial: str | None) -> bool:
+    with _ime_lock:
+        if serial in _ime_available:
+            return _ime_available[serial]
+    ok, out, _ = run_adb_shell(["ime", "list", "-s"], serial)
+    available = ok and ADB_IME in out.split()
+    with _ime_lock:
+        _ime_available[serial] = available
+    return available
+
+
+class TextSender:
+    def __init__(self, serial: str | None, text: str, chunk_size: int = TEXT_CHUNK_SIZE,
+                 on_progress=None, cancel: threading.Event | None = None):
+        self.serial = serial
+        self.text = text
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.cancel = cancel or threading.Event()
+        self.sent = 0
+        self.chunks = 0
+        self.elapsed = 0.0
+        self._previous_ime = None
+
+    @property
+    def chars_per_sec(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            ok, out, err = self._send_all()
+        finally:
+            self._restore_ime()
+            self.elapsed = time.monotonic() - started
+        if ok:
+            out = f"{self.sent} chars in {self.elapsed:.1f}s ({self.chars_per_sec:.0f} chars/s)"
+        return ok, out, err
+
+    def _send_all(self):
+        for kind, value in split_text(self.text):
+            if self.cancel.is_set():
+                return False, "", "cancelled"
+            if kind == "key":
+                ok, out, err = run_adb_shell(["input", "keyevent", value], self.serial)
+                if ok:
+                    self._advance(1)
+            elif kind == "text":
+                ok, out, err = self._send_ascii(value)
+            else:
+                ok, out, err = self._send_unicode(value)
+            if not ok:
+                return ok, out, err
+        return True, "", ""
+
+    def _advance(self, count: int):
+        self.sent += count
+        self.chunks += 1
+        if self.on_progress is not None:
+            self.on_progress(self.sent, len(self.text))
+
+    def _send_ascii(self, text: str):
+        start = 0
+        while start < len(text):
+            if self.cancel.is_set():
+                return False, "", "cancelled"
+            chunk = chunk_text(text[start:], self.chunk_size)[0]
+            t0 = time.monotonic()
+            ok, out, err = run_adb_shell(["input", "text", escape_adb_input_chunk(chunk)], self.serial)
+            if not ok:
+                return ok, out, err
+            took = time.monotonic() - t0
+            if took > TEXT_SLOW_CHUNK:
+                self.chunk_size = max(self.chunk_size // 2, TEXT_CHUNK_MIN)
+            elif took < TEXT_SLOW_CHUNK / 4:
+                self.chunk_size = min(self.chunk_size + TEXT_CHUNK_MIN, TEXT_CHUNK_MAX)
+            start += len(chunk)
+            self._advance(len(chunk))
+            if start < len(text):
+                time.sleep(TEXT_CHUNK_PAUSE)
+        return True, "", ""
+
+    def _send_unicode(self, text: str):
+        if not adb_ime_available(self.serial):
+            return False, "", (
+                f"cannot type {text!r}: non-ASCII text needs the ADBKeyBoard IME ({ADB_IME}) installed"
+            )
+        if self._previous_ime is None:
+            ok, out, err = run_adb_shell(["settings", "get", "secure", "default_input_method"], self.serial)
+            self._previous_ime = out.strip() if ok else ""
+            if self._previous_ime != ADB_IME:
+                ok, out, err = run_adb_shell(["ime", "set", ADB_IME], self.serial)
+                if not ok:
+                    return ok, out, err
+                time.sleep(IME_SWITCH_DELAY)
+        for chunk in chunk_text(text, self.chunk_size):
+            if self.cancel.is_set():
+                return False, "", "cancelled"
+            encoded = base64.b64encode(chunk.encode("utf-8")).decode("ascii")
+            ok, out, err = run_adb_shell(["am", "broadcast", "-a", "ADB_INPUT_B64", "--es", "msg", encoded],
+                                         self.serial)
+            if not ok:
+                return ok, out, err
+            self._advance(len(chunk))
+        return True, "", ""
+
+    def _restore_ime(self):
+        previous, self._previous_ime = self._previous_ime, None
+        if previous and previous not in (ADB_IME, "null"):
+            ok, _, err = run_adb_shell(["ime", "set", previous], self.serial)
+            if not ok:
+                log("could not restore input method >", previous, err, error=True)